@@ -0,0 +1,5 @@
+"""
+Load-test and benchmark suite for the REST API.
+
+Run it with ``python manage.py benchmark``; see ``core/management/commands/benchmark.py``.
+"""
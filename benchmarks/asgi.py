@@ -0,0 +1,108 @@
+import asyncio
+import time
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import include, path
+from core import urls as core_urls
+from core.views import (
+    AsyncReadView,
+    DoctorDetailView,
+    DoctorListCreateView,
+    MappingListCreateView,
+    PatientDetailView,
+    PatientListCreateView,
+)
+from . import runner
+from .scenarios import ScenarioContext
+
+READ_VIEWS = (
+    PatientListCreateView,
+    PatientDetailView,
+    DoctorListCreateView,
+    DoctorDetailView,
+    MappingListCreateView,
+)
+
+PATHS = ("/api/doctors/", "/api/patients/", "/api/mappings/")
+
+
+def async_urlconf():
+    """The project's URLs with the read views routed through `AsyncReadView`, as under ASGI."""
+    patterns = []
+    for pattern in core_urls.urlpatterns:
+        view_class = getattr(pattern.callback, "cls", None)
+        if view_class in READ_VIEWS:
+            pattern = path(
+                str(pattern.pattern), AsyncReadView.as_view(view_class), name=pattern.name
+            )
+        patterns.append(pattern)
+    return type("AsyncURLConf", (), {"urlpatterns": [path("api/", include(patterns))]})
+
+
+def run_wsgi(data, iterations, warmup, concurrency):
+    """The read paths through the synchronous views, one thread per concurrent client."""
+
+    def make_context():
+        context = ScenarioContext(client=Client(), data=data)
+        context.login()
+        return context
+
+    return runner.run(
+        f"wsgi:c{concurrency}",
+        lambda context, iteration: context.client.get(
+            PATHS[iteration % len(PATHS)], **context.headers
+        ),
+        make_context,
+        iterations=iterations,
+        warmup=warmup,
+        concurrency=concurrency,
+    )
+
+
+def run_asgi(data, iterations, warmup, concurrency):
+    """The same paths through `AsyncReadView`, every client a task on one event loop."""
+    context = ScenarioContext(client=Client(), data=data)
+    context.login()
+    headers = {"Authorization": context.headers["HTTP_AUTHORIZATION"]}
+
+    async def measure():
+        client = AsyncClient()
+        for iteration in range(warmup):
+            await client.get(PATHS[iteration % len(PATHS)], headers=headers)
+
+        async def worker(offset):
+            latencies, errors = [], 0
+            for iteration in range(offset, iterations, concurrency):
+                start = time.perf_counter()
+                response = await client.get(PATHS[iteration % len(PATHS)], headers=headers)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+            return latencies, errors
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+        return outcomes, time.perf_counter() - started
+
+    with override_settings(ROOT_URLCONF=async_urlconf()):
+        # Under `async_to_sync` the ORM's thread-sensitive work runs on this thread and its
+        # connection, like the WSGI run.
+        outcomes, seconds = async_to_sync(measure)()
+
+    latencies = [value for outcome in outcomes for value in outcome[0]]
+    errors = sum(outcome[1] for outcome in outcomes)
+    return runner.summarize(f"asgi:c{concurrency}", latencies, errors, seconds)
+
+
+def run(data, levels=(1, 64, 256), iterations=600, warmup=20):
+    """
+    Throughput and latency of the doctor, patient and mapping lists served WSGI-style (sync views,
+    a thread per client) and ASGI-style (`AsyncReadView`, a task per client) at each concurrency
+    in `levels`. Both run in-process, so they compare the request paths, not the servers.
+    """
+    results = []
+    for concurrency in levels:
+        results.append(run_wsgi(data, iterations, warmup, concurrency))
+        results.append(run_asgi(data, iterations, warmup, concurrency))
+    return results
@@ -0,0 +1,73 @@
+import io
+from datetime import date, datetime, time, timedelta, timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from core.models import Doctor, Patient, PatientDoctorTable
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+from core.serializers import PatientDoctorMappingSerializer
+from . import runner
+
+
+RENDERERS = (JSONRenderer, FastJSONRenderer)
+PARSERS = (JSONParser, FastJSONParser)
+
+
+def mapping_payload(rows):
+    """
+    A mapping-list response body of `rows` entries, produced by the real serializer from unsaved
+    instances so the shapes and value types match what the views render.
+    """
+    stamp = datetime(2025, 1, 1, 8, 30, 15, 123456, tzinfo=timezone.utc)
+    mappings = []
+    for index in range(rows):
+        patient = Patient(id=index // 4 + 1, first_name=f"Pat{index // 4}", last_name="Ient")
+        doctor = Doctor(id=index % 50 + 1, first_name=f"Doc{index % 50}", last_name="Tor")
+        mappings.append(
+            PatientDoctorTable(
+                id=index + 1,
+                patient=patient,
+                doctor=doctor,
+                appointment_date=date(2025, 1, 1) + timedelta(days=index % 365),
+                appointment_time=time(8 + index % 9, 30 * (index % 2)),
+                symptoms="Persistent dry cough and mild fever — 3 days",
+                diagnosis="Upper respiratory tract infection",
+                prescription="Rest, fluids, paracetamol 500 mg as needed",
+                is_active=True,
+                created_at=stamp,
+                updated_at=stamp,
+            )
+        )
+    return {
+        "status": "success",
+        "data": PatientDoctorMappingSerializer(mappings, many=True).data,
+    }
+
+
+def run(rows=1000, iterations=200, warmup=10):
+    """Time every renderer and parser on the same payload and return their `runner.Result`s."""
+    payload = mapping_payload(rows)
+    body = JSONRenderer().render(payload)
+    results = []
+
+    for renderer_class in RENDERERS:
+        renderer = renderer_class()
+        results.append(
+            runner.measure(
+                f"render:{renderer_class.__name__}:{rows}",
+                lambda: renderer.render(payload),
+                iterations,
+                warmup,
+            )
+        )
+    for parser_class in PARSERS:
+        parser = parser_class()
+        results.append(
+            runner.measure(
+                f"parse:{parser_class.__name__}:{rows}",
+                lambda: parser.parse(io.BytesIO(body)),
+                iterations,
+                warmup,
+            )
+        )
+    return results
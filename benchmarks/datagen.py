@@ -0,0 +1,159 @@
+import random
+from dataclasses import dataclass, field
+from datetime import date, time, timedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from core.models import Doctor, Patient, PatientDoctorTable
+
+
+BENCH_PASSWORD = "bench-pass-2718"
+SPECIALIZATIONS = (
+    "cardiology",
+    "dermatology",
+    "neurology",
+    "oncology",
+    "pediatrics",
+    "radiology",
+)
+# Slots per doctor per day used when spreading generated appointments over the calendar.
+SLOTS_PER_DAY = 16
+
+
+@dataclass
+class BenchmarkData:
+    username: str
+    password: str
+    patient_ids: list
+    doctor_ids: list
+    spare_patient_ids: list = field(default_factory=list)
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _slot(index):
+    day, slot = divmod(index, SLOTS_PER_DAY)
+    minutes = 8 * 60 + slot * 30
+    return date(2020, 1, 1) + timedelta(days=day), time(minutes // 60, minutes % 60)
+
+
+def generate(
+    users=10,
+    patients_per_user=20,
+    doctors=200,
+    mappings=10_000,
+    spare_patients=0,
+    batch_size=5000,
+    seed=1234,
+    log=lambda message: None,
+):
+    """
+    Insert a synthetic data set with `bulk_create` and return the `BenchmarkData` the scenarios
+    run against. Appointments spread over unique doctor slots, so they satisfy both the
+    unique-together and the active-slot constraints at any volume. The first user is the one the
+    scenarios log in as; `spare_patients` extra patients without appointments are added for it so
+    booking scenarios have fresh patient/doctor pairs.
+    """
+    rng = random.Random(seed)
+    password = make_password(BENCH_PASSWORD)
+
+    User.objects.bulk_create(
+        (
+            User(username=f"bench{index}", email=f"bench{index}@example.com", password=password)
+            for index in range(users)
+        ),
+        batch_size=batch_size,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith="bench")
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    log(f"users: {len(user_ids)}")
+
+    def patient_rows():
+        for user_index, user_id in enumerate(user_ids):
+            count = patients_per_user + (spare_patients if user_index == 0 else 0)
+            for index in range(count):
+                yield Patient(
+                    user_id=user_id,
+                    first_name=f"P{user_index}",
+                    last_name=f"Patient{index}",
+                    date_of_birth=date(1950, 1, 1) + timedelta(days=rng.randrange(20000)),
+                    gender=rng.choice(("male", "female", "other")),
+                    phone="+15550000000",
+                    email=f"p{user_index}-{index}@example.com",
+                    address="1 Benchmark Way",
+                    medical_history="none " * rng.randrange(1, 50),
+                )
+
+    for batch in _batched(patient_rows(), batch_size):
+        Patient.objects.bulk_create(batch)
+
+    def doctor_rows():
+        for index in range(doctors):
+            yield Doctor(
+                first_name=f"D{index}",
+                last_name=f"Doctor{index:06d}",
+                specialization=SPECIALIZATIONS[index % len(SPECIALIZATIONS)],
+                phone="+15551111111",
+                email=f"d{index}@example.com",
+                license=f"BENCH-{index}",
+                address="2 Benchmark Way",
+            )
+
+    for batch in _batched(doctor_rows(), batch_size):
+        Doctor.objects.bulk_create(batch)
+    doctor_ids = list(Doctor.objects.order_by("id").values_list("id", flat=True))
+    log(f"doctors: {len(doctor_ids)}")
+
+    first_user = user_ids[0]
+    owned = list(
+        Patient.objects.filter(user_id=first_user)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    patient_ids, spare_ids = owned[:patients_per_user], owned[patients_per_user:]
+    all_patient_ids = list(
+        Patient.objects.exclude(id__in=spare_ids)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    def mapping_rows():
+        for index in range(mappings):
+            doctor_index, slot_index = index % len(doctor_ids), index // len(doctor_ids)
+            day, start = _slot(slot_index)
+            yield PatientDoctorTable(
+                patient_id=rng.choice(all_patient_ids),
+                doctor_id=doctor_ids[doctor_index],
+                appointment_date=day,
+                appointment_time=start,
+                symptoms="synthetic symptoms",
+                diagnosis="synthetic diagnosis",
+                prescription="synthetic prescription",
+            )
+
+    created = 0
+    for batch in _batched(mapping_rows(), batch_size):
+        PatientDoctorTable.objects.bulk_create(batch)
+        created += len(batch)
+        if created % (batch_size * 20) == 0:
+            log(f"mappings: {created}")
+    log(f"mappings: {created}")
+
+    return BenchmarkData(
+        username="bench0",
+        password=BENCH_PASSWORD,
+        patient_ids=patient_ids,
+        doctor_ids=doctor_ids,
+        spare_patient_ids=spare_ids,
+    )
@@ -0,0 +1,39 @@
+from core.models import PatientDoctorTable
+from core.query_shaping import shape_queryset
+from core.readplans import get_read_plan
+from core.serializers import PatientDoctorMappingSerializer
+from . import runner
+
+
+def run(sizes=(1000, 100_000), iterations=5, warmup=1):
+    """
+    Compare rows/sec of rendering the mapping list through `PatientDoctorMappingSerializer` and
+    through its compiled read plan, both including the query, at each size in `sizes`.
+    """
+    serializer_class = PatientDoctorMappingSerializer
+    plan = get_read_plan(serializer_class)
+    results = []
+    for size in sizes:
+        queryset = PatientDoctorTable.objects.order_by("id")[:size]
+        rows = queryset.count()
+        results.append(
+            runner.measure(
+                f"serializer:{size}",
+                lambda: serializer_class(
+                    shape_queryset(queryset, serializer_class), many=True
+                ).data,
+                iterations,
+                warmup,
+                items=rows,
+            )
+        )
+        results.append(
+            runner.measure(
+                f"readplan:{size}",
+                lambda: plan.render(plan.values(queryset)),
+                iterations,
+                warmup,
+                items=rows,
+            )
+        )
+    return results
@@ -0,0 +1,139 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from django.db import connections
+
+
+@dataclass
+class Result:
+    name: str
+    requests: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+    def format(self):
+        return (
+            f"{self.name:<20} {self.requests:>7} req {self.errors:>5} err "
+            f"{self.throughput:>9.1f} req/s  p50 {self.p50_ms:>8.2f} ms  "
+            f"p95 {self.p95_ms:>8.2f} ms  p99 {self.p99_ms:>8.2f} ms"
+        )
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(name, latencies, errors, seconds):
+    return Result(
+        name=name,
+        requests=len(latencies),
+        errors=errors,
+        seconds=seconds,
+        throughput=len(latencies) / seconds if seconds else 0.0,
+        p50_ms=percentile(latencies, 0.50) * 1000,
+        p95_ms=percentile(latencies, 0.95) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+    )
+
+
+def measure(name, func, iterations, warmup=0, items=1):
+    """
+    Time `iterations` calls of `func()` after `warmup` unmeasured ones. Each call counts as
+    `items` requests (e.g. rows rendered), so throughput is items per second while the
+    percentiles stay per call.
+    """
+    for _ in range(warmup):
+        func()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    seconds = time.perf_counter() - started
+
+    result = summarize(name, latencies, 0, seconds)
+    result.requests = iterations * items
+    result.throughput = result.requests / seconds if seconds else 0.0
+    return result
+
+
+def run(name, func, make_context, iterations, warmup=0, concurrency=1):
+    """
+    Call `func(context, iteration)` `iterations` times after `warmup` unmeasured calls, spread
+    over `concurrency` threads each with its own context (created before timing starts), and
+    summarize the latencies. Responses
+    with a status of 400 or above count as errors.
+    """
+    contexts = [make_context() for _ in range(concurrency)]
+    for iteration in range(warmup):
+        func(contexts[0], iteration)
+
+    def worker(offset):
+        latencies, errors = [], 0
+        try:
+            for iteration in range(offset, iterations, concurrency):
+                start = time.perf_counter()
+                response = func(contexts[offset], warmup + iteration)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+        finally:
+            if concurrency > 1:
+                connections.close_all()
+        return latencies, errors
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            outcomes = list(pool.map(worker, range(concurrency)))
+    else:
+        outcomes = [worker(0)]
+    seconds = time.perf_counter() - started
+
+    latencies = [value for outcome in outcomes for value in outcome[0]]
+    errors = sum(outcome[1] for outcome in outcomes)
+    return summarize(name, latencies, errors, seconds)
+
+
+def save_baseline(path, results):
+    with open(path, "w") as handle:
+        json.dump({result.name: asdict(result) for result in results}, handle, indent=2)
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Return human-readable regressions of `results` against the baseline file: p95 latency more
+    than `tolerance` above, or throughput more than `tolerance` below, the stored run.
+    """
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None:
+            continue
+        if result.p95_ms > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: p95 {result.p95_ms:.2f} ms vs baseline "
+                f"{reference['p95_ms']:.2f} ms"
+            )
+        if result.throughput < reference["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: {result.throughput:.1f} req/s vs baseline "
+                f"{reference['throughput']:.1f} req/s"
+            )
+        if result.errors > reference.get("errors", 0):
+            regressions.append(
+                f"{result.name}: {result.errors} errors vs baseline {reference['errors']}"
+            )
+    return regressions
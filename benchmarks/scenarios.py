@@ -0,0 +1,79 @@
+import json
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from django.test import Client
+
+
+@dataclass
+class ScenarioContext:
+    client: Client
+    data: object
+    headers: dict = field(default_factory=dict)
+
+    def login(self):
+        response = self.client.post(
+            "/api/auth/login/",
+            {"username": self.data.username, "password": self.data.password},
+            content_type="application/json",
+        )
+        token = json.loads(response.content)["access"]
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+
+    return register
+
+
+@scenario("login")
+def login(ctx, iteration):
+    return ctx.client.post(
+        "/api/auth/login/",
+        {"username": ctx.data.username, "password": ctx.data.password},
+        content_type="application/json",
+    )
+
+
+@scenario("list_doctors")
+def list_doctors(ctx, iteration):
+    return ctx.client.get("/api/doctors/", **ctx.headers)
+
+
+@scenario("list_mappings")
+def list_mappings(ctx, iteration):
+    return ctx.client.get("/api/mappings/", **ctx.headers)
+
+
+@scenario("patient_doctors")
+def patient_doctors(ctx, iteration):
+    patient_id = ctx.data.patient_ids[iteration % len(ctx.data.patient_ids)]
+    return ctx.client.get(f"/api/mappings/patient/{patient_id}/", **ctx.headers)
+
+
+@scenario("create_mapping")
+def create_mapping(ctx, iteration):
+    # Every iteration books a spare patient with a doctor at a distinct far-future slot, so no
+    # request is rejected as a duplicate assignment or a taken slot.
+    patient_id = ctx.data.spare_patient_ids[iteration % len(ctx.data.spare_patient_ids)]
+    doctor_id = ctx.data.doctor_ids[iteration % len(ctx.data.doctor_ids)]
+    day = date.today() + timedelta(days=365 + iteration // len(ctx.data.doctor_ids))
+    return ctx.client.post(
+        "/api/mappings/",
+        {
+            "patient": patient_id,
+            "doctor": doctor_id,
+            "appointment_date": day.isoformat(),
+            "appointment_time": "07:00",
+            "symptoms": "benchmark",
+            "diagnosis": "benchmark",
+            "prescription": "benchmark",
+        },
+        content_type="application/json",
+        **ctx.headers,
+    )
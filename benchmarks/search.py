@@ -0,0 +1,72 @@
+import random
+from core.search import DOCTOR, SearchIndex
+from . import runner
+
+FIRST_NAMES = [
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David",
+    "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah",
+    "Charles", "Karen", "Christopher", "Lisa", "Daniel", "Nancy", "Matthew", "Betty", "Anthony",
+    "Sandra", "Mark", "Margaret", "Ana", "José", "Wei", "Yuki", "Fatima", "Olga", "Priya", "Omar",
+]
+LAST_SYLLABLES = [
+    "an", "ber", "car", "den", "el", "far", "gan", "har", "is", "jon", "kel", "lan", "mor",
+    "nor", "ol", "per", "quin", "ros", "son", "ter", "ul", "ver", "wick", "xan", "yor", "zel",
+]
+SPECIALIZATIONS = [
+    "Cardiology", "Dermatology", "Endocrinology", "Gastroenterology", "Neurology", "Oncology",
+    "Pediatrics", "Psychiatry", "Radiology", "Orthopedics", "Ophthalmology", "Urology",
+]
+QUERIES = {
+    "1-char": ["a", "m", "s", "c"],
+    "3-char": ["jam", "car", "neu", "ros"],
+    "word": ["james", "cardiology", "oncology", "maria"],
+    "2-words": ["jam car", "neuro pri", "card ber", "mar son"],
+    "miss": ["zzz", "qqq xyz"],
+}
+
+
+def doctor_rows(count, seed=0):
+    rng = random.Random(seed)
+    for doc_id in range(1, count + 1):
+        last = "".join(rng.choice(LAST_SYLLABLES) for _ in range(3)).capitalize()
+        yield doc_id, {
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": last,
+            "specialization": rng.choice(SPECIALIZATIONS),
+        }
+
+
+def build(count):
+    index = SearchIndex(DOCTOR.weights)
+    for doc_id, row in doctor_rows(count):
+        name = f"Dr. {row['first_name']} {row['last_name']}"
+        index.add(doc_id, row, {"type": DOCTOR.name, "id": doc_id, "name": name})
+    return index
+
+
+def run(doctors=100_000, iterations=200, warmup=20, limit=10):
+    """
+    Autocomplete latency of the in-memory doctor index at `doctors` synthetic doctors, per class
+    of query (single letters match a large share of the index, full words few), with and without
+    the prefix cache, plus the time one full build takes.
+    """
+    built = []
+    results = [
+        runner.measure(
+            f"search:build:{doctors}", lambda: built.append(build(doctors)), 1, items=doctors
+        )
+    ]
+    index = built[0]
+    for name, queries in QUERIES.items():
+        for cold in (False, True):
+            cycle = iter(range(iterations + warmup))
+
+            def query():
+                if cold:
+                    # As right after a write, which empties the prefix cache.
+                    index.matches.clear()
+                return index.search(queries[next(cycle) % len(queries)], limit)
+
+            label = f"search:{name}:cold" if cold else f"search:{name}"
+            results.append(runner.measure(label, query, iterations, warmup))
+    return results
@@ -0,0 +1,53 @@
+import threading
+import time
+from core.models import Task
+from core.tasks import Worker, task
+from . import runner
+
+# Seconds from enqueue to completion of every `noop` run, as seen by the workers.
+_latencies = []
+_lock = threading.Lock()
+
+
+@task(name="benchmarks.noop")
+def noop(enqueued_at):
+    with _lock:
+        _latencies.append(time.time() - enqueued_at)
+
+
+def drain(workers, batch_size):
+    """Run `workers` burst workers in threads until the queue is empty; returns their errors."""
+    pool = [Worker(name=f"bench-{index}", batch_size=batch_size) for index in range(workers)]
+    threads = [threading.Thread(target=worker.run, kwargs={"burst": True}) for worker in pool]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(worker.failed + worker.errors for worker in pool)
+
+
+def run(tasks=2000, worker_counts=(1,), batch_size=10, warmup=20):
+    """
+    Enqueue latency of single tasks, then end-to-end throughput of draining `tasks` no-op tasks
+    with each of `worker_counts` workers (threads with a connection each) and the percentiles of
+    their enqueue-to-completion latency. SQLite serializes the claims; PostgreSQL shows scaling.
+    """
+    results = [
+        runner.measure(
+            "tasks:enqueue", lambda: noop.enqueue(enqueued_at=time.time()), tasks, warmup
+        )
+    ]
+    drain(1, batch_size)
+    for workers in worker_counts:
+        Task.objects.all().delete()
+        _latencies.clear()
+        Task.objects.bulk_create(
+            Task(name=noop.task_name, payload={"enqueued_at": time.time()}) for _ in range(tasks)
+        )
+        started = time.perf_counter()
+        errors = drain(workers, batch_size)
+        seconds = time.perf_counter() - started
+        results.append(
+            runner.summarize(f"tasks:drain:{workers}w", list(_latencies), errors, seconds)
+        )
+    return results
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from .cache import LRUCache
+from .models import ArchivedMapping, MappingHistory, PatientDoctorTable
+
+
+ARCHIVED_FIELDS = [field.attname for field in PatientDoctorTable._meta.concrete_fields]
+
+_options = getattr(settings, "MAPPING_ARCHIVE", {})
+horizon_cache = LRUCache(1, _options.get("HORIZON_TTL", 60))
+
+
+def archive_horizon():
+    """
+    The day after the newest archived appointment, or None while the archive is empty: ranges
+    starting before it need the archive. Re-read every `HORIZON_TTL` seconds.
+    """
+    cached = horizon_cache.get("horizon")
+    if cached is None:
+        newest = ArchivedMapping.objects.aggregate(newest=Max("appointment_date"))["newest"]
+        cached = (newest + timedelta(days=1) if newest else None,)
+        horizon_cache.set("horizon", cached)
+    return cached[0]
+
+
+def reaches_archive(date_from):
+    """
+    Whether mappings from `date_from` on (None: no lower bound) may sit in the archive. Runs with
+    the configured ages never archive a date on or after today's cutoffs, so ranges starting
+    before those always read the archive, without the cached horizon; only rows archived with
+    shorter `--days` / `--inactive-days` wait for the horizon to be re-read.
+    """
+    if date_from is None or date_from < max(archive_cutoffs()):
+        return True
+    horizon = archive_horizon()
+    return horizon is not None and date_from < horizon
+
+
+def appointment_queryset(date_from=None, date_to=None):
+    """
+    Mappings with an appointment between `date_from` and `date_to` (inclusive, either may be
+    open). Without a range, or when the range cannot reach archived rows, only the live table is
+    read; otherwise the history view over live and archived rows.
+    """
+    model = PatientDoctorTable
+    if (date_from is not None or date_to is not None) and reaches_archive(date_from):
+        model = MappingHistory
+    queryset = model.objects.all()
+    if date_from is not None:
+        queryset = queryset.filter(appointment_date__gte=date_from)
+    if date_to is not None:
+        queryset = queryset.filter(appointment_date__lte=date_to)
+    return queryset
+
+
+def archive_cutoffs(days=None, inactive_days=None, today=None):
+    """`(before, inactive_before)`: appointment dates older than these get archived."""
+    today = today or timezone.localdate()
+    days = _options.get("DAYS", 365) if days is None else days
+    inactive_days = _options.get("INACTIVE_DAYS", 30) if inactive_days is None else inactive_days
+    return today - timedelta(days=days), today - timedelta(days=inactive_days)
+
+
+def archive_batch(before, inactive_before, batch_size):
+    """
+    Move up to `batch_size` mappings dated before `before`, or inactive and dated before
+    `inactive_before`, to `ArchivedMapping` in one transaction; returns how many moved.
+    """
+    # The date bound on every statement lets PostgreSQL skip the partitions of recent months.
+    live = PatientDoctorTable.objects.filter(
+        appointment_date__lt=max(before, inactive_before)
+    )
+    due = Q(appointment_date__lt=before) | Q(is_active=False, appointment_date__lt=inactive_before)
+    with transaction.atomic():
+        rows = list(
+            live.filter(due)
+            .select_for_update()
+            .order_by("appointment_date", "id")
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ArchivedMapping.objects.bulk_create(ArchivedMapping(**row) for row in rows)
+        live.filter(id__in=[row["id"] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_mappings(before, inactive_before, batch_size=1000):
+    """Archive every due mapping, batch by batch; yields the size of each batch."""
+    try:
+        while True:
+            moved = archive_batch(before, inactive_before, batch_size)
+            if not moved:
+                return
+            yield moved
+    finally:
+        horizon_cache.clear()
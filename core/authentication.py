@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .cache import LRUCache
+from .models import TokenUser, UserTokenVersion
+
+
+TOKEN_VERSION_CLAIM = "tv"
+ACTIVE_CLAIM = "active"
+STAFF_CLAIM = "staff"
+USERNAME_CLAIM = "username"
+
+_options = getattr(settings, "JWT_USER_CACHE", {})
+token_versions = LRUCache(_options.get("MAX_ENTRIES", 10000), _options.get("TTL", 30))
+
+
+def get_token_version(user_id):
+    version = token_versions.get(user_id)
+    if version is None:
+        # Read from the primary: a lagging replica would reject tokens issued after a revocation.
+        version = (
+            UserTokenVersion.objects.using(DEFAULT_DB_ALIAS)
+            .filter(user_id=user_id)
+            .values_list("version", flat=True)
+            .first()
+        ) or 0
+        token_versions.set(user_id, version)
+    return version
+
+
+def revoke_tokens(user_id):
+    """
+    Invalidate every access and refresh token issued to `user_id` so far. Other processes notice
+    once their cached version expires (`JWT_USER_CACHE["TTL"]` seconds).
+    """
+    with transaction.atomic():
+        UserTokenVersion.objects.get_or_create(user_id=user_id)
+        UserTokenVersion.objects.filter(user_id=user_id).update(version=F("version") + 1)
+    token_versions.delete(user_id)
+
+
+def token_user_id(token):
+    # simplejwt stores the id claim as a string; cache keys and the `User` need the real type.
+    return User._meta.pk.to_python(token[jwt_settings.USER_ID_CLAIM])
+
+
+def token_user(validated_token):
+    """A read-only `User` carrying the token's identity claims, built without the database."""
+    user = TokenUser(
+        id=token_user_id(validated_token),
+        username=validated_token.get(USERNAME_CLAIM, ""),
+        is_active=True,
+        is_staff=validated_token.get(STAFF_CLAIM, False),
+    )
+    user._state.adding = False
+    user._state.db = DEFAULT_DB_ALIAS
+    return user
+
+
+def check_token_version(token):
+    if token.get(TOKEN_VERSION_CLAIM) != get_token_version(token_user_id(token)):
+        raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+
+# The `CachedJWTAuthentication` class trusts the signed claims of access tokens issued by
+# `VersionedTokenObtainPairSerializer` instead of loading the user row on every request; only the
+# user's token version is looked up, through a short-lived in-process cache.
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            # Tokens issued before the versioned claims existed.
+            return super().get_user(validated_token)
+
+        if jwt_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        if not validated_token.get(ACTIVE_CLAIM, False):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        check_token_version(validated_token)
+        return token_user(validated_token)
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = get_token_version(user.pk)
+        token[ACTIVE_CLAIM] = user.is_active
+        token[STAFF_CLAIM] = user.is_staff
+        token[USERNAME_CLAIM] = user.get_username()
+        return token
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if TOKEN_VERSION_CLAIM in refresh:
+            check_token_version(refresh)
+        return super().validate(attrs)
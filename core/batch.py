@@ -0,0 +1,105 @@
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlsplit
+from django.db import connection, transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from .routers import primary
+
+
+# Response headers worth handing back for each sub-request.
+FORWARDED_HEADERS = ("ETag", "Last-Modified", "Location", "Idempotent-Replayed")
+
+
+def _sub_request(request, item):
+    """
+    A GET `HttpRequest` for `item` that carries the batch request's authenticated user and token,
+    so DRF skips authentication for it (see `rest_framework.request.ForcedAuthentication`).
+    """
+    parts = urlsplit(item["path"])
+    sub = HttpRequest()
+    sub.method = item["method"]
+    sub.path = sub.path_info = parts.path
+    sub.META = {
+        key: value
+        for key, value in request.META.items()
+        if not key.startswith("HTTP_") and key not in ("CONTENT_LENGTH", "CONTENT_TYPE")
+    }
+    sub.META.update(
+        {
+            "REQUEST_METHOD": item["method"],
+            "PATH_INFO": parts.path,
+            "QUERY_STRING": parts.query,
+            "HTTP_ACCEPT": "application/json",
+            "HTTP_HOST": request.get_host(),
+        }
+    )
+    for name, value in item["headers"].items():
+        header = "HTTP_" + name.upper().replace("-", "_")
+        if header != "HTTP_AUTHORIZATION":
+            sub.META[header] = value
+    sub.GET = QueryDict(parts.query)
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def _error(item, status_code, message):
+    return {
+        "id": item.get("id"),
+        "status": status_code,
+        "headers": {},
+        "body": {"status": "error", "message": message},
+    }
+
+
+def execute_one(request, item, batch_view):
+    try:
+        match = resolve(urlsplit(item["path"]).path)
+    except Resolver404:
+        return _error(item, 404, "Not found")
+    # Sub-requests share the batch's transaction, so async routes run their synchronous view.
+    func = getattr(match.func, "sync_view", match.func)
+    view_class = getattr(func, "view_class", None) or getattr(func, "cls", None)
+    if view_class is None or view_class is batch_view:
+        return _error(item, 400, "This route cannot be batched")
+
+    response = func(_sub_request(request, item), *match.args, **match.kwargs)
+    if response.streaming:
+        return _error(item, 400, "Streaming responses cannot be batched")
+
+    if hasattr(response, "data"):
+        # DRF responses are returned as data and rendered once, with the batch payload.
+        body = response.data
+    else:
+        body = response.content.decode(response.charset) or None
+    return {
+        "id": item.get("id"),
+        "status": response.status_code,
+        "headers": {
+            name: response[name] for name in FORWARDED_HEADERS if response.has_header(name)
+        },
+        "body": body,
+    }
+
+
+@contextmanager
+def read_transaction():
+    """
+    One transaction for all sub-requests, on the primary. On PostgreSQL it is a read-only
+    REPEATABLE READ transaction, so every sub-request sees the same snapshot.
+    """
+    outermost = not connection.in_atomic_block
+    with primary(), transaction.atomic():
+        if outermost and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        yield
+
+
+def execute_batch(request, items, atomic=False, batch_view=None):
+    """
+    Run the GET sub-requests `items` in-process, in order, on the current thread's database
+    connection, sharing the authentication already done for `request`.
+    """
+    with read_transaction() if atomic else nullcontext():
+        return [execute_one(request, item, batch_view) for item in items]
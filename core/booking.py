@@ -0,0 +1,64 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError
+from .locks import advisory_lock
+from .models import PatientDoctorTable
+from .scheduling import Availability
+
+
+# `SlotUnavailable` is raised when a doctor slot already holds an active appointment.
+class SlotUnavailable(Exception):
+
+    def __init__(self, doctor_id, day, start):
+        super().__init__(f"Doctor {doctor_id} is already booked on {day} at {start}")
+        self.doctor_id = doctor_id
+        self.day = day
+        self.start = start
+
+    def alternatives(self):
+        """The next free slots of the same doctor, starting from the requested day."""
+        options = getattr(settings, "BOOKING", {})
+        days = options.get("ALTERNATIVE_DAYS", 7)
+        availability = Availability(
+            [self.doctor_id], self.day, self.day + timedelta(days=days - 1)
+        )
+        return availability.earliest(options.get("ALTERNATIVES", 5))
+
+
+def _slot_taken(doctor_id, day, start):
+    return PatientDoctorTable.objects.filter(
+        doctor_id=doctor_id,
+        appointment_date=day,
+        appointment_time=start,
+        is_active=True,
+    ).exists()
+
+
+def reserve_slot(serializer, on_reserved=None):
+    """
+    Save a validated `PatientDoctorMappingSerializer` while holding the lock of its doctor slot.
+
+    The availability check and the INSERT run under the same lock, and the partial unique
+    constraint on active doctor slots backs it up, so concurrent requests for one slot produce
+    exactly one appointment; the others get `SlotUnavailable`. `on_reserved` is called with the
+    new appointment before the lock's transaction ends, so whatever it writes (queued tasks)
+    commits or rolls back with the appointment.
+    """
+    data = serializer.validated_data
+    doctor_id = data["doctor"].pk
+    day = data["appointment_date"]
+    start = data["appointment_time"]
+    active = data.get("is_active", True)
+
+    try:
+        with advisory_lock("doctor-slot", doctor_id, day, start):
+            if active and _slot_taken(doctor_id, day, start):
+                raise SlotUnavailable(doctor_id, day, start)
+            instance = serializer.save()
+            if on_reserved is not None:
+                on_reserved(instance)
+            return instance
+    except IntegrityError:
+        if active and _slot_taken(doctor_id, day, start):
+            raise SlotUnavailable(doctor_id, day, start)
+        raise
@@ -0,0 +1,107 @@
+from itertools import islice
+from django.db import IntegrityError, transaction
+from .parsers import InvalidLine
+
+
+def _batches(rows, size):
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# The `BulkImporter` class validates and inserts rows for a `ModelSerializer` in batches: field
+# validation runs per row, email uniqueness is checked with one query per batch and valid rows are
+# written with `bulk_create`. Invalid rows are reported without aborting the import. `defaults` are
+# model attributes set on every row as they are; their fields are left out of validation.
+class BulkImporter:
+
+    def __init__(self, serializer_class, batch_size=500, context=None, defaults=None):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.batch_size = batch_size
+        self.context = dict(context or {}, bulk=True)
+        self.defaults = defaults or {}
+        self.created = []
+        self.errors = []
+        self.seen_emails = set()
+
+    def run(self, rows):
+        with transaction.atomic():
+            for batch in _batches(enumerate(rows), self.batch_size):
+                self.import_batch(batch)
+        return {
+            "created": len(self.created),
+            "failed": len(self.errors),
+            "ids": [instance.pk for instance in self.created],
+            "errors": self.errors,
+        }
+
+    def import_batch(self, batch):
+        valid = []
+        for index, row in batch:
+            if isinstance(row, InvalidLine):
+                self.errors.append({"row": index, "errors": {"detail": [row.message]}})
+                continue
+            if not isinstance(row, dict):
+                self.errors.append(
+                    {"row": index, "errors": {"detail": ["Expected a JSON object."]}}
+                )
+                continue
+
+            serializer = self.serializer_class(data=row, context=self.context)
+            for name in self.defaults:
+                serializer.fields.pop(name, None)
+            if not serializer.is_valid():
+                self.errors.append({"row": index, "errors": serializer.errors})
+                continue
+            valid.append((index, serializer.validated_data))
+
+        valid = self.check_emails(valid)
+        instances = [(index, self.model(**data, **self.defaults)) for index, data in valid]
+        if instances:
+            self.insert(instances)
+
+    def check_emails(self, valid):
+        emails = {data["email"] for _, data in valid if data.get("email")}
+        existing = set(
+            self.model.objects.filter(email__in=emails).values_list("email", flat=True)
+        )
+        label = self.model._meta.verbose_name
+        unique = []
+        for index, data in valid:
+            email = data.get("email")
+            if email in existing or email in self.seen_emails:
+                self.errors.append(
+                    {
+                        "row": index,
+                        "errors": {
+                            "email": [f"A {label} with email : {email} already exists."]
+                        },
+                    }
+                )
+                continue
+            self.seen_emails.add(email)
+            unique.append((index, data))
+        return unique
+
+    def insert(self, instances):
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(
+                    [instance for _, instance in instances], batch_size=self.batch_size
+                )
+            self.created.extend(instance for _, instance in instances)
+        except IntegrityError:
+            # Something in the batch violates a constraint; isolate it row by row.
+            for index, instance in instances:
+                instance.pk = None
+                instance._state.adding = True
+                try:
+                    with transaction.atomic():
+                        instance.save(force_insert=True)
+                    self.created.append(instance)
+                except IntegrityError as exc:
+                    self.errors.append({"row": index, "errors": {"detail": [str(exc)]}})
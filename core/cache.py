@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+_MISSING = object()
+
+
+# The `LRUCache` class is a small thread-safe in-process cache with least-recently-used eviction
+# and a time-to-live per entry.
+class LRUCache:
+
+    def __init__(self, max_entries=256, ttl=60, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self.clock() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def is_local_memory(cache):
+    return isinstance(cache, LocMemCache)
+
+
+# The `DjangoCacheBackend` class is the shared (cross-process) store of the doctor directory. It
+# wraps one of the `CACHES` aliases, so it is Redis in production and local memory in tests.
+class DjangoCacheBackend:
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def shared(self):
+        """False for a local-memory cache, which other worker processes never see."""
+        return not is_local_memory(self.cache)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl):
+        self.cache.set(key, value, ttl)
+
+    def incr(self, key):
+        # `add` is a no-op when the key exists, so concurrent first bumps don't reset each other.
+        self.cache.add(key, 1, None)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Evicted between the add and the incr.
+            self.cache.add(key, 2, None)
+            return self.cache.get(key)
+
+
+# The `DoctorDirectory` class caches serialized pages of the active-doctor list under a version
+# number; bumping the version on any doctor write makes every cached page unreachable at once.
+class DoctorDirectory:
+
+    version_key = "doctor-directory:version"
+    page_key_prefix = "doctor-directory:page"
+
+    def __init__(self, local, shared, ttl=60, version_ttl=1):
+        self.local = local
+        self.shared = shared
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+
+    @property
+    def versions_shared(self):
+        """
+        Whether every worker sees the same version counter, so it can validate the list on its
+        own. Backends that cannot tell are taken to be shared.
+        """
+        return getattr(self.shared, "shared", True)
+
+    def get_version(self):
+        if self.version_ttl:
+            version = self.local.get(self.version_key)
+            if version is not None:
+                return version
+
+        version = self.shared.get(self.version_key)
+        if version is None:
+            version = 1
+        if self.version_ttl:
+            self.local.set(self.version_key, version, self.version_ttl)
+        return version
+
+    def lookup(self, page):
+        """
+        Return `(version, payload)` for the page identified by `page`; `payload` is None on a miss
+        and `version` is what `store` must be called with once the page has been rendered.
+        """
+        version = self.get_version()
+        key = f"{self.page_key_prefix}:{version}:{page}"
+
+        payload = self.local.get(key)
+        if payload is None:
+            payload = self.shared.get(key)
+            if payload is not None:
+                self.local.set(key, payload)
+        return version, payload
+
+    def store(self, version, page, payload):
+        key = f"{self.page_key_prefix}:{version}:{page}"
+        self.local.set(key, payload)
+        self.shared.set(key, payload, self.ttl)
+
+    def invalidate(self):
+        version = self.shared.incr(self.version_key)
+        self.local.clear()
+        return version
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def get_doctor_directory():
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                options = getattr(settings, "DOCTOR_DIRECTORY_CACHE", {})
+                backend_class = import_string(
+                    options.get("SHARED_BACKEND", "core.cache.DjangoCacheBackend")
+                )
+                ttl = options.get("TTL", 60)
+                _directory = DoctorDirectory(
+                    local=LRUCache(options.get("LOCAL_MAX_ENTRIES", 256), ttl),
+                    shared=backend_class(**options.get("SHARED_BACKEND_OPTIONS", {})),
+                    ttl=ttl,
+                    version_ttl=options.get("VERSION_TTL", 1),
+                )
+    return _directory
+
+
+def doctor_directory_enabled():
+    return getattr(settings, "DOCTOR_DIRECTORY_CACHE", {}).get("ENABLED", True)
+
+
+def doctor_directory_changed():
+    """
+    Invalidate the directory once the current transaction commits, then queue the warming of its
+    `WARM_URLS` pages (see `core.tasks.handlers.warm_doctor_directory`).
+    """
+    from .tasks.handlers import warm_doctor_directory
+
+    def changed():
+        get_doctor_directory().invalidate()
+        if getattr(settings, "DOCTOR_DIRECTORY_CACHE", {}).get("WARM_URLS"):
+            warm_doctor_directory.enqueue(unique=True)
+
+    transaction.on_commit(changed)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from .cache import is_local_memory
+from .routers import replica_aliases, replica_settings
+
+
+@checks.register(checks.Tags.caches)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """
+    Read-your-writes pins must live in a cache every worker sees: a write handled by one worker
+    has to pin the user's next read on any other.
+    """
+    alias = replica_settings().get("PIN_CACHE", "default")
+    if not replica_aliases() or alias not in settings.CACHES:
+        return []
+    if not is_local_memory(caches[alias]):
+        return []
+    return [
+        checks.Warning(
+            f"READ_REPLICAS['PIN_CACHE'] ({alias!r}) is a local-memory cache, so a write only "
+            "pins the reads served by the same process to the primary.",
+            hint="Point the pin cache at a shared backend (set CACHE_REDIS_URL), or run a "
+            "single worker process.",
+            id="core.W001",
+        )
+    ]
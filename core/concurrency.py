@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+from .conditional import PreconditionFailed
+
+
+def conditional_update(serializer, versions):
+    """
+    Save `serializer.validated_data` onto `serializer.instance` with a single
+    `UPDATE ... WHERE pk = %s AND updated_at IN (versions)`, so a row changed since the client read
+    it is never overwritten. Raises `PreconditionFailed` when no row matched; an empty `versions`
+    (`If-Match: *`) only requires the row to still exist.
+    """
+    instance = serializer.instance
+    model = type(instance)
+    data = dict(serializer.validated_data)
+    now = timezone.now()
+
+    rows = model._default_manager.filter(pk=instance.pk)
+    if versions:
+        rows = rows.filter(updated_at__in=versions)
+
+    for name, value in data.items():
+        setattr(instance, name, value)
+    instance.updated_at = now
+    update_fields = frozenset(data) | {"updated_at"}
+
+    with transaction.atomic(using=rows.db):
+        pre_save.send(
+            sender=model,
+            instance=instance,
+            raw=False,
+            using=rows.db,
+            update_fields=update_fields,
+        )
+        if not rows.update(**data, updated_at=now):
+            raise PreconditionFailed()
+        post_save.send(
+            sender=model,
+            instance=instance,
+            created=False,
+            raw=False,
+            using=rows.db,
+            update_fields=update_fields,
+        )
+    return instance
@@ -0,0 +1,138 @@
+import zlib
+from datetime import datetime, timedelta, timezone
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from .query_shaping import get_query_plan
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _microseconds(value):
+    return (value - _EPOCH) // _MICROSECOND
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource was modified by another request"
+    default_code = "precondition_failed"
+
+
+def variant(request):
+    """
+    Tag for the representation asked for: the full path (page, fields, format...), the negotiated
+    renderer and the user, so different views of the same rows never share an ETag.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    key = "|".join(
+        [
+            request.get_full_path(),
+            getattr(renderer, "format", "") or "",
+            str(getattr(request.user, "pk", "")),
+        ]
+    )
+    return f"{zlib.crc32(key.encode()):08x}"
+
+
+def related_paths(serializer_class, fields=None):
+    """
+    Relations whose rows the serializer (or just its `fields`) renders, so their edits change the
+    validators too.
+    """
+    return get_query_plan(serializer_class, fields).select_related
+
+
+def _list_lookups(related):
+    lookups = {"count": Count("pk"), "last": Max("updated_at")}
+    for index, path in enumerate(related):
+        lookups[f"related_{index}"] = Max(f"{path}__updated_at")
+    return lookups
+
+
+def _list_state(aggregate):
+    count = aggregate.pop("count")
+    return count, max([value for value in aggregate.values() if value], default=None)
+
+
+def list_state(queryset, related=()):
+    """
+    `(count, last_modified)` of a list from a single aggregate: the row count (which catches
+    deletions) and the newest `updated_at` over the rows and the related rows they render.
+    """
+    return _list_state(queryset.order_by().aggregate(**_list_lookups(related)))
+
+
+async def alist_state(queryset, related=()):
+    """`list_state` through the async ORM."""
+    return _list_state(await queryset.order_by().aaggregate(**_list_lookups(related)))
+
+
+def list_etag(request, count, last_modified):
+    if last_modified is None:
+        return None
+    return f'W/"{count:x}-{_microseconds(last_modified):x}-{variant(request)}"'
+
+
+def object_validators(request, instance, related=()):
+    """`(etag, last_modified)` of one row from its `updated_at` and that of the rows it renders."""
+    stamps = [instance.updated_at]
+    for path in related:
+        target = instance
+        for attr in path.split("__"):
+            target = getattr(target, attr, None)
+        if target is not None:
+            stamps.append(target.updated_at)
+    last = max(stamps)
+    return f'"{_microseconds(last):x}-{variant(request)}"', last
+
+
+def set_validators(response, etag, last_modified):
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+def conditional_response(request, etag, last_modified):
+    """The 304 (or 412) answering the request's preconditions, or None to serve the body."""
+    if etag is None and last_modified is None:
+        return None
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def if_match_versions(request):
+    """
+    The `updated_at` values named by the request's `If-Match` header: None without the header,
+    an empty list for `*`. Detail ETags start with the row's `updated_at` in microseconds; their
+    variant part is ignored, so an ETag from any representation of the row matches.
+    """
+    header = request.META.get("HTTP_IF_MATCH")
+    if not header:
+        return None
+    versions = []
+    for etag in parse_etags(header):
+        if etag == "*":
+            return []
+        if etag.startswith("W/"):
+            # Weak ETags never match for If-Match (RFC 9110 13.1.1).
+            continue
+        try:
+            stamp = int(etag.strip('"').split("-", 1)[0], 16)
+        except ValueError:
+            continue
+        versions.append(_EPOCH + stamp * _MICROSECOND)
+    if not versions:
+        raise PreconditionFailed()
+    return versions
@@ -0,0 +1,124 @@
+import csv
+import json
+import zlib
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# Rows are buffered and handed to the response in blocks of this many, which keeps per-chunk
+# overhead low while memory stays bounded by the block size.
+ROWS_PER_CHUNK = 200
+
+
+class _Echo:
+    """File-like object whose `write` returns what it was given, for `csv.writer`."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([label for label, _ in columns])
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def iter_ndjson(columns, rows):
+    labels = [label for label, _ in columns]
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode(dict(zip(labels, row))) + "\n"
+
+
+def iter_export(queryset, columns, export_format, chunk_size=2000):
+    """
+    Yield `queryset` encoded as `export_format` ("csv" or "ndjson") in byte chunks. `columns` is a
+    sequence of `(label, lookup)` pairs; rows are read with `values_list(...).iterator()`, which
+    uses a server-side cursor where the database supports one.
+    """
+    rows = queryset.values_list(*[lookup for _, lookup in columns]).iterator(
+        chunk_size=chunk_size
+    )
+    encode = iter_csv if export_format == "csv" else iter_ndjson
+
+    block = []
+    for line in encode(columns, rows):
+        block.append(line)
+        if len(block) >= ROWS_PER_CHUNK:
+            yield "".join(block).encode("utf-8")
+            block = []
+    if block:
+        yield "".join(block).encode("utf-8")
+
+
+def accepts_encoding(header, coding):
+    """
+    Whether an `Accept-Encoding` header allows `coding`: listed by name or through `*` with a
+    non-zero q-value, the named entry taking precedence over `*`.
+    """
+    qualities = {}
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    return qualities.get(coding.lower(), qualities.get("*", 0.0)) > 0
+
+
+def gzip_stream(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+PATIENT_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("first_name", "first_name"),
+    ("last_name", "last_name"),
+    ("date_of_birth", "date_of_birth"),
+    ("gender", "gender"),
+    ("phone", "phone"),
+    ("email", "email"),
+    ("address", "address"),
+    ("medical_history", "medical_history"),
+    ("created_at", "created_at"),
+    ("updated_at", "updated_at"),
+)
+
+MAPPING_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("patient", "patient_id"),
+    ("patient_first_name", "patient__first_name"),
+    ("patient_last_name", "patient__last_name"),
+    ("doctor", "doctor_id"),
+    ("doctor_first_name", "doctor__first_name"),
+    ("doctor_last_name", "doctor__last_name"),
+    ("specialization", "doctor__specialization"),
+    ("appointment_date", "appointment_date"),
+    ("appointment_time", "appointment_time"),
+    ("symptoms", "symptoms"),
+    ("diagnosis", "diagnosis"),
+    ("prescription", "prescription"),
+    ("is_active", "is_active"),
+    ("created_at", "created_at"),
+)
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .cache import LRUCache
+from .models import IdempotencyKey
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int = None
+    body: object = None
+
+    @property
+    def pending(self):
+        return self.status_code is None
+
+
+def request_scope(request, fingerprint):
+    """
+    Keys are per user. Anonymous clients (registrations) cannot be told apart, so their keys are
+    per request body instead: unrelated sign-ups reusing a key never collide, and a retry of the
+    same request still replays.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"anonymous:{fingerprint[:48]}"
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256()
+    for part in (request.method, request.path):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+# The `IdempotencyStore` class keeps the outcome of create requests by `(scope, key)` in the
+# `IdempotencyKey` table, with finished outcomes also held in a small in-process LRU so replays
+# of hot keys cost no query. Claiming a key is an INSERT guarded by the unique constraint, so
+# concurrent first attempts cannot both run. A claim holds the key for `lease` seconds only, so the
+# key of a request whose worker died is taken over by the next retry; finished outcomes are kept
+# for `ttl`.
+class IdempotencyStore:
+
+    def __init__(self, ttl=86400, lease=60, local=None):
+        self.ttl = ttl
+        self.lease = lease
+        self.local = local or LRUCache(1024, 300)
+
+    def get(self, scope, key):
+        stored = self.local.get((scope, key))
+        if stored is not None:
+            return stored
+        row = (
+            IdempotencyKey.objects.filter(
+                scope=scope, key=key, expires_at__gt=timezone.now()
+            )
+            .values("fingerprint", "status_code", "response_body")
+            .first()
+        )
+        if row is None:
+            return None
+        body = row["response_body"]
+        stored = StoredResponse(
+            row["fingerprint"], row["status_code"], None if body is None else json.loads(body)
+        )
+        if not stored.pending:
+            self.local.set((scope, key), stored)
+        return stored
+
+    def claim(self, scope, key, fingerprint):
+        """
+        Reserve `key` for this request and return the claim's id, which `complete` and `release`
+        take; return None when another request holds the key. Expired rows, outcomes and
+        abandoned claims alike, are replaced.
+        """
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.filter(
+                    scope=scope, key=key, expires_at__lte=now
+                ).delete()
+                row = IdempotencyKey.objects.create(
+                    scope=scope,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=self.lease),
+                )
+        except IntegrityError:
+            return None
+        return row.pk
+
+    # Both only touch the row of `claim`: a request finishing after its lease expired must not
+    # overwrite or drop the claim of the request that took the key over.
+    def complete(self, scope, key, claim, fingerprint, status_code, body):
+        updated = IdempotencyKey.objects.filter(pk=claim, status_code__isnull=True).update(
+            status_code=status_code,
+            response_body=json.dumps(body, cls=DjangoJSONEncoder),
+            expires_at=timezone.now() + timedelta(seconds=self.ttl),
+        )
+        if updated:
+            self.local.set((scope, key), StoredResponse(fingerprint, status_code, body))
+
+    def release(self, scope, key, claim):
+        IdempotencyKey.objects.filter(pk=claim, status_code__isnull=True).delete()
+
+    def purge(self, batch_size=1000):
+        """Delete expired keys in batches; return how many were removed."""
+        removed = 0
+        while True:
+            ids = list(
+                IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).values_list(
+                    "id", flat=True
+                )[:batch_size]
+            )
+            if not ids:
+                return removed
+            removed += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_idempotency_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                options = getattr(settings, "IDEMPOTENCY", {})
+                _store = IdempotencyStore(
+                    ttl=options.get("TTL", 86400),
+                    lease=options.get("LEASE", 60),
+                    local=LRUCache(
+                        options.get("LOCAL_MAX_ENTRIES", 1024),
+                        options.get("LOCAL_TTL", 300),
+                    ),
+                )
+    return _store
@@ -0,0 +1,313 @@
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+_current = ContextVar("core_request_metrics", default=None)
+
+
+@dataclass
+class RequestMetrics:
+    queries: int = 0
+    sql_time: float = 0.0
+    serializer_time: float = 0.0
+    serializer_depth: int = 0
+
+
+def current_metrics():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding every statement to the current request's metrics, if any.
+    The metrics travel in a context variable, which `sync_to_async` carries into the thread
+    that runs the ORM under ASGI.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - start
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    """
+    Put `record_query` on `connection` for good. It goes first: `execute_wrapper` blocks remove
+    the last wrapper when they exit.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+# Every thread has its own connections (under ASGI the ORM runs in `sync_to_async` threads), so
+# each connection gets the recorder as it opens; outside a measured request it only passes through.
+connection_created.connect(install_query_recorder, dispatch_uid="core.instrumentation.queries")
+
+
+# `MeasuredSerializerMixin` adds the time spent in the outermost `to_representation` call to the
+# current request's serializer time; nested serializers are covered by their parent.
+class MeasuredSerializerMixin:
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics.serializer_depth:
+            return super().to_representation(instance)
+
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializer_depth -= 1
+
+
+class _Series:
+    """Running count/sum plus a bounded window of recent samples for quantiles."""
+
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def quantile(self, q):
+        if not self.samples:
+            return math.nan
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# The `MetricsRegistry` class aggregates per-view request metrics in-process and renders them in
+# the Prometheus text exposition format.
+class MetricsRegistry:
+
+    quantiles = (0.5, 0.95, 0.99)
+    summaries = (
+        ("core_request_duration_seconds", "duration", "Request latency."),
+        ("core_db_queries", "queries", "SQL statements executed per request."),
+        ("core_db_time_seconds", "sql_time", "Time spent in SQL per request."),
+        (
+            "core_serializer_time_seconds",
+            "serializer_time",
+            "Time spent serializing per request.",
+        ),
+        ("core_response_size_bytes", "size", "Response body size."),
+    )
+
+    def __init__(self, window=1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = defaultdict(int)
+            self.series = defaultdict(lambda: _Series(self.window))
+
+    def observe(self, view, method, status, duration, metrics, size):
+        with self._lock:
+            self.requests[view, method, status] += 1
+            labels = (view, method)
+            self.series[labels, "duration"].observe(duration)
+            self.series[labels, "queries"].observe(metrics.queries)
+            self.series[labels, "sql_time"].observe(metrics.sql_time)
+            self.series[labels, "serializer_time"].observe(metrics.serializer_time)
+            if size is not None:
+                self.series[labels, "size"].observe(size)
+
+    def render(self, extra_lines=()):
+        lines = [
+            "# HELP core_http_requests_total Requests handled per view.",
+            "# TYPE core_http_requests_total counter",
+        ]
+        with self._lock:
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'core_http_requests_total{{view="{view}",method="{method}",'
+                    f'status="{status}"}} {count}'
+                )
+
+            for name, key, help_text in self.summaries:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} summary")
+                for (labels, series_key), series in sorted(
+                    self.series.items(), key=lambda item: item[0]
+                ):
+                    if series_key != key:
+                        continue
+                    view, method = labels
+                    label_text = f'view="{view}",method="{method}"'
+                    for q in self.quantiles:
+                        lines.append(
+                            f'{name}{{{label_text},quantile="{q}"}} {series.quantile(q):.6g}'
+                        )
+                    lines.append(f"{name}_sum{{{label_text}}} {series.total:.6g}")
+                    lines.append(f"{name}_count{{{label_text}}} {series.count}")
+
+        lines.extend(extra_lines)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry(getattr(settings, "CORE_METRICS", {}).get("SAMPLE_SIZE", 1024))
+
+
+# Gauges and counters read from `psycopg_pool.ConnectionPool.get_stats()` for pooled aliases.
+POOL_GAUGES = (
+    ("pool_min", "Configured minimum pool size."),
+    ("pool_max", "Configured maximum pool size."),
+    ("pool_size", "Connections currently managed by the pool."),
+    ("pool_available", "Idle connections in the pool."),
+    ("requests_waiting", "Requests currently waiting for a connection."),
+)
+POOL_COUNTERS = (
+    ("requests_num", "Connections requested from the pool."),
+    ("requests_queued", "Requests that had to wait for a connection."),
+    ("requests_wait_ms", "Total time spent waiting for a connection, in milliseconds."),
+    ("requests_errors", "Requests that timed out or failed waiting for a connection."),
+    ("connections_num", "Connections opened by the pool."),
+    ("connections_errors", "Failed connection attempts."),
+    ("connections_lost", "Connections found broken when checked."),
+)
+
+
+# The `ConnectionCounter` class counts the database connections opened per alias, which shows
+# whether persistent or pooled connections are actually being reused.
+class ConnectionCounter:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.opened = defaultdict(int)
+
+    def __call__(self, sender, connection, **kwargs):
+        with self._lock:
+            self.opened[connection.alias] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.opened)
+
+
+connection_counter = ConnectionCounter()
+connection_created.connect(connection_counter, dispatch_uid="core.instrumentation.connections")
+
+
+def pool_stats(alias):
+    """`get_stats()` of the alias's psycopg pool, or None when the alias is not pooled."""
+    wrapper = connections[alias]
+    if not wrapper.settings_dict.get("OPTIONS", {}).get("pool"):
+        return None
+    pool = getattr(wrapper, "pool", None)
+    return pool.get_stats() if pool is not None else None
+
+
+def database_metric_lines():
+    """Connection-open counters for every alias and saturation metrics for pooled ones."""
+    lines = [
+        "# HELP core_db_connections_opened_total Database connections opened per alias.",
+        "# TYPE core_db_connections_opened_total counter",
+    ]
+    for alias, count in sorted(connection_counter.snapshot().items()):
+        lines.append(f'core_db_connections_opened_total{{alias="{alias}"}} {count}')
+
+    pools = {alias: pool_stats(alias) for alias in connections}
+    pools = {alias: stats for alias, stats in pools.items() if stats is not None}
+    if not pools:
+        return lines
+
+    gauges = POOL_GAUGES + (("in_use", "Connections checked out of the pool."),)
+    for key, help_text in gauges:
+        name = f"core_db_{key}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for alias, stats in sorted(pools.items()):
+            if key == "in_use":
+                value = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+            else:
+                value = stats.get(key, 0)
+            lines.append(f'{name}{{alias="{alias}"}} {value}')
+    for key, help_text in POOL_COUNTERS:
+        name = f"core_db_pool_{key}_total"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for alias, stats in sorted(pools.items()):
+            lines.append(f'{name}{{alias="{alias}"}} {stats.get(key, 0)}')
+    return lines
+
+
+# The `QueryMetricsMiddleware` class records query count, SQL time, serializer time, total time and
+# response size for every request, reports them in a `Server-Timing` header and feeds `registry`.
+# It runs natively in both sync and async stacks, so it never pushes async views into a thread.
+class QueryMetricsMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened from now on get the recorder from `connection_created`.
+        for alias in connections:
+            install_query_recorder(connection=connections[alias])
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        duration = time.perf_counter() - start
+
+        size = None if response.streaming else len(response.content)
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name if match else None) or "unresolved"
+        registry.observe(
+            view, request.method, response.status_code, duration, metrics, size
+        )
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={metrics.sql_time * 1000:.2f};desc="{metrics.queries} queries"',
+                f"serializer;dur={metrics.serializer_time * 1000:.2f}",
+                f"total;dur={duration * 1000:.2f}",
+            ]
+        )
+        return response
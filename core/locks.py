@@ -0,0 +1,39 @@
+import threading
+import zlib
+from contextlib import contextmanager
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+_LOCAL_STRIPES = 64
+_local_locks = [threading.Lock() for _ in range(_LOCAL_STRIPES)]
+
+
+def lock_key(*parts):
+    """A stable signed 64-bit key for `parts`, as taken by `pg_advisory_xact_lock`."""
+    raw = ":".join(str(part) for part in parts).encode()
+    key = (zlib.crc32(raw) << 32) | zlib.adler32(raw)
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+@contextmanager
+def advisory_lock(*parts, using=DEFAULT_DB_ALIAS):
+    """
+    Run the block inside a transaction that holds an exclusive lock on `parts` until it ends.
+
+    PostgreSQL uses a transaction-scoped advisory lock, so the lock is shared by every worker
+    process. SQLite serializes writers itself but transactions still interleave their reads, so
+    it falls back to a process-local striped lock around the transaction, which is what local
+    development and tests run on.
+    """
+    key = lock_key(*parts)
+    connection = connections[using]
+
+    if connection.vendor == "postgresql":
+        with transaction.atomic(using=using):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [key])
+            yield
+    else:
+        with _local_locks[key % _LOCAL_STRIPES]:
+            with transaction.atomic(using=using):
+                yield
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core import partitions
+from core.archive import archive_cutoffs, archive_mappings
+
+
+# `archive_mappings` moves old appointments, and inactive ones sooner, from the live mappings
+# table to `ArchivedMapping` in batches; run it periodically (e.g. nightly from cron). On
+# PostgreSQL it also creates the month partitions of the coming months and drops the emptied ones.
+class Command(BaseCommand):
+    help = "Move old and inactive appointments to the archive table."
+
+    def add_arguments(self, parser):
+        options = getattr(settings, "MAPPING_ARCHIVE", {})
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=options.get("DAYS", 365),
+            help="Archive appointments dated more than this many days ago.",
+        )
+        parser.add_argument(
+            "--inactive-days",
+            type=int,
+            default=options.get("INACTIVE_DAYS", 30),
+            help="Archive inactive appointments dated more than this many days ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=options.get("BATCH_SIZE", 1000))
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=options.get("MONTHS_AHEAD", 12),
+            help="Month partitions to keep ready ahead of today (PostgreSQL).",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if partitions.supported(connection):
+            created = partitions.ensure_partitions(
+                connection,
+                today,
+                partitions.add_months(partitions.month_start(today), options["months_ahead"]),
+            )
+            self.stdout.write(f"Created {created} month partition(s).")
+
+        before, inactive_before = archive_cutoffs(
+            options["days"], options["inactive_days"], today
+        )
+        moved = 0
+        for count in archive_mappings(before, inactive_before, options["batch_size"]):
+            moved += count
+            self.stdout.write(f"Archived {moved} appointment(s)...")
+        self.stdout.write(
+            f"Archived {moved} appointment(s) dated before {before} "
+            f"(inactive: before {inactive_before})."
+        )
+
+        if partitions.supported(connection):
+            dropped = partitions.drop_empty_partitions(connection, min(before, inactive_before))
+            self.stdout.write(f"Dropped {len(dropped)} empty month partition(s).")
@@ -0,0 +1,213 @@
+from contextlib import contextmanager
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks import asgi, codecs, datagen, readplans, runner, search, tasks
+from benchmarks.scenarios import SCENARIOS, ScenarioContext
+
+
+# `benchmark` seeds a throwaway test database with synthetic data, runs the API scenarios
+# in-process through the full middleware stack and reports throughput and latency percentiles.
+class Command(BaseCommand):
+    help = "Run the REST API benchmark scenarios against a throwaway test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(SCENARIOS),
+            help="Scenario to run; repeat for several (default: all).",
+        )
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--patients-per-user", type=int, default=20)
+        parser.add_argument("--doctors", type=int, default=200)
+        parser.add_argument("--mappings", type=int, default=10_000)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Client threads; SQLite serializes writers, use PostgreSQL for real concurrency.",
+        )
+        parser.add_argument("--baseline", help="Baseline JSON to compare against.")
+        parser.add_argument(
+            "--save-baseline", help="Write this run's results to the given JSON path."
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative regression against the baseline (default 0.25).",
+        )
+        parser.add_argument(
+            "--codecs",
+            action="store_true",
+            help="Only run the JSON renderer/parser micro-benchmark (no database needed).",
+        )
+        parser.add_argument(
+            "--codec-rows",
+            type=int,
+            default=1000,
+            help="Mappings in the micro-benchmark payload (default 1000).",
+        )
+        parser.add_argument(
+            "--read-plans",
+            action="store_true",
+            help="Only compare the mapping serializer with its compiled read plan.",
+        )
+        parser.add_argument(
+            "--read-plan-rows",
+            type=int,
+            action="append",
+            help="Rows rendered per read-plan run; repeat for several (default: 1000 and 100000).",
+        )
+        parser.add_argument(
+            "--search",
+            action="store_true",
+            help="Only run the in-memory search autocomplete benchmark (no database needed).",
+        )
+        parser.add_argument(
+            "--search-doctors",
+            type=int,
+            default=100_000,
+            help="Synthetic doctors in the search index (default 100000).",
+        )
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Only compare the read endpoints served sync (WSGI) and async (ASGI).",
+        )
+        parser.add_argument(
+            "--asgi-concurrency",
+            type=int,
+            action="append",
+            help="Concurrent clients for --asgi; repeat for several (default: 1, 64 and 256).",
+        )
+        parser.add_argument(
+            "--tasks",
+            action="store_true",
+            help="Only measure background task enqueue latency and worker throughput.",
+        )
+        parser.add_argument(
+            "--task-count",
+            type=int,
+            default=2000,
+            help="No-op tasks enqueued and drained per run (default 2000).",
+        )
+        parser.add_argument(
+            "--task-workers",
+            type=int,
+            action="append",
+            help="Worker threads draining the queue; repeat for several (default: 1).",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Reuse and keep the test database between runs.",
+        )
+
+    def handle(self, *args, **options):
+        if options["codecs"]:
+            results = codecs.run(
+                rows=options["codec_rows"],
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+            )
+        elif options["search"]:
+            results = search.run(
+                doctors=options["search_doctors"],
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+            )
+        elif options["read_plans"]:
+            results = self.run_read_plans(options)
+        elif options["asgi"]:
+            results = self.run_asgi(options)
+        elif options["tasks"]:
+            results = self.run_tasks(options)
+        else:
+            results = self.run_scenarios(options)
+
+        for result in results:
+            self.stdout.write(result.format())
+
+        if options["save_baseline"]:
+            runner.save_baseline(options["save_baseline"], results)
+            self.stdout.write(f"Baseline written to {options['save_baseline']}")
+
+        if options["baseline"]:
+            regressions = runner.compare(
+                results, options["baseline"], options["tolerance"]
+            )
+            if regressions:
+                raise CommandError(
+                    "Benchmark regressed against the baseline:\n  "
+                    + "\n  ".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    @contextmanager
+    def seeded_database(self, options, mappings):
+        connection = connections[DEFAULT_DB_ALIAS]
+        setup_test_environment(debug=False)
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+        try:
+            yield datagen.generate(
+                users=options["users"],
+                patients_per_user=options["patients_per_user"],
+                doctors=options["doctors"],
+                mappings=mappings,
+                spare_patients=options["iterations"] + options["warmup"],
+                log=lambda message: self.stdout.write(f"  seeded {message}"),
+            )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+    def run_scenarios(self, options):
+        names = options["scenario"] or list(SCENARIOS)
+        with self.seeded_database(options, options["mappings"]) as data:
+            return [self.run_scenario(name, data, options) for name in names]
+
+    def run_read_plans(self, options):
+        sizes = options["read_plan_rows"] or [1000, 100_000]
+        with self.seeded_database(options, max(options["mappings"], *sizes)):
+            self.stdout.write("Running read plans...")
+            return readplans.run(sizes, options["iterations"], options["warmup"])
+
+    def run_asgi(self, options):
+        levels = options["asgi_concurrency"] or [1, 64, 256]
+        with self.seeded_database(options, options["mappings"]) as data:
+            self.stdout.write("Running WSGI vs ASGI...")
+            return asgi.run(data, levels, options["iterations"], options["warmup"])
+
+    def run_tasks(self, options):
+        with self.seeded_database(options, 0):
+            self.stdout.write("Running task queue...")
+            return tasks.run(
+                options["task_count"], options["task_workers"] or [1], warmup=options["warmup"]
+            )
+
+    def run_scenario(self, name, data, options):
+        def make_context():
+            context = ScenarioContext(client=Client(), data=data)
+            context.login()
+            return context
+
+        self.stdout.write(f"Running {name}...")
+        return runner.run(
+            name,
+            SCENARIOS[name],
+            make_context,
+            iterations=options["iterations"],
+            warmup=options["warmup"],
+            concurrency=options["concurrency"],
+        )
@@ -0,0 +1,123 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpRequest
+from rest_framework.request import Request
+
+from core.models import Doctor, Patient, PatientDoctorTable
+from core.views import (
+    DoctorDetailView,
+    DoctorListCreateView,
+    MappingDetailView,
+    MappingListCreateView,
+    PatientDetailView,
+    PatientDoctorsView,
+    PatientListCreateView,
+)
+
+
+# `explain_queries` prints the SQL and the database's EXPLAIN plan for the querysets behind each
+# core view, so index usage can be checked against real data.
+class Command(BaseCommand):
+    help = "Print EXPLAIN plans for the querysets used by the core API views."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Username whose data scopes the per-user querysets (defaults to the first user).",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run EXPLAIN ANALYZE with buffer statistics (PostgreSQL only).",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        self.database = options["database"]
+        self.analyze = options["analyze"]
+        user = self.get_user(options["user"])
+
+        patient = Patient.objects.using(self.database).filter(user=user).first()
+        doctor = Doctor.objects.using(self.database).filter(is_active=True).first()
+        mapping = (
+            PatientDoctorTable.objects.using(self.database)
+            .filter(patient__user=user)
+            .first()
+        )
+
+        self.explain_view("DoctorListCreateView", DoctorListCreateView, user, list_view=True)
+        self.explain_view(
+            "DoctorDetailView", DoctorDetailView, user, pk=doctor.pk if doctor else 0
+        )
+        self.explain_view("PatientListCreateView", PatientListCreateView, user, list_view=True)
+        self.explain_view(
+            "PatientDetailView", PatientDetailView, user, pk=patient.pk if patient else 0
+        )
+        self.explain_view("MappingListCreateView", MappingListCreateView, user, list_view=True)
+        self.explain_view(
+            "MappingDetailView", MappingDetailView, user, pk=mapping.pk if mapping else 0
+        )
+        self.explain_view(
+            "PatientDoctorsView",
+            PatientDoctorsView,
+            user,
+            list_view=True,
+            patient_id=patient.pk if patient else 0,
+        )
+
+        # Uniqueness and existence checks run by the serializers on every write, shaped the way
+        # `.exists()` sends them.
+        email = patient.email if patient else "nobody@example.com"
+        self.explain(
+            "PatientSerializer.validate_email",
+            Patient.objects.filter(email=email).order_by().values("id")[:1],
+        )
+        email = doctor.email if doctor else "nobody@example.com"
+        self.explain(
+            "DoctorSerializer.validate_email",
+            Doctor.objects.filter(email=email).order_by().values("id")[:1],
+        )
+        self.explain(
+            "PatientDoctorMappingSerializer.validate",
+            PatientDoctorTable.objects.filter(
+                patient_id=patient.pk if patient else 0,
+                doctor_id=doctor.pk if doctor else 0,
+            )
+            .order_by()
+            .values("id")[:1],
+        )
+
+    def get_user(self, username):
+        users = User.objects.using(self.database)
+        try:
+            return users.get(username=username) if username else users.earliest("id")
+        except User.DoesNotExist:
+            raise CommandError("No matching user found; create some data first.")
+
+    def explain_view(self, label, view_class, user, list_view=False, **kwargs):
+        request = Request(HttpRequest())
+        request.user = user
+        view = view_class(request=request, kwargs=kwargs, format_kwarg=None)
+        queryset = view.filter_queryset(view.get_queryset()).using(self.database)
+
+        if list_view:
+            paginator = view.paginator
+            page_size = paginator.page_size if paginator else None
+            queryset = queryset[:page_size] if page_size else queryset
+        else:
+            queryset = queryset.filter(pk=kwargs["pk"])
+        self.explain(label, queryset)
+
+    def explain(self, label, queryset):
+        queryset = queryset.using(self.database)
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(str(queryset.query))
+
+        explain_options = {}
+        if self.analyze:
+            if connections[self.database].vendor != "postgresql":
+                raise CommandError("--analyze is only supported on PostgreSQL.")
+            explain_options = {"analyze": True, "buffers": True}
+        self.stdout.write(queryset.explain(**explain_options))
+        self.stdout.write("")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.idempotency import get_idempotency_store
+
+
+# `purge_idempotency_keys` deletes expired `IdempotencyKey` rows; run it periodically (e.g. from
+# cron) to keep the table small.
+class Command(BaseCommand):
+    help = "Delete expired idempotency keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        removed = get_idempotency_store().purge(options["batch_size"])
+        self.stdout.write(f"Removed {removed} expired idempotency key(s).")
@@ -0,0 +1,39 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import Worker, run_workers
+
+
+# `run_task_worker` processes the background task queue (see `core.tasks`); run it under a process
+# supervisor next to the web workers. With `--processes` above 1 it forks that many workers, each
+# with its own database connection, and stops them all on SIGTERM or Ctrl-C.
+class Command(BaseCommand):
+    help = "Run background task workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, help="Tasks claimed per round-trip.")
+        parser.add_argument("--poll-interval", type=float, help="Seconds to sleep when idle.")
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no task is due instead of waiting for more.",
+        )
+
+    def handle(self, *args, **options):
+        worker_options = {
+            "batch_size": options["batch_size"],
+            "poll_interval": options["poll_interval"],
+        }
+        if options["processes"] > 1:
+            exit_codes = run_workers(options["processes"], options["burst"], **worker_options)
+            self.stdout.write(f"Workers exited with {exit_codes}.")
+            return
+
+        worker = Worker(**worker_options)
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(f"Worker {worker.name} started.")
+        succeeded, failed = worker.run(burst=options["burst"])
+        self.stdout.write(f"Ran {succeeded} task(s), {failed} failed.")
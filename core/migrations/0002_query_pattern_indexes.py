@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='patient',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='patient', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='patientdoctortable',
+            name='doctor',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='patient_doctor', to='core.doctor'),
+        ),
+        migrations.AlterField(
+            model_name='patientdoctortable',
+            name='patient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='doctor_patient', to='core.patient'),
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['last_name', 'first_name', 'id'], name='doctor_active_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['email'], name='doctor_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='patient_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['email'], name='patient_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patientdoctortable',
+            index=models.Index(fields=['patient', 'appointment_date', 'id'], name='mapping_patient_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patientdoctortable',
+            index=models.Index(fields=['doctor', 'appointment_date', 'appointment_time'], name='mapping_doctor_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_doctor_schedule'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='patientdoctortable',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('doctor', 'appointment_date', 'appointment_time'), name='unique_active_doctor_slot'),
+        ),
+    ]
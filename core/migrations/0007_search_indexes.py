@@ -0,0 +1,94 @@
+# Generated by Django 5.1.7 on 2026-10-17 04:10
+
+from django.db import migrations
+
+
+POSTGRES_INSTALL = [
+    "CREATE INDEX IF NOT EXISTS core_doctor_search_idx ON core_doctor USING gin (("
+    "setweight(to_tsvector('simple', coalesce(first_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(last_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(specialization, '')), 'B'))) "
+    "WHERE is_active = True",
+    "CREATE INDEX IF NOT EXISTS core_patient_search_idx ON core_patient USING gin (("
+    "setweight(to_tsvector('simple', coalesce(first_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(last_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(email, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(phone, '')), 'C')))",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS core_doctor_search_idx",
+    "DROP INDEX IF EXISTS core_patient_search_idx",
+]
+
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_doctor_fts USING fts5(first_name, last_name, "
+    "specialization, content='core_doctor', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS core_doctor_fts_ai AFTER INSERT ON core_doctor BEGIN "
+    "INSERT INTO core_doctor_fts(rowid, first_name, last_name, specialization) "
+    "VALUES (new.id, new.first_name, new.last_name, new.specialization); END",
+    "CREATE TRIGGER IF NOT EXISTS core_doctor_fts_ad AFTER DELETE ON core_doctor BEGIN "
+    "INSERT INTO core_doctor_fts(core_doctor_fts, rowid, first_name, last_name, specialization) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.specialization); END",
+    "CREATE TRIGGER IF NOT EXISTS core_doctor_fts_au AFTER UPDATE ON core_doctor BEGIN "
+    "INSERT INTO core_doctor_fts(core_doctor_fts, rowid, first_name, last_name, specialization) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.specialization); "
+    "INSERT INTO core_doctor_fts(rowid, first_name, last_name, specialization) "
+    "VALUES (new.id, new.first_name, new.last_name, new.specialization); END",
+    "INSERT INTO core_doctor_fts(core_doctor_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_patient_fts USING fts5(first_name, last_name, "
+    "email, phone, content='core_patient', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS core_patient_fts_ai AFTER INSERT ON core_patient BEGIN "
+    "INSERT INTO core_patient_fts(rowid, first_name, last_name, email, phone) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS core_patient_fts_ad AFTER DELETE ON core_patient BEGIN "
+    "INSERT INTO core_patient_fts(core_patient_fts, rowid, first_name, last_name, email, phone) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone); END",
+    "CREATE TRIGGER IF NOT EXISTS core_patient_fts_au AFTER UPDATE ON core_patient BEGIN "
+    "INSERT INTO core_patient_fts(core_patient_fts, rowid, first_name, last_name, email, phone) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone); "
+    "INSERT INTO core_patient_fts(rowid, first_name, last_name, email, phone) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.phone); END",
+    "INSERT INTO core_patient_fts(core_patient_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS core_doctor_fts_ai",
+    "DROP TRIGGER IF EXISTS core_doctor_fts_ad",
+    "DROP TRIGGER IF EXISTS core_doctor_fts_au",
+    "DROP TABLE IF EXISTS core_doctor_fts",
+    "DROP TRIGGER IF EXISTS core_patient_fts_ai",
+    "DROP TRIGGER IF EXISTS core_patient_fts_ad",
+    "DROP TRIGGER IF EXISTS core_patient_fts_au",
+    "DROP TABLE IF EXISTS core_patient_fts",
+]
+
+# The statements are spelled out rather than taken from `core.search.database`, so later changes
+# to that module cannot change what this migration did.
+STATEMENTS = {
+    "postgresql": (POSTGRES_INSTALL, POSTGRES_UNINSTALL),
+    "sqlite": (SQLITE_INSTALL, SQLITE_UNINSTALL),
+}
+
+
+def install_search(apps, schema_editor):
+    for sql in STATEMENTS.get(schema_editor.connection.vendor, ((), ()))[0]:
+        schema_editor.execute(sql)
+
+
+def uninstall_search(apps, schema_editor):
+    for sql in STATEMENTS.get(schema_editor.connection.vendor, ((), ()))[1]:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
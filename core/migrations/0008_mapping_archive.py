@@ -0,0 +1,91 @@
+# Generated by Django 5.1.7 on 2026-10-17 04:00
+
+import django.db.models.deletion
+from datetime import date
+from django.db import migrations, models
+
+
+HISTORY_COLUMNS = (
+    "id, created_at, updated_at, patient_id, doctor_id, appointment_date, appointment_time, "
+    "symptoms, diagnosis, prescription, is_active"
+)
+
+CREATE_HISTORY_VIEW = (
+    f"CREATE VIEW core_mappinghistory AS "
+    f"SELECT {HISTORY_COLUMNS} FROM core_patientdoctortable "
+    f"UNION ALL SELECT {HISTORY_COLUMNS} FROM core_archivedmapping"
+)
+
+
+def partition_mappings(apps, schema_editor):
+    from core.partitions import add_months, partition_table
+
+    model = apps.get_model("core", "PatientDoctorTable")
+    today = date.today()
+    first = model.objects.using(schema_editor.connection.alias).order_by(
+        "appointment_date"
+    ).values_list("appointment_date", flat=True).first()
+    partition_table(schema_editor, model, first or today, add_months(today.replace(day=1), 12))
+
+
+def unpartition_mappings(apps, schema_editor):
+    from core.partitions import unpartition_table
+
+    # The archive table is dropped next; put its rows back first (the rebuild below then also
+    # moves the sequence past their ids).
+    schema_editor.execute(
+        f"INSERT INTO core_patientdoctortable ({HISTORY_COLUMNS}) "
+        f"SELECT {HISTORY_COLUMNS} FROM core_archivedmapping"
+    )
+    unpartition_table(schema_editor, apps.get_model("core", "PatientDoctorTable"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MappingHistory',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('appointment_date', models.DateField()),
+                ('appointment_time', models.TimeField()),
+                ('symptoms', models.TextField()),
+                ('diagnosis', models.TextField()),
+                ('prescription', models.TextField()),
+                ('is_active', models.BooleanField()),
+            ],
+            options={
+                'ordering': ['appointment_date'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedMapping',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('appointment_date', models.DateField()),
+                ('appointment_time', models.TimeField()),
+                ('symptoms', models.TextField()),
+                ('diagnosis', models.TextField()),
+                ('prescription', models.TextField()),
+                ('is_active', models.BooleanField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.doctor')),
+                ('patient', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.patient')),
+            ],
+            options={
+                'ordering': ['appointment_date'],
+                'indexes': [models.Index(fields=['patient', 'appointment_date', 'id'], name='archive_patient_date_idx'), models.Index(fields=['appointment_date'], name='archive_date_idx')],
+            },
+        ),
+        migrations.RunPython(partition_mappings, unpartition_mappings),
+        migrations.RunSQL(CREATE_HISTORY_VIEW, "DROP VIEW core_mappinghistory"),
+    ]
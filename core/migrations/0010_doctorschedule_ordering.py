@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-17 04:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_task_queue'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='doctorschedule',
+            options={'ordering': ['doctor_id', 'weekday', 'start_time']},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_doctorschedule_ordering'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='response_body',
+            field=models.TextField(null=True),
+        ),
+    ]
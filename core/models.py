@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from django.db.models import (
     ForeignKey,
@@ -10,7 +11,10 @@ from django.db.models import (
     DateField,
     IntegerField,
     TimeField,
+    F,
+    Value,
 )
+from django.db.models.functions import Concat
 
 
 class BaseModel(models.Model):
@@ -22,7 +26,10 @@ class BaseModel(models.Model):
 
 
 class Patient(BaseModel):
-    user = ForeignKey(User, on_delete=models.CASCADE, related_name="patient")
+    # Indexed by the (user, created_at) composite in Meta.indexes.
+    user = ForeignKey(
+        User, on_delete=models.CASCADE, related_name="patient", db_index=False
+    )
     first_name = CharField(max_length=64)
     last_name = CharField(max_length=64)
     date_of_birth = DateField(blank=False, null=False)
@@ -42,8 +49,24 @@ class Patient(BaseModel):
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    @classmethod
+    def str_expression(cls, prefix=""):
+        """`__str__` as a database expression, for rows read with `.values()`."""
+        return Concat(
+            F(f"{prefix}first_name"),
+            Value(" "),
+            F(f"{prefix}last_name"),
+            output_field=CharField(),
+        )
+
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"], name="patient_user_created_idx"
+            ),
+            models.Index(fields=["email"], name="patient_email_idx"),
+        ]
 
 
 class Doctor(BaseModel):
@@ -60,15 +83,38 @@ class Doctor(BaseModel):
     def __str__(self):
         return f"Dr. {self.first_name} {self.last_name}"
 
+    @classmethod
+    def str_expression(cls, prefix=""):
+        """`__str__` as a database expression, for rows read with `.values()`."""
+        return Concat(
+            Value("Dr. "),
+            F(f"{prefix}first_name"),
+            Value(" "),
+            F(f"{prefix}last_name"),
+            output_field=CharField(),
+        )
+
     class Meta:
         ordering = ["last_name", "first_name"]
+        indexes = [
+            models.Index(
+                fields=["last_name", "first_name", "id"],
+                condition=models.Q(is_active=True),
+                name="doctor_active_name_idx",
+            ),
+            models.Index(fields=["email"], name="doctor_email_idx"),
+        ]
 
 
 class PatientDoctorTable(BaseModel):
+    # Both foreign keys lead a composite index (the unique_together one for patient), so the
+    # single-column FK indexes would only slow down writes.
     patient = ForeignKey(
-        Patient, on_delete=models.CASCADE, related_name="doctor_patient"
+        Patient, on_delete=models.CASCADE, related_name="doctor_patient", db_index=False
+    )
+    doctor = ForeignKey(
+        Doctor, on_delete=models.CASCADE, related_name="patient_doctor", db_index=False
     )
-    doctor = ForeignKey(Doctor, on_delete=models.CASCADE, related_name="patient_doctor")
     appointment_date = DateField(blank=False, null=False)
     appointment_time = TimeField(blank=False, null=False)
     symptoms = TextField()
@@ -82,3 +128,223 @@ class PatientDoctorTable(BaseModel):
     class Meta:
         ordering = ["appointment_date"]
         unique_together = ["patient", "doctor", "appointment_date", "appointment_time"]
+        constraints = [
+            # A doctor slot can hold a single active appointment; this is the final guard behind
+            # the slot lock taken in `core.booking`.
+            models.UniqueConstraint(
+                fields=["doctor", "appointment_date", "appointment_time"],
+                condition=models.Q(is_active=True),
+                name="unique_active_doctor_slot",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["patient", "appointment_date", "id"],
+                name="mapping_patient_date_idx",
+            ),
+            models.Index(
+                fields=["doctor", "appointment_date", "appointment_time"],
+                name="mapping_doctor_slot_idx",
+            ),
+        ]
+
+
+class ArchivedMapping(models.Model):
+    """
+    Cold storage for `PatientDoctorTable` rows moved out by `manage.py archive_mappings`; rows
+    keep their id and timestamps.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    patient = ForeignKey(
+        Patient, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    doctor = ForeignKey(Doctor, on_delete=models.CASCADE, related_name="+")
+    appointment_date = DateField()
+    appointment_time = TimeField()
+    symptoms = TextField()
+    diagnosis = TextField()
+    prescription = TextField()
+    is_active = BooleanField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.patient_id} < ------ > {self.doctor_id} ({self.appointment_date})"
+
+    class Meta:
+        ordering = ["appointment_date"]
+        indexes = [
+            models.Index(
+                fields=["patient", "appointment_date", "id"],
+                name="archive_patient_date_idx",
+            ),
+            models.Index(fields=["appointment_date"], name="archive_date_idx"),
+        ]
+
+
+class MappingHistory(BaseModel):
+    """
+    Read-only view over the live and archived mappings (`UNION ALL` of both tables), queried by
+    `core.archive` when a date range may reach archived rows.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    patient = ForeignKey(
+        Patient, on_delete=models.DO_NOTHING, related_name="+", db_constraint=False
+    )
+    doctor = ForeignKey(
+        Doctor, on_delete=models.DO_NOTHING, related_name="+", db_constraint=False
+    )
+    appointment_date = DateField()
+    appointment_time = TimeField()
+    symptoms = TextField()
+    diagnosis = TextField()
+    prescription = TextField()
+    is_active = BooleanField()
+
+    def __str__(self):
+        return f"{self.patient} < ------ > {self.doctor}"
+
+    class Meta:
+        managed = False
+        ordering = ["appointment_date"]
+
+
+class DoctorSchedule(BaseModel):
+    WEEKDAYS = [
+        (0, "Monday"),
+        (1, "Tuesday"),
+        (2, "Wednesday"),
+        (3, "Thursday"),
+        (4, "Friday"),
+        (5, "Saturday"),
+        (6, "Sunday"),
+    ]
+
+    doctor = ForeignKey(Doctor, on_delete=models.CASCADE, related_name="schedules")
+    weekday = IntegerField(choices=WEEKDAYS)
+    start_time = TimeField()
+    end_time = TimeField()
+    slot_minutes = IntegerField(default=30)
+
+    def __str__(self):
+        return (
+            f"{self.doctor} {self.get_weekday_display()} "
+            f"{self.start_time:%H:%M}-{self.end_time:%H:%M}"
+        )
+
+    class Meta:
+        # `doctor_id`, not `doctor`: ordering by the relation would join Doctor for its ordering.
+        ordering = ["doctor_id", "weekday", "start_time"]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(end_time__gt=models.F("start_time")),
+                name="schedule_ends_after_start",
+            ),
+            models.CheckConstraint(
+                condition=models.Q(slot_minutes__gt=0),
+                name="schedule_positive_slot",
+            ),
+        ]
+
+
+class UserTokenVersion(BaseModel):
+    """
+    Per-user counter embedded in issued JWTs; bumping it revokes every token issued before.
+    """
+
+    # Outlives its user, with the version bumped on deletion (see `core.signals`), so the tokens
+    # of a deleted user stay revoked instead of matching the default version again.
+    user = models.OneToOneField(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name="token_version",
+    )
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"user {self.user_id} v{self.version}"
+
+
+class TokenUser(User):
+    """
+    The `User` that `core.authentication` builds from the claims of an access token, without
+    reading its row. Its other fields are unset, so saving or deleting it is refused rather than
+    blanking or removing the real user.
+    """
+
+    class Meta:
+        proxy = True
+
+    def save(self, *args, **kwargs):
+        raise TypeError("A user built from token claims cannot be saved; load it first.")
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("A user built from token claims cannot be deleted; load it first.")
+
+
+class IdempotencyKey(BaseModel):
+    """
+    Outcome of a create request sent with an `Idempotency-Key` header, replayed for retries of the
+    same request until `expires_at`. A row without `status_code` is a request still in progress.
+    """
+
+    scope = CharField(max_length=64)
+    key = CharField(max_length=255)
+    fingerprint = CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    # JSON text rather than a JSONField: PostgreSQL's jsonb does not keep key order, and a replay
+    # has to match the original response.
+    response_body = TextField(null=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key"], name="unique_idempotency_key"
+            ),
+        ]
+
+
+class Task(BaseModel):
+    """
+    A unit of deferred work for `manage.py run_task_worker`: the registered task `name` called
+    with `payload`. Workers claim due rows with a conditional UPDATE and hold them until
+    `locked_until`; an expired lease (a crashed worker) makes the row claimable again, or failed
+    once it has used up its attempts.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUSES = [(QUEUED, "Queued"), (RUNNING, "Running"), (FAILED, "Failed")]
+
+    name = CharField(max_length=200)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = CharField(max_length=16, choices=STATUSES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    locked_by = CharField(max_length=128, blank=True, default="")
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at", "id"], name="task_due_idx"),
+            models.Index(
+                fields=["locked_until"],
+                condition=models.Q(status="running"),
+                name="task_lease_idx",
+            ),
+        ]
@@ -0,0 +1,269 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    ImproperlyConfigured,
+    ValidationError,
+)
+from django.core.paginator import InvalidPage, Page, Paginator as DjangoPaginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    PageNumberPagination,
+    _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+# The `KeysetPagination` class pages through a queryset by remembering the ordering key of the
+# last row served instead of an OFFSET, so deep pages cost the same as the first one.
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the model's `Meta.ordering` (or the queryset's explicit
+    `order_by`), with `id` appended as a tie-breaker so the order is total. Ordering fields must
+    be non-nullable local columns.
+
+    The total row count is not computed unless `include_count` is set or the client asks for it
+    with `?count=true`.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    include_count = False
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.get_window(queryset, request)
+        if window is None:
+            return None
+        self.count = queryset.count() if self.should_count(request) else None
+        return self.set_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` reading through the async ORM."""
+        window = self.get_window(queryset, request)
+        if window is None:
+            return None
+        self.count = await queryset.acount() if self.should_count(request) else None
+        return self.set_page([row async for row in window])
+
+    def get_window(self, queryset, request):
+        """The rows to fetch for the requested page: one more than fits, to detect the next."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset)
+        self.position, self.reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [(field, not descending) for field, descending in ordering]
+        queryset = queryset.order_by(
+            *[("-" if descending else "") + field.attname for field, descending in ordering]
+        )
+        if self.position is not None:
+            queryset = queryset.filter(self.position_filter(ordering, self.position))
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def should_count(self, request):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return self.include_count
+        return value.lower() in ("1", "true", "yes")
+
+    def get_ordering(self, queryset):
+        model = queryset.model
+        ordering = list(queryset.query.order_by or model._meta.ordering)
+        resolved = []
+        for item in ordering:
+            if not isinstance(item, str):
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__} only supports ordering by field names."
+                )
+            name = item.lstrip("-")
+            try:
+                field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__} cannot order {model.__name__} by {name!r}."
+                )
+            resolved.append((field, item.startswith("-")))
+
+        if not any(field.primary_key for field, _ in resolved):
+            resolved.append((model._meta.pk, False))
+        return resolved
+
+    def position_filter(self, ordering, position):
+        """
+        Build `(a > x) | (a = x & b > y) | ...` for the rows after `position` in `ordering`.
+        """
+        condition = Q()
+        for index, (field, descending) in enumerate(ordering):
+            term = Q(**{f"{field.attname}__{'lt' if descending else 'gt'}": position[index]})
+            for tied in range(index):
+                term &= Q(**{ordering[tied][0].attname: position[tied]})
+            condition |= term
+        return condition
+
+    def get_row_value(self, row, field):
+        if isinstance(row, dict):
+            return row.get(field.attname, row.get(field.name))
+        return getattr(row, field.attname)
+
+    def encode_cursor(self, row, reverse):
+        values = []
+        for field, _ in self.ordering:
+            value = self.get_row_value(row, field)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        raw = json.dumps({"p": values, "r": int(reverse)}, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(raw.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = payload["p"]
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                field.to_python(value) for (field, _), value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+# `PageNumberOrKeysetPagination` keeps the default page-number behaviour and switches to keyset
+# pagination when the client passes a `cursor` query parameter (empty for the first page). A row
+# count the view already knows (`view.list_count`) is reused instead of running another COUNT.
+# Page-number pages are ordered by the keyset's total order as well.
+class PageNumberOrKeysetPagination(PageNumberPagination):
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.known_count = getattr(view, "list_count", None)
+        return super().paginate_queryset(self.order_totally(queryset), request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` reading through the async ORM."""
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.known_count = getattr(view, "list_count", None)
+        if self.known_count is None:
+            self.known_count = await queryset.acount()
+
+        queryset = self.order_totally(queryset)
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            )
+        bottom = (number - 1) * paginator.per_page
+        top = bottom + paginator.per_page
+        if top + paginator.orphans >= paginator.count:
+            top = paginator.count
+        rows = [row async for row in queryset[bottom:top]]
+        self.page = Page(rows, number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+    def order_totally(self, queryset):
+        """
+        `queryset` ordered with the keyset's `id` tie-breaker too, so rows tied on the ordering
+        fields cannot repeat or go missing between OFFSET pages (PostgreSQL returns ties in any
+        order). Orderings keyset pagination does not support are left as they are.
+        """
+        try:
+            ordering = self.keyset_class().get_ordering(queryset)
+        except ImproperlyConfigured:
+            return queryset
+        return queryset.order_by(
+            *[("-" if descending else "") + field.attname for field, descending in ordering]
+        )
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = DjangoPaginator(object_list, per_page)
+        if self.known_count is not None:
+            paginator.count = self.known_count
+        return paginator
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,66 @@
+import codecs
+import json
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def loads(data):
+    """Decode a JSON document given as bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# The `FastJSONParser` class is a drop-in `JSONParser` decoding UTF-8 bodies with orjson. orjson
+# rejects NaN and Infinity like `JSONParser` does with `STRICT_JSON`; other encodings go through
+# the stdlib parser.
+class FastJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+# `InvalidLine` stands in for an NDJSON line that could not be decoded, so consumers can report it
+# against its row number instead of failing the whole body.
+class InvalidLine:
+
+    def __init__(self, message):
+        self.message = message
+
+
+# The `NDJSONParser` class parses newline-delimited JSON bodies lazily: `request.data` is a
+# generator over the decoded lines, read from the request stream as it is consumed.
+class NDJSONParser(BaseParser):
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", "utf-8")
+        return self.iter_lines(stream, encoding)
+
+    def iter_lines(self, stream, encoding):
+        if stream is None:
+            return
+        for raw in stream:
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                yield loads(line.decode(encoding))
+            except (UnicodeDecodeError, ValueError) as exc:
+                yield InvalidLine(f"Invalid JSON line: {exc}")
@@ -0,0 +1,187 @@
+"""
+Monthly range partitions of the mappings table on `appointment_date` (PostgreSQL only).
+
+Each month lives in `core_patientdoctortable_pYYYY_MM`; a default partition catches dates no
+month partition covers yet, and `ensure_partitions` moves such rows out when it creates their
+month. SQLite keeps the plain table and relies on the archive alone (see `core.archive`).
+"""
+
+from datetime import date
+
+
+TABLE = "core_patientdoctortable"
+DEFAULT_PARTITION = f"{TABLE}_default"
+SEQUENCE = f"{TABLE}_id_seq"
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months(first, last):
+    """The first days of the months from `first` through `last`."""
+    month, last = month_start(first), month_start(last)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def supported(connection):
+    return connection.vendor == "postgresql"
+
+
+def _quote(connection, name):
+    return connection.ops.quote_name(name)
+
+
+def _exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def create_partition(connection, month):
+    """
+    Create the partition of `month` unless it exists. Rows of that month already sitting in the
+    default partition are moved into it before it is attached.
+    """
+    name = partition_name(month)
+    bounds = [month, add_months(month, 1)]
+    table, partition = _quote(connection, TABLE), _quote(connection, name)
+    default = _quote(connection, DEFAULT_PARTITION)
+    with connection.cursor() as cursor:
+        if _exists(cursor, name):
+            return False
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {default} "
+            f"WHERE appointment_date >= %s AND appointment_date < %s)",
+            bounds,
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(
+                f"CREATE TABLE {partition} PARTITION OF {table} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                bounds,
+            )
+            return True
+        cursor.execute(f"CREATE TABLE {partition} (LIKE {table} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {default} "
+            f"WHERE appointment_date >= %s AND appointment_date < %s RETURNING *) "
+            f"INSERT INTO {partition} SELECT * FROM moved",
+            bounds,
+        )
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {partition} FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+    return True
+
+
+def ensure_partitions(connection, first, last):
+    """Create the missing month partitions from `first` through `last`; returns how many."""
+    if not supported(connection):
+        return 0
+    return sum(create_partition(connection, month) for month in months(first, last))
+
+
+def partitions(connection):
+    """`{month: name}` of the attached month partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = %s",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f"{TABLE}_p"
+    return {
+        date(int(name[-7:-3]), int(name[-2:]), 1): name
+        for name in names
+        if name.startswith(prefix)
+    }
+
+
+def drop_empty_partitions(connection, before):
+    """Drop the month partitions that end on or before `before` and hold no rows any more."""
+    if not supported(connection):
+        return []
+    dropped = []
+    with connection.cursor() as cursor:
+        for month, name in sorted(partitions(connection).items()):
+            if add_months(month, 1) > before:
+                continue
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {_quote(connection, name)})")
+            if not cursor.fetchone()[0]:
+                cursor.execute(f"DROP TABLE {_quote(connection, name)}")
+                dropped.append(name)
+    return dropped
+
+
+def _rebuild(schema_editor, model, partitioned):
+    """
+    Recreate the mappings table (partitioned by month or plain) with its rows, keys, indexes and
+    constraints; the primary key gains `appointment_date` when partitioned, as PostgreSQL requires
+    the partition key in every unique constraint.
+    """
+    connection = schema_editor.connection
+    table, staging = _quote(connection, TABLE), _quote(connection, f"{TABLE}_rebuild")
+    partition_by = " PARTITION BY RANGE (appointment_date)" if partitioned else ""
+    # Without INCLUDING DEFAULTS: the only default is `id`'s, and a copy of it would tie the
+    # staging table to the sequence that goes away with the old table.
+    schema_editor.execute(f"CREATE TABLE {staging} (LIKE {table}){partition_by}")
+    if partitioned:
+        schema_editor.execute(
+            f"CREATE TABLE {_quote(connection, DEFAULT_PARTITION)} PARTITION OF {staging} DEFAULT"
+        )
+    schema_editor.execute(f"INSERT INTO {staging} SELECT * FROM {table}")
+    # Rows written earlier in the migration's transaction leave deferred foreign key checks
+    # pending, and PostgreSQL will not drop a table with pending trigger events.
+    schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    schema_editor.execute(f"DROP TABLE {table}")
+    schema_editor.execute("SET CONSTRAINTS ALL DEFERRED")
+    schema_editor.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+
+    schema_editor.execute(f"CREATE SEQUENCE {_quote(connection, SEQUENCE)} OWNED BY {table}.id")
+    schema_editor.execute(
+        f"SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)", [SEQUENCE]
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)", [SEQUENCE]
+    )
+    key = "id, appointment_date" if partitioned else "id"
+    schema_editor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({key})")
+
+    for field in (model._meta.get_field("patient"), model._meta.get_field("doctor")):
+        schema_editor.execute(
+            schema_editor._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s")
+        )
+    schema_editor.alter_unique_together(model, [], model._meta.unique_together)
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+    for constraint in model._meta.constraints:
+        schema_editor.add_constraint(model, constraint)
+
+
+def partition_table(schema_editor, model, first, last):
+    """Turn the mappings table into a partitioned one with month partitions `first`..`last`."""
+    if not supported(schema_editor.connection):
+        return
+    _rebuild(schema_editor, model, partitioned=True)
+    ensure_partitions(schema_editor.connection, first, last)
+
+
+def unpartition_table(schema_editor, model):
+    if not supported(schema_editor.connection):
+        return
+    _rebuild(schema_editor, model, partitioned=False)
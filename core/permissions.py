@@ -1,3 +1,5 @@
+import hmac
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -19,4 +21,22 @@ class IsPatientOwner(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        return obj.patient.user == request.user
+        # Views may annotate the owner's id from their join, sparing the patient and user rows.
+        owner_id = getattr(obj, "patient_user_id", None)
+        if owner_id is None:
+            owner_id = obj.patient.user_id
+        return owner_id == request.user.pk
+
+
+class HasScrapeToken(permissions.BasePermission):
+    """
+    Permission for the metrics endpoint: requires `Authorization: Bearer <CORE_METRICS token>`,
+    or DEBUG when no token is configured.
+    """
+
+    def has_permission(self, request, view):
+        token = getattr(settings, "CORE_METRICS", {}).get("SCRAPE_TOKEN")
+        if not token:
+            return settings.DEBUG
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        return hmac.compare_digest(header, f"Bearer {token}")
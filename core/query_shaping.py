@@ -0,0 +1,174 @@
+from dataclasses import dataclass
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    select_related: tuple = ()
+    prefetch_related: tuple = ()
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+
+_plan_cache = {}
+
+
+def _walk_relations(model, source_attrs):
+    """
+    Follow `source_attrs` across model relations and return the ORM lookup path that has to be
+    fetched together with the row, plus whether any hop is multi-valued (needs a prefetch).
+    """
+    path = []
+    many = False
+    for attr in source_attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation or field.related_model is None:
+            break
+        path.append(attr)
+        many = many or field.many_to_many or field.one_to_many
+        model = field.related_model
+    return path, many
+
+
+def _collect(model, fields, prefix, select, prefetch, many=False):
+    for field in fields.values():
+        if field.write_only or field.source == "*":
+            continue
+
+        source_attrs = list(field.source_attrs)
+        if isinstance(field, RelatedField) and field.use_pk_only_optimization():
+            # The pk is read straight off the `<name>_id` column, only the hops before it matter.
+            source_attrs = source_attrs[:-1]
+
+        path, path_many = _walk_relations(model, source_attrs)
+        if not path:
+            continue
+
+        lookup = "__".join(prefix + path)
+        if many or path_many or isinstance(field, (ManyRelatedField, ListSerializer)):
+            prefetch.add(lookup)
+        else:
+            select.add(lookup)
+
+        nested = field.child if isinstance(field, ListSerializer) else field
+        if isinstance(nested, BaseSerializer) and hasattr(nested, "fields"):
+            related_model = model
+            for attr in path:
+                related_model = related_model._meta.get_field(attr).related_model
+            _collect(
+                related_model,
+                nested.fields,
+                prefix + path,
+                select,
+                prefetch,
+                many or path_many or isinstance(field, ListSerializer),
+            )
+
+
+def build_query_plan(model, fields):
+    """
+    Build the `select_related`/`prefetch_related` plan needed to render `fields` (a serializer's
+    bound fields) for rows of `model` without issuing per-row queries.
+    """
+    select, prefetch = set(), set()
+    _collect(model, fields, [], select, prefetch)
+    # A path that is prefetched must not also be joined, and joined parents of a deeper join are
+    # implied by it.
+    select -= prefetch
+    select = {
+        path
+        for path in select
+        if not any(other.startswith(path + "__") for other in select)
+    }
+    return QueryPlan(tuple(sorted(select)), tuple(sorted(prefetch)))
+
+
+def get_query_plan(serializer_class, fields=None):
+    """The query plan of `serializer_class`, or of just the named `fields` of it."""
+    key = (serializer_class, fields)
+    plan = _plan_cache.get(key)
+    if plan is None:
+        serializer = serializer_class()
+        bound = serializer.fields
+        if fields is not None:
+            bound = {name: field for name, field in bound.items() if name in fields}
+        plan = build_query_plan(serializer.Meta.model, bound)
+        _plan_cache[key] = plan
+    return plan
+
+
+_columns_cache = {}
+
+
+def _related_columns(model, fields, paths):
+    needed = {path: set() for path in paths}
+    for field in fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        source_attrs = list(field.source_attrs)
+        if isinstance(field, RelatedField) and field.use_pk_only_optimization():
+            source_attrs = source_attrs[:-1]
+        path, _ = _walk_relations(model, source_attrs)
+        lookup = "__".join(path)
+        if lookup not in needed or needed[lookup] is None:
+            continue
+
+        target = model
+        for attr in path:
+            target = target._meta.get_field(attr).related_model
+        rest = source_attrs[len(path):]
+        if isinstance(field, BaseSerializer) or len(rest) != 1:
+            needed[lookup] = None
+        elif rest[0] == "__str__":
+            if not hasattr(target, "str_expression"):
+                needed[lookup] = None
+                continue
+            expression = target.str_expression()
+            needed[lookup].update(
+                node.name for node in expression.flatten() if isinstance(node, F)
+            )
+        else:
+            try:
+                needed[lookup].add(target._meta.get_field(rest[0]).name)
+            except FieldDoesNotExist:
+                needed[lookup] = None
+    return needed
+
+
+def get_related_columns(serializer_class, fields):
+    """
+    `{path: columns}` of the related rows joined to render `fields` of `serializer_class`: the
+    columns read from them, or None when that cannot be told (a nested serializer, a property, a
+    `__str__` without `str_expression`) and the whole row is needed.
+    """
+    key = (serializer_class, fields)
+    columns = _columns_cache.get(key)
+    if columns is None:
+        serializer = serializer_class()
+        bound = {name: field for name, field in serializer.fields.items() if name in fields}
+        columns = _related_columns(
+            serializer.Meta.model,
+            bound,
+            get_query_plan(serializer_class, fields).select_related,
+        )
+        _columns_cache[key] = columns
+    return columns
+
+
+def shape_queryset(queryset, serializer_class, fields=None):
+    """
+    Return `queryset` with the related rows that `serializer_class` (or just its `fields`)
+    renders fetched up front.
+    """
+    return get_query_plan(serializer_class, fields).apply(queryset)
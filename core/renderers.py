@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+# The `FastJSONRenderer` class is a drop-in `JSONRenderer` that encodes with orjson when it is
+# installed. Values orjson has no native encoding for (Decimal, lazy strings, querysets, ...) and
+# datetimes go through DRF's encoder, so the bytes match `JSONRenderer`'s compact output.
+# Indented output, and anything orjson refuses (e.g. integers wider than 64 bits), falls back to
+# the stdlib path.
+#
+# Floats are the exception to the matching bytes. orjson spells exponents without the `+` and
+# zero padding (`1e16`, `1e-7` against `1e+16`, `1e-07`), which parses to the same value. It
+# also encodes NaN and Infinity as `null`, where `JSONRenderer` raises ValueError. Finding them
+# beforehand would mean walking the whole payload in Python, which costs most of what orjson
+# saves, and the API's only floats are finite search scores.
+class FastJSONRenderer(JSONRenderer):
+
+    if orjson is not None:
+        options = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or self.get_indent(accepted_media_type, renderer_context)
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Like `JSONRenderer`, escape the separators that are valid JSON but not valid JavaScript.
+        if b"\xe2\x80" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+# The `CSVRenderer` and `NDJSONRenderer` classes make the export formats negotiable through
+# `?format=` / `Accept`. Export data itself is streamed by the views; these only render the
+# small non-streamed bodies (errors) in the negotiated format.
+class CSVRenderer(BaseRenderer):
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        rows = data.items() if isinstance(data, dict) else data
+        for row in rows:
+            writer.writerow(row)
+        return buffer.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        return "".join(
+            json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows
+        ).encode(self.charset)
@@ -0,0 +1,187 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject, empty
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_current = ContextVar("core_read_routing", default=None)
+_writes = ContextVar("core_write_tracking", default=None)
+
+
+def replica_settings():
+    return getattr(settings, "READ_REPLICAS", {})
+
+
+def replica_aliases():
+    return replica_settings().get("ALIASES", [])
+
+
+def pin_key(user_id):
+    return f"db:pinned:{user_id}"
+
+
+def request_user_id(request):
+    """
+    The id of the user `request` is authenticated as, or None when it is anonymous or not known
+    yet: DRF replaces the lazy session user with the token user once it has authenticated.
+    """
+    user = getattr(request, "user", None)
+    if user is None or (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+        return None
+    return user.pk if user.is_authenticated else None
+
+
+def pin_to_primary(user_id):
+    """Send the reads of `user_id` to the primary for the next `PIN_SECONDS` seconds."""
+    options = replica_settings()
+    caches[options.get("PIN_CACHE", "default")].set(
+        pin_key(user_id), True, options.get("PIN_SECONDS", 5)
+    )
+
+
+def is_pinned(user_id):
+    options = replica_settings()
+    return bool(caches[options.get("PIN_CACHE", "default")].get(pin_key(user_id)))
+
+
+# The `ReadState` class holds the routing decision for the reads of one safe request. Whether the
+# user is pinned can only be checked once the view has authenticated them, so it is looked up on
+# the first routed read after that and kept for the rest of the request.
+class ReadState:
+
+    def __init__(self, request):
+        self.request = request
+        self.replica = None
+        self.pinned = None
+
+    def alias(self):
+        if self.pinned is None:
+            user_id = request_user_id(self.request)
+            if user_id is not None:
+                self.pinned = is_pinned(user_id)
+        if self.pinned:
+            return DEFAULT_DB_ALIAS
+        if self.replica is None:
+            aliases = replica_aliases()
+            self.replica = random.choice(aliases) if aliases else DEFAULT_DB_ALIAS
+        return self.replica
+
+
+@contextmanager
+def reading(request):
+    """Route the reads made inside the block on behalf of the safe `request` to a replica."""
+    token = _current.set(ReadState(request))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+# The `WriteState` class records whether an unsafe request wrote to the primary; read-only POSTs
+# (batches of GETs, searches) do not pin their user.
+class WriteState:
+
+    def __init__(self):
+        self.wrote = False
+
+
+@contextmanager
+def writing():
+    """Track the writes routed inside the block; yields the `WriteState`."""
+    state = WriteState()
+    token = _writes.set(state)
+    try:
+        yield state
+    finally:
+        _writes.reset(token)
+
+
+@contextmanager
+def primary():
+    """
+    Run the block's reads on the primary, e.g. when they fill a shared cache or must see the same
+    transaction as the writes around them.
+    """
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+# The `ReplicaRouter` class sends the reads of safe requests (see `ReplicaRoutingMiddleware`) to
+# one of the `READ_REPLICAS` aliases, picked once per request; writes, reads of unsafe requests
+# and reads of users who wrote within the last `PIN_SECONDS` go to the primary.
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None:
+            return None
+        return state.alias()
+
+    def db_for_write(self, model, **hints):
+        state = _writes.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary.
+        if db in replica_aliases():
+            return False
+        return None
+
+
+# The `ReplicaRoutingMiddleware` class marks safe requests for replica reads and pins the user to
+# the primary after a successful request that wrote, so they read their own writes despite
+# replication lag.
+class ReplicaRoutingMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.method in SAFE_METHODS:
+            with reading(request):
+                return self.get_response(request)
+        with writing() as writes:
+            response = self.get_response(request)
+        self.finish(request, response, writes)
+        return response
+
+    async def __acall__(self, request):
+        if request.method in SAFE_METHODS:
+            with reading(request):
+                return await self.get_response(request)
+        # The ORM runs in `sync_to_async` threads, which share the state through the context.
+        with writing() as writes:
+            response = await self.get_response(request)
+        await sync_to_async(self.finish)(request, response, writes)
+        return response
+
+    def finish(self, request, response, writes):
+        if response.status_code >= 400 or not writes.wrote or not replica_aliases():
+            return
+        user_id = request_user_id(request)
+        if user_id is not None:
+            pin_to_primary(user_id)
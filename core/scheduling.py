@@ -0,0 +1,149 @@
+import heapq
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, time, timedelta
+from itertools import islice
+from django.utils import timezone
+from .models import Doctor, DoctorSchedule, PatientDoctorTable
+
+
+@dataclass(frozen=True, order=True)
+class Slot:
+    date: date
+    time: time
+    doctor_id: int
+    duration_minutes: int = field(compare=False)
+
+    def as_dict(self, doctor_name=None):
+        data = {
+            "doctor": self.doctor_id,
+            "date": self.date.isoformat(),
+            "time": self.time.isoformat(),
+            "duration_minutes": self.duration_minutes,
+        }
+        if doctor_name is not None:
+            data["doctor_name"] = doctor_name
+        return data
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+def _free_minutes(windows, booked, not_before=None):
+    """
+    Yield `(start, length)` in minutes for every slot of `windows` that does not overlap a booking.
+    `windows` are `(start, end, length)` triples and `booked` the sorted start minutes of the
+    day's active appointments; both lists are walked once.
+    """
+    for start, end, length in windows:
+        index = bisect_left(booked, start - length + 1)
+        slot = start
+        while slot + length <= end:
+            while index < len(booked) and booked[index] + length <= slot:
+                index += 1
+            taken = index < len(booked) and booked[index] < slot + length
+            if not taken and (not_before is None or slot >= not_before):
+                yield slot, length
+            slot += length
+
+
+def _date_range(start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += timedelta(days=1)
+
+
+# The `Availability` class loads working hours and booked appointments for a set of doctors and
+# a date range with one query each, then computes free slots in memory.
+class Availability:
+
+    def __init__(self, doctor_ids, start_date, end_date, now=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        now = now or timezone.localtime()
+        self.today = now.date()
+        self.now_minutes = _minutes(now.time())
+
+        self.windows = defaultdict(list)
+        for row in DoctorSchedule.objects.filter(doctor_id__in=doctor_ids).values_list(
+            "doctor_id", "weekday", "start_time", "end_time", "slot_minutes"
+        ):
+            doctor_id, weekday, start, end, length = row
+            self.windows[doctor_id, weekday].append(
+                (_minutes(start), _minutes(end), length)
+            )
+        for windows in self.windows.values():
+            windows.sort()
+
+        self.booked = defaultdict(list)
+        for doctor_id, day, start in PatientDoctorTable.objects.filter(
+            doctor_id__in=doctor_ids,
+            appointment_date__range=(start_date, end_date),
+            is_active=True,
+        ).values_list("doctor_id", "appointment_date", "appointment_time"):
+            self.booked[doctor_id, day].append(_minutes(start))
+        for times in self.booked.values():
+            times.sort()
+
+        self.doctor_ids = sorted(
+            {doctor_id for doctor_id, _ in self.windows} & set(doctor_ids)
+        )
+
+    def iter_slots(self, doctor_id):
+        """Yield the free `Slot`s of one doctor in chronological order."""
+        for day in _date_range(max(self.start_date, self.today), self.end_date):
+            windows = self.windows.get((doctor_id, day.weekday()))
+            if not windows:
+                continue
+            not_before = self.now_minutes if day == self.today else None
+            for start, length in _free_minutes(
+                windows, self.booked.get((doctor_id, day), []), not_before
+            ):
+                yield Slot(day, _time(start), doctor_id, length)
+
+    def is_free(self, doctor_id, day, start):
+        """Whether a slot of `doctor_id`'s working hours starts at `start` on `day` and is free."""
+        if not self.start_date <= day <= self.end_date or day < self.today:
+            return False
+        windows = self.windows.get((doctor_id, day.weekday()), [])
+        not_before = self.now_minutes if day == self.today else None
+        minute = _minutes(start)
+        return any(
+            slot == minute
+            for slot, _ in _free_minutes(
+                windows, self.booked.get((doctor_id, day), []), not_before
+            )
+        )
+
+    def earliest(self, limit):
+        """The first `limit` free slots across all doctors, merged in time order."""
+        merged = heapq.merge(*(self.iter_slots(doctor_id) for doctor_id in self.doctor_ids))
+        return list(islice(merged, limit))
+
+
+def doctor_free_slots(doctor, start_date, end_date):
+    return list(Availability([doctor.pk], start_date, end_date).iter_slots(doctor.pk))
+
+
+def search_free_slots(specialization, start_date, end_date, limit):
+    """
+    Return `(slots, doctor_names)` with the earliest `limit` free slots among active doctors of
+    `specialization`.
+    """
+    doctors = {
+        doctor.pk: str(doctor)
+        for doctor in Doctor.objects.filter(
+            is_active=True, specialization__iexact=specialization
+        ).only("id", "first_name", "last_name")
+    }
+    if not doctors:
+        return [], {}
+    availability = Availability(list(doctors), start_date, end_date)
+    return availability.earliest(limit), doctors
@@ -0,0 +1,27 @@
+from django.conf import settings
+from .database import DatabaseSearch
+from .documents import DOCTOR, DOCUMENT_TYPES, PATIENT, DocumentType, document_type_for
+from .index import SearchIndex
+from .memory import MemorySearch, get_memory_search
+
+
+def get_search_backend():
+    """The backend of `SEARCH["BACKEND"]`: "memory" (default) or "database"."""
+    options = getattr(settings, "SEARCH", {})
+    if options.get("BACKEND", "memory") == "database":
+        return DatabaseSearch(options.get("DATABASE", "default"))
+    return get_memory_search()
+
+
+__all__ = [
+    "DOCTOR",
+    "DOCUMENT_TYPES",
+    "PATIENT",
+    "DatabaseSearch",
+    "DocumentType",
+    "MemorySearch",
+    "SearchIndex",
+    "document_type_for",
+    "get_memory_search",
+    "get_search_backend",
+]
@@ -0,0 +1,226 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.recorder import MigrationRecorder
+from .documents import DOCTOR, PATIENT
+from .text import fts5_query, tsquery
+
+
+# PostgreSQL weight classes for the document weights, strongest first.
+_PG_WEIGHTS = {3: "A", 2: "B", 1: "C"}
+
+
+def fts_table(document_type):
+    return f"{document_type.model._meta.db_table}_fts"
+
+
+def columns(document_type):
+    return [
+        document_type.model._meta.get_field(name).column for name in document_type.weights
+    ]
+
+
+def pg_vector(document_type):
+    """
+    The weighted `tsvector` expression of a document. The GIN indexes of migration 0007 are built
+    on this exact text, so changing it requires a migration recreating them.
+    """
+    return " || ".join(
+        f"setweight(to_tsvector('simple', coalesce({column}, '')), "
+        f"'{_PG_WEIGHTS[weight]}')"
+        for column, weight in zip(columns(document_type), document_type.weights.values())
+    )
+
+
+def pg_index_sql(document_type):
+    table = document_type.model._meta.db_table
+    where = " AND ".join(
+        f"{document_type.model._meta.get_field(name).column} = {value!r}"
+        for name, value in document_type.filters.items()
+    )
+    return (
+        f"CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} "
+        f"USING gin (({pg_vector(document_type)}))" + (f" WHERE {where}" if where else "")
+    )
+
+
+def sqlite_fts_sql(document_type):
+    """
+    Statements creating the FTS5 external-content table of a document type and the triggers
+    keeping it in step with the model table. Every statement is idempotent and the last one
+    rebuilds the index from the table, so this also repairs an index whose triggers were dropped
+    (SQLite migrations that remake a table drop its triggers).
+    """
+    table = document_type.model._meta.db_table
+    fts = fts_table(document_type)
+    cols = ", ".join(columns(document_type))
+    new = ", ".join(f"new.{column}" for column in columns(document_type))
+    old = ", ".join(f"old.{column}" for column in columns(document_type))
+    delete = f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} "
+        f"BEGIN {delete} {insert} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def sqlite_drop_sql(document_type):
+    fts = fts_table(document_type)
+    return [f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ("ai", "ad", "au")] + [
+        f"DROP TABLE IF EXISTS {fts}"
+    ]
+
+
+def install(connection, document_types=(DOCTOR, PATIENT)):
+    """Create (or repair) the full-text structures of `document_types` on `connection`."""
+    if connection.vendor == "postgresql":
+        statements = [pg_index_sql(document_type) for document_type in document_types]
+    elif connection.vendor == "sqlite":
+        statements = [
+            sql for document_type in document_types for sql in sqlite_fts_sql(document_type)
+        ]
+    else:
+        return
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def uninstall(connection, document_types=(DOCTOR, PATIENT)):
+    if connection.vendor == "postgresql":
+        statements = [
+            f"DROP INDEX IF EXISTS {document_type.model._meta.db_table}_search_idx"
+            for document_type in document_types
+        ]
+    elif connection.vendor == "sqlite":
+        statements = [
+            sql for document_type in document_types for sql in sqlite_drop_sql(document_type)
+        ]
+    else:
+        return
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def missing(connection, document_types=(DOCTOR, PATIENT)):
+    """The document types whose full-text structures are missing from `connection`."""
+    if connection.vendor == "postgresql":
+        expected = [
+            (document_type, {f"{document_type.model._meta.db_table}_search_idx"})
+            for document_type in document_types
+        ]
+        sql = "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"
+    elif connection.vendor == "sqlite":
+        expected = [
+            (
+                document_type,
+                {fts_table(document_type)}
+                | {f"{fts_table(document_type)}_{suffix}" for suffix in ("ai", "ad", "au")},
+            )
+            for document_type in document_types
+        ]
+        sql = "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+    else:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        present = {name for (name,) in cursor.fetchall()}
+    return [document_type for document_type, names in expected if names - present]
+
+
+def repair(sender=None, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    `post_migrate` receiver reinstalling the full-text structures a later migration dropped, such
+    as the FTS5 triggers SQLite loses when a migration remakes their table. Databases migrated to
+    before 0007 are left alone.
+    """
+    connection = connections[using]
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ("core", "0007_search_indexes") not in applied:
+        return
+    document_types = missing(connection)
+    if document_types:
+        install(connection, document_types)
+
+
+# The `DatabaseSearch` class runs searches in the database's own full-text engine: a GIN-indexed
+# `tsvector` expression ranked by `ts_rank` on PostgreSQL, the FTS5 table ranked by bm25 on
+# SQLite. The ranked ids come from one raw query, the display fields from a second one.
+class DatabaseSearch:
+
+    def __init__(self, using="default"):
+        self.using = using
+
+    def search(self, document_type, query, scope=None, limit=10):
+        connection = connections[self.using]
+        if connection.vendor == "postgresql":
+            sql, params = self.postgres_sql(document_type, query, scope, limit)
+        elif connection.vendor == "sqlite":
+            sql, params = self.sqlite_sql(document_type, query, scope, limit)
+        else:
+            raise NotImplementedError(
+                f"Full-text search is not supported on {connection.vendor}"
+            )
+        if sql is None:
+            return []
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            hits = cursor.fetchall()
+        rows = {
+            row["id"]: row
+            for row in document_type.values(
+                document_type.queryset(scope).filter(id__in=[doc_id for doc_id, _ in hits])
+            ).using(self.using)
+        }
+        return [
+            {**document_type.display(rows[doc_id]), "score": round(score, 6)}
+            for doc_id, score in hits
+            if doc_id in rows
+        ]
+
+    def conditions(self, document_type, scope, alias):
+        clauses, params = [], []
+        for name, value in document_type.filters.items():
+            clauses.append(f"{alias}.{document_type.model._meta.get_field(name).column} = %s")
+            params.append(value)
+        if document_type.scope_field:
+            clauses.append(
+                f"{alias}.{document_type.model._meta.get_field(document_type.scope_field).column}"
+                " = %s"
+            )
+            params.append(scope)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def postgres_sql(self, document_type, query, scope, limit):
+        expression = tsquery(query)
+        if expression is None:
+            return None, None
+        table = document_type.model._meta.db_table
+        where, params = self.conditions(document_type, scope, table)
+        vector = pg_vector(document_type)
+        sql = (
+            f"SELECT {table}.id, ts_rank({vector}, to_tsquery('simple', %s)) AS score "
+            f"FROM {table} WHERE {vector} @@ to_tsquery('simple', %s){where} "
+            f"ORDER BY score DESC, {table}.id LIMIT %s"
+        )
+        return sql, [expression, expression, *params, limit]
+
+    def sqlite_sql(self, document_type, query, scope, limit):
+        expression = fts5_query(query)
+        if expression is None:
+            return None, None
+        table = document_type.model._meta.db_table
+        fts = fts_table(document_type)
+        where, params = self.conditions(document_type, scope, table)
+        weights = ", ".join(str(float(weight)) for weight in document_type.weights.values())
+        sql = (
+            f"SELECT {table}.id, -bm25({fts}, {weights}) AS score FROM {fts} "
+            f"JOIN {table} ON {table}.id = {fts}.rowid WHERE {fts} MATCH %s{where} "
+            f"ORDER BY score DESC, {table}.id LIMIT %s"
+        )
+        return sql, [expression, *params, limit]
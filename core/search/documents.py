@@ -0,0 +1,71 @@
+from dataclasses import dataclass, field
+from django.db.models import F
+from ..models import Doctor, Patient
+
+
+# The `DocumentType` class describes how one model is searched: the weighted text fields, the
+# fields returned with each hit, and the scope documents belong to (patients are only ever
+# searched within their owner's records, doctors are global).
+@dataclass(frozen=True)
+class DocumentType:
+    name: str
+    model: type
+    weights: dict
+    display_fields: tuple
+    scope_field: str = None
+    filters: dict = field(default_factory=dict)
+
+    def queryset(self, scope=None):
+        queryset = self.model.objects.filter(**self.filters)
+        if self.scope_field:
+            queryset = queryset.filter(**{self.scope_field: scope})
+        return queryset
+
+    def scope_of(self, instance):
+        return getattr(instance, self.scope_field) if self.scope_field else None
+
+    def is_indexed(self, instance):
+        return all(getattr(instance, name) == value for name, value in self.filters.items())
+
+    def values(self, queryset):
+        """Rows with the searchable and display fields, plus `updated_at` for syncing."""
+        return queryset.values(
+            *{"id", "updated_at", *self.weights, *self.display_fields}
+            - {"name"},
+            name=self.model.str_expression(),
+        )
+
+    def instance_row(self, instance):
+        names = {"id", "updated_at", *self.weights, *self.display_fields} - {"name"}
+        row = {name: getattr(instance, name) for name in names}
+        row["name"] = str(instance)
+        return row
+
+    def display(self, row):
+        return {"type": self.name, **{field: row[field] for field in self.display_fields}}
+
+
+DOCTOR = DocumentType(
+    name="doctor",
+    model=Doctor,
+    weights={"first_name": 3, "last_name": 3, "specialization": 2},
+    display_fields=("id", "name", "specialization"),
+    filters={"is_active": True},
+)
+
+PATIENT = DocumentType(
+    name="patient",
+    model=Patient,
+    weights={"first_name": 3, "last_name": 3, "email": 1, "phone": 1},
+    display_fields=("id", "name", "email", "phone"),
+    scope_field="user_id",
+)
+
+DOCUMENT_TYPES = {DOCTOR.name: DOCTOR, PATIENT.name: PATIENT}
+
+
+def document_type_for(model):
+    for document_type in DOCUMENT_TYPES.values():
+        if document_type.model is model:
+            return document_type
+    return None
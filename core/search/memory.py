@@ -0,0 +1,216 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from ..cache import LRUCache
+from ..routers import primary
+from .index import SearchIndex
+
+
+@dataclass
+class _Scope:
+    index: SearchIndex
+    version: int
+    synced_at: object
+    checked_at: float = field(default_factory=time.monotonic)
+    polled_at: float = field(default_factory=time.monotonic)
+    syncing: bool = False
+    # Guards `index` and the bookkeeping above; held for in-memory work only, never for queries.
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+@dataclass
+class _Build:
+    done: threading.Event = field(default_factory=threading.Event)
+    state: _Scope = None
+
+
+# The `MemorySearch` class holds one `SearchIndex` per document type and scope (every patient
+# owner has their own). Indexes are built on first use and kept current two ways: model signals
+# apply writes to this process's indexes after commit, and bump a version in the shared cache.
+# Other processes notice the new version (checked at most every `version_ttl` seconds) and pull
+# the rows updated since their last sync; a row count mismatch (hard deletes, raw SQL) forces a
+# rebuild of that scope. A local-memory cache shares no versions between processes, so each scope
+# is then also synced every `poll_interval` seconds.
+#
+# Builds and syncs query the database without holding any lock: only requests for a scope that is
+# still being built wait for it, and a scope being synced keeps answering from its current index.
+class MemorySearch:
+
+    def __init__(self, shared, version_ttl=1, sync_margin=5, max_scopes=1024, poll_interval=30):
+        self.shared = shared
+        self.version_ttl = version_ttl
+        self.sync_margin = timedelta(seconds=sync_margin)
+        self.poll_interval = poll_interval
+        self.scopes = LRUCache(max_scopes, ttl=0)
+        self._lock = threading.Lock()
+        self._building = {}
+
+    @property
+    def versions_shared(self):
+        return getattr(self.shared, "shared", True)
+
+    def version_key(self, document_type, scope):
+        return f"search:version:{document_type.name}:{scope}"
+
+    def search(self, document_type, query, scope=None, limit=10):
+        state = self.get_scope(document_type, scope)
+        with state.lock:
+            hits = state.index.search(query, limit)
+        return [{**display, "score": score} for display, score in hits]
+
+    def get_scope(self, document_type, scope):
+        # Indexes are loaded from the primary: rows a replica has not received yet would be
+        # missing until the next version bump.
+        with primary():
+            return self.load_scope(document_type, scope)
+
+    def load_scope(self, document_type, scope):
+        key = (document_type.name, scope)
+        state = self.scopes.get(key)
+        if state is None:
+            return self.build_once(key, document_type, scope)
+
+        now = time.monotonic()
+        with state.lock:
+            due = not state.syncing and now - state.checked_at >= self.version_ttl
+            if due:
+                state.checked_at, state.syncing = now, True
+        if due:
+            try:
+                version = self.shared.get(self.version_key(document_type, scope)) or 0
+                polled = self.versions_shared or now - state.polled_at < self.poll_interval
+                if version != state.version or not polled:
+                    self.sync(document_type, scope, state, version)
+            finally:
+                state.syncing = False
+        return state
+
+    def build_once(self, key, document_type, scope):
+        """Build the scope, or wait for the thread already building it."""
+        with self._lock:
+            state = self.scopes.get(key)
+            if state is not None:
+                return state
+            building = self._building.get(key)
+            owner = building is None
+            if owner:
+                building = self._building[key] = _Build()
+        if not owner:
+            building.done.wait()
+            if building.state is None:
+                # The build failed; try again here.
+                return self.load_scope(document_type, scope)
+            return building.state
+
+        try:
+            building.state = self.build(document_type, scope)
+            self.scopes.set(key, building.state)
+            return building.state
+        finally:
+            with self._lock:
+                del self._building[key]
+            building.done.set()
+
+    def build(self, document_type, scope):
+        # Version and timestamp are read before the rows, so writes racing the load are pulled
+        # again by the next sync.
+        version = self.shared.get(self.version_key(document_type, scope)) or 0
+        synced_at = timezone.now()
+        index = SearchIndex(document_type.weights)
+        for row in document_type.values(document_type.queryset(scope)).iterator():
+            index.add(row["id"], row, document_type.display(row))
+        return _Scope(index, version, synced_at)
+
+    def sync(self, document_type, scope, state, version):
+        synced_at = timezone.now()
+        changed = document_type.model.objects.filter(
+            updated_at__gte=state.synced_at - self.sync_margin
+        )
+        if document_type.scope_field:
+            changed = changed.filter(**{document_type.scope_field: scope})
+        changed_ids = set(changed.values_list("id", flat=True))
+        current = {
+            row["id"]: row
+            for row in document_type.values(
+                document_type.queryset(scope).filter(id__in=changed_ids)
+            )
+        }
+        with state.lock:
+            for doc_id in changed_ids:
+                if doc_id in current:
+                    row = current[doc_id]
+                    state.index.add(doc_id, row, document_type.display(row))
+                else:
+                    state.index.remove(doc_id)
+            state.version, state.synced_at = version, synced_at
+            state.polled_at = time.monotonic()
+            indexed = len(state.index)
+
+        if document_type.queryset(scope).count() != indexed:
+            rebuilt = self.build(document_type, scope)
+            with state.lock:
+                state.index, state.version, state.synced_at = (
+                    rebuilt.index,
+                    rebuilt.version,
+                    rebuilt.synced_at,
+                )
+
+    def document_changed(self, document_type, instance, deleted=False):
+        """Apply a saved or deleted instance once the surrounding transaction commits."""
+        # Deleted instances lose their pk once the deletion completes, read it now.
+        doc_id, scope = instance.pk, document_type.scope_of(instance)
+        row = None if deleted else document_type.instance_row(instance)
+        indexed = not deleted and document_type.is_indexed(instance)
+
+        def apply():
+            version = self.shared.incr(self.version_key(document_type, scope))
+            state = self.scopes.get((document_type.name, scope))
+            if state is None:
+                return
+            with state.lock:
+                if indexed:
+                    state.index.add(doc_id, row, document_type.display(row))
+                else:
+                    state.index.remove(doc_id)
+                if version == state.version + 1:
+                    # No write from another process was missed, nothing to pull.
+                    state.version = version
+
+        transaction.on_commit(apply)
+
+    def documents_changed(self, document_type, scope=None):
+        """Signal writes that sent no model signals (e.g. `bulk_create`) to every process."""
+        transaction.on_commit(
+            lambda: self.shared.incr(self.version_key(document_type, scope))
+        )
+
+    def clear(self):
+        self.scopes.clear()
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_memory_search():
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                options = getattr(settings, "SEARCH", {})
+                backend_class = import_string(
+                    options.get("SHARED_BACKEND", "core.cache.DjangoCacheBackend")
+                )
+                _memory = MemorySearch(
+                    shared=backend_class(**options.get("SHARED_BACKEND_OPTIONS", {})),
+                    version_ttl=options.get("VERSION_TTL", 1),
+                    sync_margin=options.get("SYNC_MARGIN", 5),
+                    max_scopes=options.get("MAX_SCOPES", 1024),
+                    poll_interval=options.get("POLL_INTERVAL", 30),
+                )
+    return _memory
@@ -0,0 +1,31 @@
+import re
+import unicodedata
+
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text):
+    """Lowercase `text` and strip accents, matching SQLite's `remove_diacritics 2` tokenizer."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text):
+    return _WORD.findall(normalize(text))
+
+
+def fts5_query(text):
+    """An FTS5 MATCH expression requiring every word of `text` as a prefix, or None."""
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def tsquery(text):
+    """A PostgreSQL `to_tsquery` expression requiring every word of `text` as a prefix, or None."""
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
@@ -1,4 +1,5 @@
 from rest_framework.serializers import (
+    Serializer,
     ModelSerializer,
     CharField,
     EmailField,
@@ -8,18 +9,23 @@ from rest_framework.serializers import (
     BooleanField,
     ValidationError,
     ReadOnlyField,
+    ChoiceField,
+    DictField,
+    ListField,
 )
 from django.contrib.auth.models import User
-from .models import Patient, Doctor, PatientDoctorTable
+from django.conf import settings
+from .models import Patient, Doctor, PatientDoctorTable, DoctorSchedule
+from .instrumentation import MeasuredSerializerMixin
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 import re
-from datetime import date
+from datetime import date, timedelta
 
 
 # This class is a serializer in Python for creating and validating user data, including fields for
 # username, password, email, and name.
-class UserSerializer(ModelSerializer):
+class UserSerializer(MeasuredSerializerMixin, ModelSerializer):
 
     password = CharField(write_only=True)
     confirm_password = CharField(write_only=True)
@@ -74,7 +80,7 @@ class UserSerializer(ModelSerializer):
 
 # The `PatientSerializer` class in Python defines validation rules and data creation logic for a
 # Patient model.
-class PatientSerializer(ModelSerializer):
+class PatientSerializer(MeasuredSerializerMixin, ModelSerializer):
 
     class Meta:
         model = Patient
@@ -98,6 +104,9 @@ class PatientSerializer(ModelSerializer):
             r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$", value
         ):
             raise ValidationError("Please enter a valid email address.")
+        # Bulk imports check the emails of a whole batch in one query (see `core.bulk`).
+        if self.context.get("bulk"):
+            return value
         if Patient.objects.filter(email=value).exists():
             raise ValidationError(f"A patient with email : {value} already exists")
         return value
@@ -111,7 +120,7 @@ class PatientSerializer(ModelSerializer):
 
 # The `DoctorSerializer` class in Python defines serialization behavior for the Doctor model,
 # including validation for phone numbers and emails.
-class DoctorSerializer(ModelSerializer):
+class DoctorSerializer(MeasuredSerializerMixin, ModelSerializer):
 
     class Meta:
         model = Doctor
@@ -126,6 +135,8 @@ class DoctorSerializer(ModelSerializer):
         return value
 
     def validate_email(self, value):
+        if self.context.get("bulk"):
+            return value
         if Doctor.objects.filter(email=value).exists():
             if self.instance and self.instance.email == value:
                 return value
@@ -140,7 +151,7 @@ class DoctorSerializer(ModelSerializer):
 # patients to doctors, including validation rules.
 
 
-class PatientDoctorMappingSerializer(ModelSerializer):
+class PatientDoctorMappingSerializer(MeasuredSerializerMixin, ModelSerializer):
 
     patient_name = ReadOnlyField(source="patient.__str__")
     doctor_name = ReadOnlyField(source="doctor.__str__")
@@ -150,6 +161,16 @@ class PatientDoctorMappingSerializer(ModelSerializer):
         fields = "__all__"
         reads_only_fields = ("created_at", "updated_at")
 
+    def get_validators(self):
+        # The active doctor-slot constraint is enforced under the slot lock by
+        # `core.booking.reserve_slot`, which reports conflicts as 409 with alternatives.
+        slot_fields = {"doctor", "appointment_date", "appointment_time"}
+        return [
+            validator
+            for validator in super().get_validators()
+            if set(getattr(validator, "fields", ())) != slot_fields
+        ]
+
     def validate(self, data):
         patient = data.get("patient")
         doctor = data.get("doctor")
@@ -176,3 +197,101 @@ class PatientDoctorMappingSerializer(ModelSerializer):
             )
 
         return data
+
+
+# The `DoctorScheduleSerializer` class validates a doctor's weekly working-hours window; the doctor
+# comes from the URL.
+class DoctorScheduleSerializer(MeasuredSerializerMixin, ModelSerializer):
+
+    class Meta:
+        model = DoctorSchedule
+        fields = "__all__"
+        read_only_fields = ("doctor", "created_at", "updated_at")
+
+    def validate(self, data):
+        start = data.get("start_time", getattr(self.instance, "start_time", None))
+        end = data.get("end_time", getattr(self.instance, "end_time", None))
+        slot_minutes = data.get("slot_minutes", getattr(self.instance, "slot_minutes", 30))
+
+        if start and end and end <= start:
+            raise ValidationError({"end_time": "End time must be after start time."})
+        if slot_minutes <= 0:
+            raise ValidationError({"slot_minutes": "Slot length must be positive."})
+        if start and end:
+            window = (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
+            if slot_minutes > window:
+                raise ValidationError(
+                    {"slot_minutes": "Slot length cannot exceed the working window."}
+                )
+        return data
+
+
+# The `AvailabilityQuerySerializer` class parses the date range and limits of availability lookups.
+class AvailabilityQuerySerializer(Serializer):
+
+    start = DateField(required=False)
+    end = DateField(required=False)
+    specialization = CharField(required=False)
+    limit = IntegerField(required=False, min_value=1, max_value=100, default=10)
+
+    def validate(self, data):
+        start = data.get("start") or date.today()
+        end = data.get("end") or start + timedelta(days=6)
+        if end < start:
+            raise ValidationError({"end": "End date cannot be before start date."})
+        max_days = getattr(settings, "AVAILABILITY_MAX_DAYS", 31)
+        if (end - start).days >= max_days:
+            raise ValidationError(
+                {"end": f"Availability can be queried for at most {max_days} days."}
+            )
+        data["start"], data["end"] = start, end
+        return data
+
+
+# The `AppointmentRangeSerializer` class parses the optional appointment date range of mapping
+# lists and exports.
+class AppointmentRangeSerializer(Serializer):
+
+    date_from = DateField(required=False)
+    date_to = DateField(required=False)
+
+    def validate(self, data):
+        if data.get("date_from") and data.get("date_to") and data["date_to"] < data["date_from"]:
+            raise ValidationError({"date_to": "End date cannot be before start date."})
+        return data
+
+
+# The `SearchQuerySerializer` class parses the query string of the search endpoints.
+class SearchQuerySerializer(Serializer):
+
+    q = CharField(max_length=100)
+    type = ChoiceField(choices=["doctor", "patient"], default="doctor")
+    limit = IntegerField(required=False, min_value=1, max_value=50, default=10)
+
+
+# The `BatchItemSerializer` class describes one sub-request of a batch call.
+class BatchItemSerializer(Serializer):
+
+    id = CharField(required=False, max_length=64)
+    method = ChoiceField(choices=["GET"], default="GET")
+    path = CharField(max_length=2048)
+    headers = DictField(child=CharField(), required=False, default=dict)
+
+    def validate_path(self, value):
+        if not value.startswith("/"):
+            raise ValidationError("Path must be absolute, e.g. /api/patients/.")
+        return value
+
+
+# The `BatchRequestSerializer` class validates a batch call: the sub-requests and whether they share
+# one read transaction.
+class BatchRequestSerializer(Serializer):
+
+    requests = ListField(child=BatchItemSerializer(), allow_empty=False)
+    atomic = BooleanField(default=False)
+
+    def validate_requests(self, value):
+        limit = getattr(settings, "BATCH", {}).get("MAX_REQUESTS", 25)
+        if len(value) > limit:
+            raise ValidationError(f"A batch can hold at most {limit} requests.")
+        return value
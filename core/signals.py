@@ -0,0 +1,50 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .authentication import revoke_tokens
+from .models import Doctor, Patient
+from .search import document_type_for, get_memory_search
+
+
+# Tokens carry the password-derived session, the active flag and the staff flag as trusted claims,
+# so changing any of them revokes the user's outstanding tokens.
+REVOKING_FIELDS = ("password", "is_active", "is_staff")
+
+
+@receiver(pre_save, sender=User)
+def detect_credential_change(sender, instance, raw=False, **kwargs):
+    instance._revoke_tokens = False
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    previous = (
+        User.objects.filter(pk=instance.pk).values(*REVOKING_FIELDS).first()
+    )
+    if previous and any(
+        previous[name] != getattr(instance, name) for name in REVOKING_FIELDS
+    ):
+        instance._revoke_tokens = True
+
+
+@receiver(post_save, sender=User)
+def revoke_on_credential_change(sender, instance, created=False, **kwargs):
+    if getattr(instance, "_revoke_tokens", False):
+        revoke_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_on_delete(sender, instance, **kwargs):
+    # The version row outlives the user, so its tokens stay revoked until they expire.
+    revoke_tokens(instance.pk)
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=Patient)
+def index_document(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_memory_search().document_changed(document_type_for(sender), instance)
+
+
+@receiver(post_delete, sender=Doctor)
+@receiver(post_delete, sender=Patient)
+def unindex_document(sender, instance, **kwargs):
+    get_memory_search().document_changed(document_type_for(sender), instance, deleted=True)
@@ -0,0 +1,17 @@
+from .queue import backoff, claim, complete, enqueue, execute, fail, registry, task
+from .worker import Worker, run_workers
+from . import handlers  # noqa: F401  (registers the project's tasks)
+
+
+__all__ = [
+    "Worker",
+    "backoff",
+    "claim",
+    "complete",
+    "enqueue",
+    "execute",
+    "fail",
+    "registry",
+    "run_workers",
+    "task",
+]
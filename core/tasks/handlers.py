@@ -0,0 +1,76 @@
+import json
+import logging
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import send_mail
+from django.core.serializers.json import DjangoJSONEncoder
+from ..models import PatientDoctorTable
+from .queue import task
+
+
+audit_logger = logging.getLogger("core.audit")
+
+
+@task
+def notify_registered(user_id):
+    user = User.objects.filter(id=user_id).first()
+    if user is None or not user.email:
+        return
+    send_mail(
+        "Welcome",
+        f"Hello {user.first_name or user.username}, your account has been created.",
+        None,
+        [user.email],
+    )
+
+
+@task
+def notify_appointment_booked(mapping_id):
+    mapping = (
+        PatientDoctorTable.objects.select_related("patient", "doctor")
+        .filter(id=mapping_id, is_active=True)
+        .first()
+    )
+    if mapping is None or not mapping.patient.email:
+        return
+    send_mail(
+        "Appointment confirmed",
+        f"{mapping.patient}, your appointment with {mapping.doctor} is on "
+        f"{mapping.appointment_date:%Y-%m-%d} at {mapping.appointment_time:%H:%M}.",
+        None,
+        [mapping.patient.email],
+    )
+
+
+@task
+def record_audit_event(event, **data):
+    """One JSON line per event on the `core.audit` logger, whose handlers fan it out."""
+    audit_logger.info(json.dumps({"event": event, **data}, cls=DjangoJSONEncoder))
+
+
+def audit(event, **data):
+    record_audit_event.enqueue(event=event, **data)
+
+
+@task
+def warm_doctor_directory():
+    """
+    Render the doctor-list pages of `DOCTOR_DIRECTORY_CACHE["WARM_URLS"]` into the directory
+    cache after a doctor write invalidated it, so the first client request is a hit.
+    """
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from ..views import DoctorListCreateView
+
+    view = DoctorListCreateView.as_view()
+    factory = APIRequestFactory()
+    for url in getattr(settings, "DOCTOR_DIRECTORY_CACHE", {}).get("WARM_URLS", []):
+        parts = urlsplit(url)
+        request = factory.get(
+            parts._replace(scheme="", netloc="").geturl(),
+            HTTP_HOST=parts.netloc,
+            secure=parts.scheme == "https",
+        )
+        # The directory is the same for every user; an unsaved one passes the permission check.
+        force_authenticate(request, user=User(username="directory-warmer"))
+        view(request)
@@ -0,0 +1,153 @@
+import random
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from ..models import Task
+
+
+def task_settings():
+    return getattr(settings, "TASKS", {})
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    func: object
+    max_attempts: int
+
+
+# Task name -> `TaskSpec`, filled by the `@task` decorator when the defining module is imported.
+registry = {}
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """
+    Register `func` as a task, under `name` (its dotted path by default). The function gets an
+    `enqueue(**payload)` shortcut; payloads must be JSON-serializable keyword arguments.
+    """
+
+    def register(func):
+        spec = TaskSpec(
+            name or f"{func.__module__}.{func.__name__}",
+            func,
+            max_attempts or task_settings().get("MAX_ATTEMPTS", 5),
+        )
+        registry[spec.name] = spec
+        func.task_name = spec.name
+        func.enqueue = lambda delay=0, unique=False, **payload: enqueue(
+            spec.name, payload, delay=delay, unique=unique
+        )
+        return func
+
+    return register(func) if func is not None else register
+
+
+def enqueue(name, payload=None, delay=0, unique=False):
+    """
+    Queue the task `name`. The row is written inside the caller's transaction, so the task is
+    enqueued exactly when that transaction commits and never for work that is rolled back. With
+    `unique`, an identical task still waiting in the queue absorbs this one.
+    """
+    payload = payload or {}
+    spec = registry.get(name)
+    if unique and Task.objects.filter(name=name, payload=payload, status=Task.QUEUED).exists():
+        return None
+    return Task.objects.create(
+        name=name,
+        payload=payload,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=spec.max_attempts if spec else task_settings().get("MAX_ATTEMPTS", 5),
+    )
+
+
+def due(now):
+    # An expired lease only makes a task claimable again while it has attempts left.
+    return Q(status=Task.QUEUED, run_at__lte=now) | Q(
+        status=Task.RUNNING, locked_until__lt=now, attempts__lt=F("max_attempts")
+    )
+
+
+def expire(now):
+    """Mark failed the tasks whose last attempt lost its lease, e.g. to a crashed worker."""
+    return Task.objects.filter(
+        status=Task.RUNNING, locked_until__lt=now, attempts__gte=F("max_attempts")
+    ).update(
+        status=Task.FAILED,
+        locked_by="",
+        locked_until=None,
+        last_error="The lease of the last attempt expired",
+        updated_at=now,
+    )
+
+
+def claim(worker, limit=1, lease=None):
+    """
+    Claim up to `limit` due tasks for `worker`. Each claim is an UPDATE conditional on the row
+    still being due, so concurrent workers never run the same task and no lock is held while the
+    candidates are read.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=lease or task_settings().get("LEASE_SECONDS", 300))
+    expire(now)
+    candidates = (
+        Task.objects.filter(due(now)).order_by("run_at", "id").values_list("id", flat=True)
+    )
+    claimed = []
+    # Twice the candidates needed, as other workers may win some of them.
+    for task_id in candidates[: limit * 2]:
+        updated = Task.objects.filter(due(now), id=task_id).update(
+            status=Task.RUNNING,
+            locked_by=worker,
+            locked_until=now + lease,
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+        if updated:
+            claimed.append(task_id)
+            if len(claimed) == limit:
+                break
+    return list(Task.objects.filter(id__in=claimed).order_by("run_at", "id"))
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts`: exponential, capped, with jitter."""
+    options = task_settings()
+    delay = min(
+        options.get("BACKOFF_BASE", 2) * 2 ** (attempts - 1), options.get("BACKOFF_MAX", 600)
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def complete(task):
+    # Finished tasks are deleted, which keeps the table (and the due index) small.
+    Task.objects.filter(id=task.id, locked_by=task.locked_by).delete()
+
+
+def fail(task, error):
+    """Schedule a retry of `task`, or mark it failed once it has used up its attempts."""
+    now = timezone.now()
+    changes = {"locked_by": "", "locked_until": None, "last_error": error, "updated_at": now}
+    if task.attempts < task.max_attempts:
+        changes.update(status=Task.QUEUED, run_at=now + timedelta(seconds=backoff(task.attempts)))
+    else:
+        changes.update(status=Task.FAILED)
+    Task.objects.filter(id=task.id, locked_by=task.locked_by).update(**changes)
+
+
+def execute(task):
+    """Run one claimed task; returns whether it succeeded."""
+    spec = registry.get(task.name)
+    if spec is None:
+        task.attempts = task.max_attempts
+        fail(task, f"Unknown task {task.name!r}")
+        return False
+    try:
+        spec.func(**task.payload)
+    except Exception:
+        fail(task, traceback.format_exc(limit=20))
+        return False
+    complete(task)
+    return True
@@ -0,0 +1,110 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from django.db import DatabaseError, connections
+from .queue import claim, execute, task_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def recycle_connections():
+    """
+    `close_old_connections`, minus the connections inside a transaction: a worker run from one
+    (a burst run in a test case, say) must not close the connection under it.
+    """
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+
+
+# The `Worker` class claims due tasks in batches and runs them one after the other until stopped
+# (or, in burst mode, until the queue has nothing due). Database connections are recycled between
+# batches the way request boundaries recycle them, so `CONN_MAX_AGE` and health checks apply.
+class Worker:
+
+    def __init__(self, name=None, batch_size=None, poll_interval=None, lease=None):
+        options = task_settings()
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.batch_size = batch_size or options.get("BATCH_SIZE", 10)
+        self.poll_interval = poll_interval or options.get("POLL_INTERVAL", 1.0)
+        self.lease = lease or options.get("LEASE_SECONDS", 300)
+        self.stopping = threading.Event()
+        self.succeeded = self.failed = self.errors = 0
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run_once(self):
+        """Claim and run one batch; returns how many tasks it ran."""
+        recycle_connections()
+        tasks = claim(self.name, self.batch_size, self.lease)
+        for task in tasks:
+            if execute(task):
+                self.succeeded += 1
+            else:
+                self.failed += 1
+        return len(tasks)
+
+    def run(self, burst=False):
+        while not self.stopping.is_set():
+            try:
+                ran = self.run_once()
+            except DatabaseError:
+                # E.g. the database restarting; the claimed tasks come back when their lease ends.
+                logger.exception("Task worker %s lost the database", self.name)
+                self.errors += 1
+                ran = 0
+            if not ran:
+                if burst:
+                    break
+                self.stopping.wait(self.poll_interval)
+        recycle_connections()
+        return self.succeeded, self.failed
+
+
+def _worker_process(options, burst):
+    # Children started with "spawn" import Django afresh; for "fork" this is a no-op.
+    import django
+
+    django.setup()
+    worker = Worker(**options)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run(burst=burst)
+
+
+def run_workers(processes, burst=False, **options):
+    """
+    Run `processes` worker processes until they are all done (burst mode) or the parent is told to
+    stop, which it passes on to the children; each finishes the task at hand first.
+    """
+    # Forked children must not share the parent's database sockets.
+    connections.close_all()
+    children = [
+        multiprocessing.Process(target=_worker_process, args=(options, burst), daemon=False)
+        for _ in range(processes)
+    ]
+    for child in children:
+        child.start()
+
+    def forward(signum, frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signal.SIGTERM)
+
+    previous = {
+        signum: signal.signal(signum, forward) for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+    try:
+        while any(child.is_alive() for child in children):
+            for child in children:
+                child.join(timeout=0.5)
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+    return [child.exitcode for child in children]
@@ -1,3 +1,2091 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time as time_module
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.db.migrations.executor import MigrationExecutor
+from django.conf import settings
+from django.test import (
+    AsyncClient,
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from benchmarks import codecs, runner
+from benchmarks import search as search_benchmark
+from heaalthcare_project import database as database_settings
+
+from .authentication import token_user, token_versions
+from .cache import DjangoCacheBackend, LRUCache, get_doctor_directory
+from .checks import check_replica_pin_cache
+from . import booking, partitions, routers
+from .archive import archive_batch, archive_cutoffs, archive_horizon, horizon_cache
+from .tasks import Worker, claim, enqueue, task
+from .tasks.handlers import record_audit_event
+from .concurrency import conditional_update
+from .export import PATIENT_EXPORT_COLUMNS
+from .conditional import PreconditionFailed
+from .idempotency import get_idempotency_store
+from .instrumentation import connection_counter, database_metric_lines, registry
+from .models import (
+    ArchivedMapping,
+    Doctor,
+    DoctorSchedule,
+    IdempotencyKey,
+    Patient,
+    PatientDoctorTable,
+    Task,
+)
+from .parsers import FastJSONParser
+from .pagination import PageNumberOrKeysetPagination
+from .query_shaping import get_query_plan
+from .readplans import get_read_plan
+from .renderers import FastJSONRenderer, orjson
+from .search import DOCTOR, PATIENT, DatabaseSearch, MemorySearch, SearchIndex
+from .search import get_memory_search
+from .views import (
+    AsyncReadView,
+    BatchView,
+    DoctorListCreateView,
+    MappingListCreateView,
+    PatientDetailView,
+    PatientListCreateView,
+    read_view,
+)
+from .views.export import ExportView
+from .serializers import (
+    DoctorSerializer,
+    PatientDoctorMappingSerializer,
+    PatientSerializer,
+)
+
+
+def make_user(username="owner"):
+    return User.objects.create_user(
+        username=username, email=f"{username}@example.com", password="s3cret-pass!"
+    )
+
+
+def make_patient(user, index=0):
+    return Patient.objects.create(
+        user=user,
+        first_name=f"Pat{index}",
+        last_name="Ient",
+        date_of_birth=date(1990, 1, 1),
+        gender="other",
+        phone="+15550000000",
+        email=f"patient{index}-{user.username}@example.com",
+        address="1 Main St",
+    )
+
+
+def make_doctor(index=0, **extra):
+    fields = {
+        "first_name": f"Doc{index}",
+        "last_name": f"Tor{index:04d}",
+        "specialization": "cardiology",
+        "phone": "+15551111111",
+        "email": f"doctor{index}@example.com",
+        "license": f"LIC-{index}",
+        "address": "2 Side St",
+    }
+    fields.update(extra)
+    return Doctor.objects.create(**fields)
+
+
+def make_mapping(patient, doctor, day=0, **extra):
+    fields = {
+        "patient": patient,
+        "doctor": doctor,
+        "appointment_date": date.today() + timedelta(days=day),
+        "appointment_time": time(9, 0),
+        "symptoms": "cough",
+        "diagnosis": "cold",
+        "prescription": "rest",
+    }
+    fields.update(extra)
+    return PatientDoctorTable.objects.create(**fields)
+
+
+class APITestBase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        get_doctor_directory().local.clear()
+        token_versions.clear()
+        get_idempotency_store().local.clear()
+        get_memory_search().clear()
+        horizon_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(ctx.captured_queries), response
+
+
+class MappingQueryShapingTests(APITestBase):
+
+    def populate(self, count):
+        patient = make_patient(self.user)
+        for index in range(count):
+            make_mapping(patient, make_doctor(index), day=index)
+        return patient
+
+    def test_plan_joins_rendered_relations_only(self):
+        plan = get_query_plan(PatientDoctorMappingSerializer)
+        self.assertEqual(plan.select_related, ("doctor", "patient"))
+        self.assertEqual(plan.prefetch_related, ())
+
+    def test_mapping_list_query_count_is_constant(self):
+        self.populate(2)
+        small, _ = self.count_queries(reverse("mapping-list"))
+
+        PatientDoctorTable.objects.all().delete()
+        self.populate(10)
+        large, response = self.count_queries(reverse("mapping-list"))
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(response.data["results"][0]["doctor_name"], "Dr. Doc0 Tor0000")
+
+    def test_patient_doctors_query_count_is_constant(self):
+        patient = self.populate(2)
+        url = reverse("patient-doctors", args=[patient.id])
+        small, _ = self.count_queries(url)
+
+        other = make_patient(self.user, index=1)
+        for index in range(2, 14):
+            make_mapping(other, make_doctor(index), day=index)
+        large, response = self.count_queries(
+            reverse("patient-doctors", args=[other.id])
+        )
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data["data"]), 12)
+        self.assertEqual(response.data["data"][0]["patient_name"], "Pat1 Ient")
+
+
+class KeysetPaginationTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        # Duplicate names force the id tie-breaker to decide the order.
+        for index in range(23):
+            make_doctor(index, last_name=f"Tor{index % 4}", first_name="Same")
+        self.expected = list(
+            Doctor.objects.order_by(*Doctor._meta.ordering, "id").values_list("id", flat=True)
+        )
+
+    def walk(self, url, key):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = [row["id"] for row in response.data["results"]]
+            ids = page + ids if key == "previous" else ids + page
+            url = response.data[key]
+        return ids, response
+
+    def test_forward_and_backward_walks_match_ordering(self):
+        forward, last = self.walk(reverse("doctor-list") + "?cursor=&page_size=5", "next")
+        self.assertEqual(forward, self.expected)
+        self.assertNotIn("count", last.data)
+
+        backward, _ = self.walk(last.data["previous"], "previous")
+        self.assertEqual(backward + [row["id"] for row in last.data["results"]], forward)
+
+    def test_count_is_opt_in_and_page_numbers_still_work(self):
+        response = self.client.get(reverse("doctor-list"), {"cursor": "", "count": "true"})
+        self.assertEqual(response.data["count"], 23)
+
+        response = self.client.get(reverse("doctor-list"), {"page": 3})
+        self.assertEqual(response.data["count"], 23)
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]], self.expected[20:]
+        )
+
+    def test_async_page_numbers_break_ties_by_id(self):
+        request = Request(RequestFactory().get("/api/doctors/", {"page": 2}))
+        # The async path runs its queries on this thread, where they can be captured.
+        with CaptureQueriesContext(connection) as ctx:
+            rows = async_to_sync(PageNumberOrKeysetPagination().apaginate_queryset)(
+                Doctor.objects.all(), request
+            )
+        self.assertEqual([row.id for row in rows], self.expected[10:20])
+        page_query = ctx.captured_queries[-1]["sql"]
+        self.assertRegex(page_query, r'ORDER BY .*"core_doctor"\."id" ASC')
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse("doctor-list"), {"cursor": "bogus"})
+        self.assertEqual(response.status_code, 404)
+
+
+class ExplainQueriesCommandTests(TestCase):
+
+    def test_prints_a_plan_for_every_view(self):
+        user = make_user()
+        make_mapping(make_patient(user), make_doctor())
+        out = StringIO()
+        call_command("explain_queries", stdout=out)
+        for label in (
+            "DoctorListCreateView",
+            "PatientListCreateView",
+            "MappingListCreateView",
+            "PatientDoctorsView",
+        ):
+            self.assertIn(label, out.getvalue())
+        if connection.vendor == "sqlite":
+            # PostgreSQL's planner rightly scans a table this small sequentially.
+            self.assertIn("doctor_active_name_idx", out.getvalue())
+
+
+class LRUCacheTests(TestCase):
+
+    def test_evicts_least_recently_used_and_expires(self):
+        now = [0.0]
+        lru = LRUCache(max_entries=2, ttl=10, clock=lambda: now[0])
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("a"), 1)
+
+        now[0] = 11
+        self.assertIsNone(lru.get("a"))
+        self.assertEqual(len(lru), 1)
+
+
+# The test cache is local memory; patched, the directory behaves as on a shared cache (Redis).
+shared_cache = mock.patch.object(
+    DjangoCacheBackend, "shared", new=mock.PropertyMock(return_value=True)
+)
+
+
+@shared_cache
+class DoctorDirectoryCacheTests(APITestBase):
+
+    def test_cached_page_skips_database_and_write_invalidates(self):
+        doctor = make_doctor(1)
+        url = reverse("doctor-list")
+        _, first = self.count_queries(url)
+
+        queries, cached = self.count_queries(url)
+        self.assertEqual(queries, 0)
+        self.assertEqual(cached.data, first.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("doctor-detail", args=[doctor.id]), {"specialization": "oncology"}
+            )
+        self.assertEqual(response.status_code, 200)
+
+        _, fresh = self.count_queries(url)
+        self.assertEqual(fresh.data["results"][0]["specialization"], "oncology")
+
+    def test_deleted_doctor_leaves_directory(self):
+        doctor = make_doctor(1)
+        self.count_queries(reverse("doctor-list"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("doctor-detail", args=[doctor.id]))
+        _, response = self.count_queries(reverse("doctor-list"))
+        self.assertEqual(response.data["results"], [])
+
+
+class BulkImportTests(APITestBase):
+
+    def doctor_row(self, index, **extra):
+        row = {
+            "first_name": f"Bulk{index}",
+            "last_name": "Doctor",
+            "specialization": "dermatology",
+            "phone": "+15552222222",
+            "email": f"bulk{index}@example.com",
+            "license": f"BLK-{index}",
+            "address": "3 Bulk Rd",
+        }
+        row.update(extra)
+        return row
+
+    def test_json_array_reports_per_row_errors(self):
+        make_doctor(99, email="taken@example.com")
+        rows = [self.doctor_row(index) for index in range(6)]
+        rows[1]["email"] = "taken@example.com"
+        rows[2]["phone"] = "nope"
+        rows[4]["email"] = rows[3]["email"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse("doctor-bulk") + "?batch_size=50", rows, format="json"
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+        report = response.data["data"]
+        self.assertEqual(report["created"], 3)
+        self.assertEqual([error["row"] for error in report["errors"]], [2, 1, 4])
+        self.assertEqual(Doctor.objects.filter(last_name="Doctor").count(), 3)
+        # One email lookup and one INSERT, plus the transaction savepoints.
+        self.assertLessEqual(len(ctx.captured_queries), 6)
+
+    def test_ndjson_stream_creates_patients_for_current_user(self):
+        other = make_user("other")
+        lines = []
+        for index in range(3):
+            lines.append(
+                json.dumps(
+                    {
+                        "user": other.id,
+                        "first_name": f"Nd{index}",
+                        "last_name": "Json",
+                        "date_of_birth": "1980-05-05",
+                        "gender": "female",
+                        "phone": "+15553333333",
+                        "email": f"nd{index}@example.com",
+                        "address": "4 Stream Ave",
+                    }
+                )
+            )
+        lines.insert(1, "{not json")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.generic(
+                "POST",
+                reverse("patient-bulk") + "?batch_size=2",
+                "\n".join(lines).encode(),
+                content_type="application/x-ndjson",
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+        # Per batch: one email lookup and one INSERT, plus the savepoints; no per-row user lookup.
+        self.assertFalse(
+            [query for query in ctx.captured_queries if '"auth_user"' in query["sql"]]
+        )
+        self.assertLessEqual(len(ctx.captured_queries), 10)
+        self.assertEqual(response.data["data"]["created"], 3)
+        self.assertEqual(response.data["data"]["errors"][0]["row"], 1)
+        self.assertEqual(Patient.objects.filter(user=self.user).count(), 3)
+
+
+class ExportTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        patient = make_patient(self.user)
+        for index in range(3):
+            make_mapping(patient, make_doctor(index), day=index)
+        make_patient(make_user("other"), index=5)
+
+    def test_patients_stream_as_csv(self):
+        response = self.client.get(reverse("patient-export"), {"format": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(body.splitlines()))
+        self.assertEqual(rows[0][:3], ["id", "first_name", "last_name"])
+        self.assertEqual(len(rows), 2)
+
+    def test_export_views_default_to_their_queryset(self):
+        view = ExportView.as_view(
+            queryset=Patient.objects.order_by("id"), columns=PATIENT_EXPORT_COLUMNS
+        )
+        request = APIRequestFactory().get("/", {"format": "ndjson"})
+        force_authenticate(request, self.user)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 2)
+
+    def test_mappings_stream_as_gzipped_ndjson(self):
+        response = self.client.get(
+            reverse("mapping-export"),
+            {"format": "ndjson"},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(response.streaming_content)).decode()
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["doctor_last_name"], "Tor0000")
+        self.assertEqual(rows[0]["appointment_time"], "09:00:00")
+
+    def test_gzip_refused_with_zero_quality_is_not_used(self):
+        for header in ("gzip;q=0", "br, gzip; q=0.0", "*;q=0", "identity, *;q=0.5, gzip;q=0"):
+            response = self.client.get(
+                reverse("mapping-export"), {"format": "ndjson"}, HTTP_ACCEPT_ENCODING=header
+            )
+            self.assertFalse(response.has_header("Content-Encoding"), header)
+        response = self.client.get(
+            reverse("mapping-export"), {"format": "ndjson"}, HTTP_ACCEPT_ENCODING="br, *;q=0.1"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+
+def next_weekday(weekday):
+    today = date.today()
+    return today + timedelta(days=(weekday - today.weekday() - 1) % 7 + 1)
+
+
+class AvailabilityTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.monday = next_weekday(0)
+        self.early = make_doctor(1, specialization="neurology")
+        self.late = make_doctor(2, specialization="neurology")
+        for doctor, start in ((self.early, time(9, 0)), (self.late, time(10, 0))):
+            DoctorSchedule.objects.create(
+                doctor=doctor,
+                weekday=0,
+                start_time=start,
+                end_time=time(11, 0),
+                slot_minutes=30,
+            )
+
+    def test_booked_slots_are_excluded(self):
+        patient = make_patient(self.user)
+        make_mapping(
+            patient,
+            self.early,
+            appointment_date=self.monday,
+            appointment_time=time(9, 30),
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                reverse("doctor-availability", args=[self.early.id]),
+                {"start": self.monday, "end": self.monday},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [slot["time"] for slot in response.data["data"]],
+            ["09:00:00", "10:00:00", "10:30:00"],
+        )
+        # Doctor lookup, schedules and bookings, independent of the number of slots.
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_search_merges_doctors_in_time_order(self):
+        response = self.client.get(
+            reverse("availability-search"),
+            {
+                "specialization": "Neurology",
+                "start": self.monday,
+                "end": self.monday,
+                "limit": 4,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(slot["doctor"], slot["time"]) for slot in response.data["data"]],
+            [
+                (self.early.id, "09:00:00"),
+                (self.early.id, "09:30:00"),
+                (self.early.id, "10:00:00"),
+                (self.late.id, "10:00:00"),
+            ],
+        )
+
+    def test_search_requires_specialization(self):
+        response = self.client.get(reverse("availability-search"))
+        self.assertEqual(response.status_code, 400)
+
+
+class BookingConflictTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.monday = next_weekday(0)
+        self.doctor = make_doctor(1)
+        DoctorSchedule.objects.create(
+            doctor=self.doctor,
+            weekday=0,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            slot_minutes=30,
+        )
+
+    def book(self, patient):
+        return self.client.post(
+            reverse("mapping-list"),
+            {
+                "patient": patient.id,
+                "doctor": self.doctor.id,
+                "appointment_date": self.monday.isoformat(),
+                "appointment_time": "09:00",
+                "symptoms": "fever",
+                "diagnosis": "flu",
+                "prescription": "fluids",
+            },
+            format="json",
+        )
+
+    def test_taken_slot_is_a_conflict_with_alternatives(self):
+        self.assertEqual(self.book(make_patient(self.user, 1)).status_code, 201)
+
+        response = self.book(make_patient(self.user, 2))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.data["alternatives"],
+            [
+                {
+                    "doctor": self.doctor.id,
+                    "date": self.monday.isoformat(),
+                    "time": "09:30:00",
+                    "duration_minutes": 30,
+                }
+            ],
+        )
+
+
+def _sqlite_read_uncommitted(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        connection.cursor().execute("PRAGMA read_uncommitted = 1")
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+
+    threads = 8
+
+    def setUp(self):
+        # The SQLite test database is a shared-cache in-memory database, whose table locks fail
+        # readers immediately instead of waiting; let the request threads read past the writer.
+        connection_created.connect(_sqlite_read_uncommitted)
+        self.addCleanup(connection_created.disconnect, _sqlite_read_uncommitted)
+
+    def test_parallel_requests_book_a_slot_once(self):
+        user = make_user()
+        doctor = make_doctor(1)
+        patients = [make_patient(user, index) for index in range(self.threads)]
+        day = (date.today() + timedelta(days=3)).isoformat()
+        barrier = threading.Barrier(self.threads)
+        statuses = []
+        checks = []
+        slot_taken = booking._slot_taken
+
+        def record_check(*args):
+            taken = slot_taken(*args)
+            checks.append(taken)
+            if not taken:
+                # Widen the window between the check and the INSERT the lock has to cover.
+                time_module.sleep(0.05)
+            return taken
+
+        def book(patient):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                response = client.post(
+                    reverse("mapping-list"),
+                    {
+                        "patient": patient.id,
+                        "doctor": doctor.id,
+                        "appointment_date": day,
+                        "appointment_time": "11:00",
+                        "symptoms": "fever",
+                        "diagnosis": "flu",
+                        "prescription": "fluids",
+                    },
+                    format="json",
+                )
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=book, args=(patient,)) for patient in patients
+        ]
+        with mock.patch.object(booking, "_slot_taken", side_effect=record_check):
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        # Every loser saw the winner's row in its locked check, so none reached the INSERT and
+        # the unique constraint; a constraint hit would add a second check for that request.
+        self.assertEqual(sorted(checks), [False] + [True] * (self.threads - 1))
+        self.assertEqual(sorted(statuses), [201] + [409] * (self.threads - 1))
+        self.assertEqual(
+            PatientDoctorTable.objects.filter(doctor=doctor, is_active=True).count(), 1
+        )
+
+
+@override_settings(
+    MIDDLEWARE=["core.instrumentation.QueryMetricsMiddleware"] + settings.MIDDLEWARE,
+    CORE_METRICS={"SCRAPE_TOKEN": "scrape"},
+)
+class InstrumentationTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def test_server_timing_and_prometheus_output(self):
+        patient = make_patient(self.user)
+        make_mapping(patient, make_doctor())
+        response = self.client.get(reverse("mapping-list"))
+        timing = response["Server-Timing"]
+        self.assertIn('desc="2 queries"', timing)
+        self.assertIn("serializer;dur=", timing)
+
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape"
+        )
+        body = response.content.decode()
+        self.assertIn(
+            'core_http_requests_total{view="mapping-list",method="GET",status="200"} 1',
+            body,
+        )
+        self.assertIn(
+            'core_db_queries{view="mapping-list",method="GET",quantile="0.99"} 2', body
+        )
+        self.assertIn(
+            'core_response_size_bytes_count{view="mapping-list",method="GET"} 1', body
+        )
+
+    async def test_async_views_count_the_queries_of_their_orm_threads(self):
+        login = await sync_to_async(APIClient().post)(
+            reverse("token_obtain_pair"),
+            {"username": "owner", "password": "s3cret-pass!"},
+            format="json",
+        )
+        await sync_to_async(make_mapping)(
+            await sync_to_async(make_patient)(self.user), await sync_to_async(make_doctor)()
+        )
+        with override_settings(ROOT_URLCONF=AsyncURLs):
+            response = await AsyncClient().get(
+                "/api/mappings/", headers={"authorization": f"Bearer {login.data['access']}"}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9][0-9]* queries"')
+
+
+POSTGRES_ENV = {
+    "DB_NAME": "healthcare",
+    "DB_USER": "app",
+    "DB_PASSWORD": "secret",
+    "DB_HOST": "db",
+    "DB_PORT": "5432",
+}
+
+
+class DatabaseSettingsTests(TestCase):
+
+    def build(self, **env):
+        with mock.patch.dict(os.environ, env, clear=True):
+            return database_settings.build_databases(Path("/srv"))["default"]
+
+    def test_sqlite_fallback_keeps_persistent_connections(self):
+        database = self.build(DB_NAME="healthcare")
+        self.assertEqual(database["ENGINE"], "django.db.backends.sqlite3")
+        self.assertEqual(database["NAME"], Path("/srv/db.sqlite3"))
+        self.assertEqual(database["CONN_MAX_AGE"], 60)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+
+    def test_postgres_persistent_connections(self):
+        database = self.build(**POSTGRES_ENV, DB_CONN_MAX_AGE="300", DB_CONN_HEALTH_CHECKS="false")
+        self.assertEqual(database["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual(database["HOST"], "db")
+        self.assertEqual(database["CONN_MAX_AGE"], 300)
+        self.assertFalse(database["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("pool", database["OPTIONS"])
+
+    def test_asgi_defaults_to_per_request_connections(self):
+        database = self.build(**POSTGRES_ENV, ASYNC_VIEWS="true")
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+
+        with self.assertWarns(RuntimeWarning):
+            database = self.build(**POSTGRES_ENV, ASYNC_VIEWS="true", DB_CONN_MAX_AGE="60")
+        self.assertEqual(database["CONN_MAX_AGE"], 60)
+
+    def test_pool_replaces_persistent_connections(self):
+        with mock.patch.object(database_settings, "find_spec", return_value=object()):
+            database = self.build(**POSTGRES_ENV, DB_POOL="true", DB_POOL_MAX_SIZE="32")
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+        self.assertEqual(database["OPTIONS"]["pool"]["max_size"], 32)
+        self.assertEqual(database["OPTIONS"]["pool"]["timeout"], 10.0)
+
+    def test_pool_without_psycopg_pool_warns_and_falls_back(self):
+        with mock.patch.object(database_settings, "find_spec", return_value=None):
+            with self.assertWarns(RuntimeWarning):
+                database = self.build(**POSTGRES_ENV, DB_POOL="true")
+        self.assertEqual(database["CONN_MAX_AGE"], 60)
+        self.assertNotIn("pool", database["OPTIONS"])
+
+    def test_replicas_become_mirrored_aliases(self):
+        with mock.patch.dict(os.environ, {"DB_REPLICAS": "a.sqlite3, b.sqlite3"}, clear=True):
+            databases = database_settings.build_databases(Path("/srv"))
+        self.assertEqual(list(databases), ["default", "replica_1", "replica_2"])
+        self.assertEqual(databases["replica_2"]["NAME"], Path("/srv/b.sqlite3"))
+        self.assertEqual(databases["replica_1"]["TEST"], {"MIRROR": "default"})
+
+        with mock.patch.dict(os.environ, {**POSTGRES_ENV, "DB_REPLICAS": "db-ro"}, clear=True):
+            databases = database_settings.build_databases(Path("/srv"))
+        self.assertEqual(databases["replica_1"]["HOST"], "db-ro")
+        self.assertEqual(databases["replica_1"]["NAME"], "healthcare")
+
+
+@override_settings(CORE_METRICS={"SCRAPE_TOKEN": "scrape"})
+class ConnectionMetricsTests(APITestBase):
+
+    def test_metrics_report_opened_connections(self):
+        connection_counter.reset()
+        connection_created.send(sender=type(connection), connection=connection)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape")
+        self.assertIn(
+            'core_db_connections_opened_total{alias="default"} 1', response.content.decode()
+        )
+
+    def test_pool_saturation_metrics(self):
+        stats = {"pool_min": 2, "pool_max": 4, "pool_size": 4, "pool_available": 1}
+        stats.update(requests_waiting=3, requests_queued=7, requests_errors=1)
+        with mock.patch("core.instrumentation.pool_stats", return_value=stats):
+            lines = database_metric_lines()
+        self.assertIn('core_db_in_use{alias="default"} 3', lines)
+        self.assertIn('core_db_requests_waiting{alias="default"} 3', lines)
+        self.assertIn('core_db_pool_requests_queued_total{alias="default"} 7', lines)
+        self.assertIn('core_db_pool_connections_lost_total{alias="default"} 0', lines)
+
+
+class BenchmarkBaselineTests(TestCase):
+
+    def test_compare_flags_latency_and_throughput_regressions(self):
+        baseline = runner.summarize("list_doctors", [0.002] * 100, 0, 0.2)
+        slower = runner.summarize("list_doctors", [0.004] * 100, 0, 0.4)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            runner.save_baseline(path, [baseline])
+            self.assertEqual(runner.compare([baseline], path, 0.25), [])
+            self.assertEqual(len(runner.compare([slower], path, 0.25)), 2)
+
+
+class PatientDoctorsSingleQueryTests(APITestBase):
+
+    def get(self, patient_id):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("patient-doctors", args=[patient_id]))
+        self.assertEqual(len(ctx.captured_queries), 1)
+        return response
+
+    def test_lists_mappings_like_the_serializer(self):
+        patient = make_patient(self.user)
+        for index in range(3):
+            make_mapping(patient, make_doctor(index), day=3 - index)
+
+        response = self.get(patient.id)
+        self.assertEqual(response.status_code, 200)
+        expected = PatientDoctorMappingSerializer(
+            PatientDoctorTable.objects.filter(patient=patient).order_by(
+                "appointment_date", "id"
+            ),
+            many=True,
+        ).data
+        self.assertEqual(response.data["data"], expected)
+
+    def test_empty_forbidden_and_missing(self):
+        patient = make_patient(self.user)
+        response = self.get(patient.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["message"], "No doctors assigned to this patient")
+        self.assertEqual(response.data["data"], [])
+
+        stranger = make_patient(make_user("stranger"), index=9)
+        make_mapping(stranger, make_doctor())
+        self.assertEqual(self.get(stranger.id).status_code, 403)
+
+        self.assertEqual(self.get(stranger.id + 100).status_code, 404)
+
+
+class CachedJWTAuthenticationTests(APITestBase):
+
+    def login(self):
+        response = APIClient().post(
+            reverse("token_obtain_pair"),
+            {"username": "owner", "password": "s3cret-pass!"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def get(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse("patient-list"))
+        return response, [query["sql"] for query in ctx.captured_queries]
+
+    def test_user_row_is_not_loaded(self):
+        make_patient(self.user)
+        access = self.login()["access"]
+        token_versions.clear()
+
+        response, queries = self.get(access)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertFalse(any('"auth_user"' in sql for sql in queries))
+        self.assertEqual(len(queries), 3)  # token version, count, page
+
+        response, queries = self.get(access)
+        self.assertEqual(len(queries), 2)
+
+    def test_password_change_revokes_tokens(self):
+        tokens = self.login()
+        self.assertEqual(self.get(tokens["access"])[0].status_code, 200)
+
+        self.user.set_password("an0ther-pass!")
+        self.user.save()
+
+        self.assertEqual(self.get(tokens["access"])[0].status_code, 401)
+        response = APIClient().post(
+            reverse("token_refresh"), {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_deactivation_revokes_tokens(self):
+        access = self.login()["access"]
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(access)[0].status_code, 401)
+
+    def test_deleting_the_user_revokes_tokens(self):
+        access = self.login()["access"]
+        self.assertEqual(self.get(access)[0].status_code, 200)
+        self.user.delete()
+        self.assertEqual(self.get(access)[0].status_code, 401)
+
+    def test_token_users_are_read_only(self):
+        make_patient(self.user)
+        user = token_user({"user_id": str(self.user.pk), "username": "owner"})
+        self.assertEqual(Patient.objects.filter(user=user).count(), 1)
+        with self.assertRaises(TypeError):
+            user.save()
+        with self.assertRaises(TypeError):
+            user.delete()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("s3cret-pass!"))
+
+
+class FastJSONTests(TestCase):
+
+    payload = {
+        "status": "success",
+        "data": [
+            {
+                "when": datetime(2025, 3, 1, 9, 30, 0, 250000, tzinfo=dt_timezone.utc),
+                "naive": datetime(2025, 3, 1, 9, 30),
+                "day": date(2025, 3, 1),
+                "at": time(9, 30, 15),
+                "fee": Decimal("12.50"),
+                "ref": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+                "label": gettext_lazy("Patient"),
+                "note": "line\u2028separator \u00e9",
+                7: None,
+            }
+        ],
+    }
+
+    def test_render_matches_json_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload)
+        )
+        rendered = codecs.mapping_payload(20)
+        self.assertEqual(
+            FastJSONRenderer().render(rendered), JSONRenderer().render(rendered)
+        )
+
+    def test_floats_differ_from_json_renderer(self):
+        if orjson is None:
+            self.skipTest("orjson is not installed")
+        data = {"big": 1e16, "small": 1e-7}
+        rendered = FastJSONRenderer().render(data)
+        self.assertEqual(rendered, b'{"big":1e16,"small":1e-7}')
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(data)))
+
+        data = {"score": float("nan"), "limit": float("inf")}
+        self.assertEqual(FastJSONRenderer().render(data), b'{"score":null,"limit":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+    def test_indent_uses_json_renderer(self):
+        context = {"indent": 2}
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload, renderer_context=context),
+            JSONRenderer().render(self.payload, renderer_context=context),
+        )
+
+    def test_parse_matches_json_parser(self):
+        body = JSONRenderer().render(codecs.mapping_payload(5))
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body))
+        )
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"a": NaN}'))
+
+
+class ReadPlanTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        patient = make_patient(self.user)
+        patient.medical_history = "Asthma \u2028 since 2001"
+        patient.save()
+        make_patient(self.user, index=1)
+        for index in range(3):
+            make_mapping(patient, make_doctor(index), day=index, appointment_time=time(9, 30))
+
+    def assert_same_bytes(self, serializer_class, queryset):
+        plan = get_read_plan(serializer_class)
+        self.assertIsNotNone(plan)
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(JSONRenderer().render(plan.render(plan.values(queryset))), expected)
+
+    def test_plans_match_serializers(self):
+        self.assert_same_bytes(PatientSerializer, Patient.objects.all())
+        self.assert_same_bytes(DoctorSerializer, Doctor.objects.all())
+        self.assert_same_bytes(PatientDoctorMappingSerializer, PatientDoctorTable.objects.all())
+
+    def test_list_endpoints_use_plans(self):
+        for name, serializer_class, queryset in (
+            ("patient-list", PatientSerializer, Patient.objects.all()),
+            ("doctor-list", DoctorSerializer, Doctor.objects.filter(is_active=True)),
+            ("mapping-list", PatientDoctorMappingSerializer, PatientDoctorTable.objects.all()),
+        ):
+            expected = serializer_class(queryset, many=True).data
+            for params in ({}, {"cursor": ""}):
+                response = self.client.get(reverse(name), params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["results"], expected)
+
+
+class SparseFieldsTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.patient = make_patient(self.user)
+        self.doctor = make_doctor()
+        make_doctor(1)
+        self.mapping = make_mapping(self.patient, self.doctor)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        sql = " ".join(query["sql"] for query in ctx.captured_queries)
+        return response, sql
+
+    def test_list_fields_project_columns(self):
+        response, sql = self.get(reverse("doctor-list"), fields="id,first_name,specialization")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [list(row) for row in response.data["results"]],
+            [["id", "first_name", "specialization"]] * 2,
+        )
+        self.assertNotIn('"address"', sql)
+
+        response, sql = self.get(reverse("patient-list"), exclude="medical_history,address")
+        row = response.data["results"][0]
+        self.assertNotIn("medical_history", row)
+        self.assertIn("email", row)
+        self.assertNotIn('"medical_history"', sql)
+
+    def test_keyset_pages_with_sparse_fields(self):
+        response, _ = self.get(
+            reverse("doctor-list"), fields="specialization", cursor="", page_size=1
+        )
+        self.assertEqual(response.data["results"], [{"specialization": "cardiology"}])
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+    def test_detail_defers_unrequested_columns(self):
+        response, sql = self.get(
+            reverse("mapping-detail", args=[self.mapping.id]),
+            fields="id,doctor_name,appointment_date",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["data"],
+            {
+                "id": self.mapping.id,
+                "doctor_name": str(self.doctor),
+                "appointment_date": self.mapping.appointment_date.isoformat(),
+            },
+        )
+        self.assertNotIn('"symptoms"', sql)
+
+        response, sql = self.get(
+            reverse("patient-detail", args=[self.patient.id]), exclude="medical_history"
+        )
+        self.assertNotIn("medical_history", response.data["data"])
+        self.assertNotIn('"medical_history"', sql)
+
+    def test_unrequested_relations_and_text_columns_stay_in_the_database(self):
+        text_columns = ('"symptoms"', '"diagnosis"', '"prescription"', '"medical_history"')
+        url = reverse("mapping-detail", args=[self.mapping.id])
+        response, sql = self.get(url, fields="id,appointment_date")
+        self.assertEqual(response.status_code, 200)
+        for column in text_columns + ('"address"', '"core_doctor"'):
+            self.assertNotIn(column, sql)
+
+        response, sql = self.get(url, fields="id,patient_name")
+        self.assertEqual(response.data["data"]["patient_name"], str(self.patient))
+        self.assertIn('"core_patient"."first_name"', sql)
+        for column in text_columns + ('"address"', '"core_doctor"'):
+            self.assertNotIn(column, sql)
+
+        url = reverse("patient-doctors", args=[self.patient.id])
+        response, sql = self.get(url, fields="id,appointment_date")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["data"],
+            [
+                {
+                    "id": self.mapping.id,
+                    "appointment_date": self.mapping.appointment_date.isoformat(),
+                }
+            ],
+        )
+        for column in text_columns + ('"core_doctor"',):
+            self.assertNotIn(column, sql)
+
+        response, sql = self.get(url, fields="doctor,doctor_name")
+        self.assertEqual(
+            response.data["data"], [{"doctor": self.doctor.id, "doctor_name": str(self.doctor)}]
+        )
+        for column in text_columns:
+            self.assertNotIn(column, sql)
+
+    def test_unknown_field_is_rejected(self):
+        response, _ = self.get(reverse("mapping-list"), fields="id,secret")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("secret", str(response.data["fields"]))
+
+
+class ConditionalGetTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.patient = make_patient(self.user)
+        self.doctor = make_doctor()
+        self.mapping = make_mapping(self.patient, self.doctor)
+
+    def revalidate(self, url, etag, expected_queries):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(ctx.captured_queries), expected_queries)
+        return response
+
+    def test_list_not_modified_until_a_rendered_row_changes(self):
+        url = reverse("mapping-list")
+        queries, response = self.count_queries(url)
+        self.assertEqual(queries, 2)  # validators (with the page count), page
+        etag = response["ETag"]
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        response = self.revalidate(url, etag, 1)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        self.doctor.first_name = "Renamed"
+        self.doctor.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        self.mapping.delete()
+        make_mapping(self.patient, make_doctor(1))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deleting_an_older_row_is_not_answered_304(self):
+        make_mapping(self.patient, make_doctor(1), day=1)
+        url = reverse("mapping-list")
+        etag = self.client.get(url)["ETag"]
+        since = http_date(time_module.time() + 60)
+        self.mapping.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
+        # Without a list Last-Modified, If-Modified-Since alone never produces a 304.
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+    def test_sparse_detail_reads_its_validators_from_the_row(self):
+        for fields in ("id,appointment_date", "id,patient_name"):
+            url = reverse("mapping-detail", args=[self.mapping.id]) + f"?fields={fields}"
+            queries, response = self.count_queries(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(queries, 1, fields)
+            self.assertEqual(self.revalidate(url, response["ETag"], 1).status_code, 304)
+
+    def test_detail_validators(self):
+        url = reverse("patient-detail", args=[self.patient.id])
+        queries, response = self.count_queries(url)
+        self.assertEqual(queries, 1)
+        etag = response["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertEqual(self.revalidate(url, etag, 1).status_code, 304)
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+        sparse = self.client.get(url, {"fields": "id"})
+        self.assertNotEqual(sparse["ETag"], etag)
+
+        self.patient.phone = "+15552222222"
+        self.patient.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_patient_doctors_and_doctor_directory(self):
+        url = reverse("patient-doctors", args=[self.patient.id])
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.revalidate(url, etag, 1).status_code, 304)
+
+        url = reverse("doctor-list")
+        # The local-memory test cache is per process, so its version counter is not trusted.
+        etag = self.client.get(url)["ETag"]
+        self.assertNotIn("directory", etag)
+        self.assertEqual(self.revalidate(url, etag, 1).status_code, 304)
+
+        with shared_cache:
+            etag = self.client.get(url)["ETag"]
+            self.assertIn("directory", etag)
+            self.assertEqual(self.revalidate(url, etag, 0).status_code, 304)
+        with shared_cache, self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse("doctor-detail", args=[self.doctor.id]),
+                {"address": "3 Other St"},
+                format="json",
+            )
+        with shared_cache:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class OptimisticUpdateTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.patient = make_patient(self.user)
+        self.url = reverse("patient-detail", args=[self.patient.id])
+
+    def patch(self, data, **headers):
+        return self.client.patch(self.url, data, format="json", **headers)
+
+    def test_if_match_chains_and_rejects_stale_etags(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.patch({"address": "5 New St"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        fresh = response["ETag"]
+        self.assertNotEqual(fresh, etag)
+        self.assertEqual(self.client.get(self.url)["ETag"], fresh)
+
+        response = self.patch({"address": "6 Lost St"}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.data["status"], "error")
+        self.assertEqual(response["ETag"], fresh)
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.address, "5 New St")
+
+        self.assertEqual(self.patch({"address": "7 Any St"}, HTTP_IF_MATCH="*").status_code, 200)
+        self.assertEqual(self.patch({"address": "8 Free St"}).status_code, 200)
+
+    def test_conditional_update_loses_race_without_writing(self):
+        stale = Patient.objects.get(pk=self.patient.pk)
+        Patient.objects.filter(pk=self.patient.pk).update(
+            address="Concurrent St", updated_at=stale.updated_at + timedelta(seconds=1)
+        )
+
+        serializer = PatientSerializer(stale, data={"address": "Mine St"}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.assertRaises(PreconditionFailed):
+            conditional_update(serializer, [stale.updated_at])
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.address, "Concurrent St")
+
+
+class IdempotencyTests(APITestBase):
+
+    def post(self, url, data, key, client=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = (client or self.client).post(
+                url, data, format="json", HTTP_IDEMPOTENCY_KEY=key
+            )
+        return response, len(ctx.captured_queries)
+
+    def patient_data(self, index=0, user=None):
+        return {
+            "user": (user or self.user).pk,
+            "first_name": "Idem",
+            "last_name": "Potent",
+            "date_of_birth": "1990-01-01",
+            "gender": "other",
+            "phone": "+15550000000",
+            "email": f"idem{index}@example.com",
+            "address": "1 Main St",
+        }
+
+    def test_retry_replays_without_creating(self):
+        url = reverse("patient-list")
+        first, _ = self.post(url, self.patient_data(), "key-1")
+        self.assertEqual(first.status_code, 201)
+
+        replay, queries = self.post(url, self.patient_data(), "key-1")
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(replay.content, first.content)
+        self.assertEqual(queries, 0)
+        self.assertEqual(Patient.objects.count(), 1)
+
+        get_idempotency_store().local.clear()
+        replay, queries = self.post(url, self.patient_data(), "key-1")
+        self.assertEqual(replay.content, first.content)
+        self.assertEqual(queries, 1)
+
+    def test_key_reuse_and_scopes(self):
+        url = reverse("patient-list")
+        self.post(url, self.patient_data(), "key-2")
+        response, _ = self.post(url, self.patient_data(1), "key-2")
+        self.assertEqual(response.status_code, 422)
+
+        other = APIClient()
+        stranger = make_user("other")
+        other.force_authenticate(stranger)
+        response, _ = self.post(
+            url, self.patient_data(1, user=stranger), "key-2", client=other
+        )
+        self.assertEqual(response.status_code, 201)
+
+        data = {
+            "username": "newbie",
+            "email": "newbie@example.com",
+            "password": "Sup3r-s3cret!",
+            "confirm_password": "Sup3r-s3cret!",
+        }
+        first, _ = self.post(reverse("register"), data, "signup", client=APIClient())
+        replay, _ = self.post(reverse("register"), data, "signup", client=APIClient())
+        self.assertEqual((first.status_code, replay.status_code), (201, 201))
+        self.assertEqual(User.objects.filter(username="newbie").count(), 1)
+
+        # Another anonymous client picking the same key is a different sign-up, not a reuse.
+        data = dict(data, username="second", email="second@example.com")
+        response, _ = self.post(reverse("register"), data, "signup", client=APIClient())
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response)
+
+    def test_abandoned_claim_is_taken_over_after_its_lease(self):
+        url = reverse("patient-list")
+        # A request whose worker was killed mid-flight: claimed, never completed or released.
+        store = get_idempotency_store()
+        scope = f"user:{self.user.pk}"
+        self.assertIsNotNone(store.claim(scope, "crashed", "fingerprint"))
+        response, _ = self.post(url, self.patient_data(), "crashed")
+        self.assertEqual(response.status_code, 409)
+
+        IdempotencyKey.objects.filter(key="crashed").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response, _ = self.post(url, self.patient_data(), "crashed")
+        self.assertEqual(response.status_code, 201)
+        row = IdempotencyKey.objects.get(key="crashed")
+        self.assertEqual(row.status_code, 201)
+        self.assertGreater(row.expires_at, timezone.now() + timedelta(seconds=store.lease))
+
+    def test_late_finishers_leave_the_next_claim_alone(self):
+        store = get_idempotency_store()
+        scope = f"user:{self.user.pk}"
+        late = store.claim(scope, "slow", "fingerprint")
+        IdempotencyKey.objects.filter(key="slow").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        current = store.claim(scope, "slow", "fingerprint")
+        self.assertNotEqual(current, late)
+
+        store.complete(scope, "slow", late, "fingerprint", 201, {"id": "late"})
+        store.release(scope, "slow", late)
+        self.assertTrue(store.get(scope, "slow").pending)
+
+        store.complete(scope, "slow", current, "fingerprint", 201, {"id": "current"})
+        store.local.clear()
+        self.assertEqual(store.get(scope, "slow").body, {"id": "current"})
+
+    def test_purge_removes_expired_keys(self):
+        self.post(reverse("patient-list"), self.patient_data(), "old")
+        self.post(reverse("patient-list"), self.patient_data(1), "new")
+        IdempotencyKey.objects.filter(key="old").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        call_command("purge_idempotency_keys", stdout=StringIO())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
+
+
+class BatchTests(APITestBase):
+
+    def batch(self, requests, client=None, **extra):
+        return (client or self.client).post(
+            reverse("batch"), {"requests": requests, **extra}, format="json"
+        )
+
+    def test_sub_requests_share_the_callers_authentication(self):
+        patient = make_patient(self.user)
+        make_mapping(patient, make_doctor())
+        make_patient(make_user("stranger"), index=5)
+
+        client = APIClient()
+        login = client.post(
+            reverse("token_obtain_pair"),
+            {"username": "owner", "password": "s3cret-pass!"},
+            format="json",
+        )
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+        token_versions.clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.batch(
+                [
+                    {"id": "patients", "path": "/api/patients/"},
+                    {"id": "doctors", "path": f"/api/mappings/patient/{patient.id}/"},
+                    {"id": "directory", "path": "/api/doctors/?fields=id,specialization"},
+                ],
+                client=client,
+                atomic=True,
+            )
+        self.assertEqual(response.status_code, 200)
+        versions = [q for q in ctx.captured_queries if "core_usertokenversion" in q["sql"]]
+        self.assertEqual(len(versions), 1)
+
+        patients, doctors, directory = response.data["responses"]
+        self.assertEqual(
+            [patients["id"], patients["status"], patients["body"]["count"]],
+            ["patients", 200, 1],
+        )
+        self.assertEqual(len(doctors["body"]["data"]), 1)
+        self.assertEqual(list(directory["body"]["results"][0]), ["id", "specialization"])
+        self.assertIn("ETag", directory["headers"])
+
+    def test_conditional_and_rejected_sub_requests(self):
+        make_patient(self.user)
+        etag = self.client.get(reverse("patient-list"))["ETag"]
+        response = self.batch(
+            [
+                {"path": "/api/patients/", "headers": {"If-None-Match": etag}},
+                {"path": "/api/nowhere/"},
+                {"path": "/api/batch/"},
+                {"path": "/api/patients/export/", "headers": {"Accept": "text/csv"}},
+            ]
+        )
+        statuses = [item["status"] for item in response.data["responses"]]
+        self.assertEqual(statuses, [304, 404, 400, 400])
+
+    def test_validation(self):
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(
+            self.batch([{"method": "DELETE", "path": "/api/patients/1/"}]).status_code, 400
+        )
+        anonymous = self.batch([{"path": "/api/patients/"}], client=APIClient())
+        self.assertEqual(anonymous.status_code, 401)
+
+
+class SearchIndexTests(TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex(DOCTOR.weights)
+        rows = [
+            (1, "José", "Smith", "cardiology"),
+            (2, "Anna", "Smithers", "dermatology"),
+            (3, "Carl", "Jones", "cardiology"),
+        ]
+        for doc_id, first, last, specialization in rows:
+            row = {"first_name": first, "last_name": last, "specialization": specialization}
+            self.index.add(doc_id, row, {"id": doc_id, "name": f"Dr. {first} {last}"})
+
+    def ids(self, query, limit=10):
+        return [display["id"] for display, _ in self.index.search(query, limit)]
+
+    def test_prefix_words_are_anded_and_ranked(self):
+        self.assertEqual(self.ids("smith"), [1, 2])  # the whole-word match ranks first
+        self.assertEqual(self.ids("card"), [3, 1])  # same score, ordered by name
+        self.assertEqual(self.ids("jose card"), [1])
+        self.assertEqual(self.ids("smi derm"), [2])
+        self.assertEqual(self.ids("smi neuro"), [])
+        self.assertEqual(self.ids("!!"), [])
+        self.assertEqual(self.ids("card", limit=1), [3])
+
+    def test_update_and_remove(self):
+        self.index.add(
+            3, {"first_name": "Carl", "last_name": "Smythe", "specialization": "neurology"},
+            {"id": 3, "name": "Dr. Carl Smythe"},
+        )
+        self.assertEqual(self.ids("card"), [1])
+        self.index.remove(1)
+        self.index.remove(1)
+        self.assertEqual(self.ids("sm"), [2, 3])
+        self.assertNotIn("jose", self.index.terms)
+        self.assertEqual(len(self.index), 2)
+
+    def test_new_terms_are_sorted_on_first_read(self):
+        self.assertFalse(self.index.terms_sorted)
+        self.index.remove(2)  # bisects the vocabulary before any search
+        self.assertEqual(self.index.terms, sorted(self.index.terms))
+        self.assertNotIn("anna", self.index.terms)
+        self.assertEqual(self.ids("smi"), [1])
+
+    def test_large_ties_pick_the_oldest_documents(self):
+        self.index.max_name_ranked = 1
+        self.assertEqual(self.ids("card"), [3, 1])  # the picked ones still by name
+        self.assertEqual(self.ids("card", limit=1), [1])
+
+    def test_benchmark_runs(self):
+        results = search_benchmark.run(doctors=200, iterations=2, warmup=0)
+        self.assertEqual(results[0].requests, 200)
+        self.assertTrue(all(result.name.startswith("search:") for result in results))
+
+
+class SearchTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        make_doctor(1, first_name="Gregory", last_name="House", specialization="Diagnostics")
+        make_doctor(2, first_name="Lisa", last_name="Cuddy", specialization="Endocrinology")
+        make_doctor(3, first_name="James", last_name="Wilson", specialization="Oncology")
+        make_doctor(4, first_name="Greg", last_name="Gone", is_active=False)
+        self.patient = make_patient(self.user, index=1)
+        make_patient(make_user("stranger"), index=2)
+
+    def search(self, url_name="search", **params):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(hit["type"], hit["name"]) for hit in response.data["data"]]
+
+    def test_memory_backend(self):
+        self.assertEqual(self.search(q="greg"), [("doctor", "Dr. Gregory House")])
+        self.assertEqual(self.search(q="onc JAM"), [("doctor", "Dr. James Wilson")])
+        self.assertEqual(
+            self.search("search-autocomplete", q="pat", type="patient"),
+            [("patient", "Pat1 Ient")],
+        )
+        self.assertEqual(self.search(q="patient2", type="patient"), [])
+
+    @override_settings(SEARCH={"BACKEND": "database"})
+    def test_database_backend(self):
+        self.assertEqual(self.search(q="greg"), [("doctor", "Dr. Gregory House")])
+        self.assertEqual(self.search(q="endo cud"), [("doctor", "Dr. Lisa Cuddy")])
+        self.assertEqual(self.search(q="pat", type="patient"), [("patient", "Pat1 Ient")])
+
+        Doctor.objects.filter(last_name="Cuddy").update(last_name="Cameron")
+        self.assertEqual(self.search(q="cameron"), [("doctor", "Dr. Lisa Cameron")])
+        self.assertEqual(self.search(q="cuddy"), [])
+
+    def test_signals_update_the_index(self):
+        self.assertEqual(self.search(q="house"), [("doctor", "Dr. Gregory House")])
+        with self.captureOnCommitCallbacks(execute=True):
+            doctor = make_doctor(5, first_name="Allison", last_name="Housman")
+            house = Doctor.objects.get(last_name="House")
+            house.is_active = False
+            house.save()
+        self.assertEqual(self.search(q="hous"), [("doctor", "Dr. Allison Housman")])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            doctor.delete()
+        self.assertEqual(self.search(q="hous"), [])
+
+    def test_other_processes_sync_through_the_shared_version(self):
+        memory = MemorySearch(get_memory_search().shared, version_ttl=0)
+        self.assertEqual(len(memory.search(DOCTOR, "gre")), 1)
+
+        # Writes another process made: a rename (no signal here) and a bulk insert.
+        Doctor.objects.filter(last_name="Wilson").update(
+            last_name="Grey", updated_at=timezone.now()
+        )
+        make_doctor(6, first_name="Greta", last_name="Garbo")
+        Doctor.objects.filter(last_name="Cuddy").delete()
+        self.assertEqual(len(memory.search(DOCTOR, "gre")), 1)
+
+        memory.shared.incr(memory.version_key(DOCTOR, None))
+        names = [hit["name"] for hit in memory.search(DOCTOR, "gre")]
+        self.assertEqual(names, ["Dr. Gregory House", "Dr. Greta Garbo", "Dr. James Grey"])
+        self.assertEqual(memory.search(DOCTOR, "cuddy"), [])
+
+    def test_local_memory_versions_fall_back_to_polling(self):
+        memory = MemorySearch(get_memory_search().shared, version_ttl=0, poll_interval=0)
+        self.assertFalse(memory.versions_shared)
+        self.assertEqual(len(memory.search(DOCTOR, "gre")), 1)
+        # Another process's write: its version bump never reaches this local-memory cache.
+        make_doctor(6, first_name="Greta", last_name="Garbo")
+        self.assertEqual(len(memory.search(DOCTOR, "gre")), 2)
+
+    def test_cold_build_does_not_block_other_scopes(self):
+        memory = MemorySearch(get_memory_search().shared)
+        self.assertEqual(len(memory.search(DOCTOR, "gre")), 1)
+        started, release = threading.Event(), threading.Event()
+        build = memory.build
+
+        def slow_build(document_type, scope):
+            if document_type is DOCTOR:
+                return build(document_type, scope)
+            started.set()
+            release.wait(5)
+            # Any built scope will do: this thread must stay off the test database.
+            return memory.scopes.get((DOCTOR.name, None))
+
+        with mock.patch.object(memory, "build", side_effect=slow_build):
+            cold = threading.Thread(target=memory.search, args=(PATIENT, "x", self.user.pk))
+            cold.start()
+            self.assertTrue(started.wait(5))
+            self.assertEqual(len(memory.search(DOCTOR, "gre")), 1)
+            self.assertTrue(cold.is_alive())
+            release.set()
+            cold.join()
+
+    def test_patient_scope(self):
+        memory = MemorySearch(get_memory_search().shared)
+        self.assertEqual(len(memory.search(PATIENT, "ient", scope=self.user.pk)), 1)
+        self.assertEqual(memory.search(PATIENT, "pat1", scope=-1), [])
+
+    def test_validation(self):
+        url = reverse("search")
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {"q": "x", "type": "nurse"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"q": "x", "limit": 500}).status_code, 400)
+        self.assertEqual(APIClient().get(url, {"q": "x"}).status_code, 401)
+
+
+class SQLiteSearchTableTests(TestCase):
+
+    def test_install_repairs_the_fts_triggers(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        from .search.database import install, sqlite_drop_sql
+
+        with connection.cursor() as cursor:
+            cursor.execute(sqlite_drop_sql(DOCTOR)[0])
+        make_doctor(1, first_name="Orphan")
+        install(connection, [DOCTOR])
+        make_doctor(2, first_name="Orphanage")
+        hits = DatabaseSearch().search(DOCTOR, "orph")
+        self.assertEqual(len(hits), 2)
+
+    def test_post_migrate_reinstalls_dropped_fts_triggers(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        from django.core.management.sql import emit_post_migrate_signal
+
+        from .search.database import missing, sqlite_drop_sql
+
+        with connection.cursor() as cursor:
+            for sql in sqlite_drop_sql(DOCTOR)[:3]:
+                cursor.execute(sql)
+        self.assertEqual(missing(connection), [DOCTOR])
+        emit_post_migrate_signal(verbosity=0, interactive=False, db="default")
+        self.assertEqual(missing(connection), [])
+        make_doctor(1, first_name="Orphan")
+        self.assertEqual(len(DatabaseSearch().search(DOCTOR, "orph")), 1)
+
+
+class AsyncURLs:
+    """The read routes served by `AsyncReadView`, as with ASYNC_VIEWS on."""
+
+    urlpatterns = [
+        path(
+            "api/patients/", AsyncReadView.as_view(PatientListCreateView), name="patient-list"
+        ),
+        path(
+            "api/patients/<int:pk>/",
+            AsyncReadView.as_view(PatientDetailView),
+            name="patient-detail",
+        ),
+        path("api/doctors/", AsyncReadView.as_view(DoctorListCreateView), name="doctor-list"),
+        path(
+            "api/mappings/", AsyncReadView.as_view(MappingListCreateView), name="mapping-list"
+        ),
+        path("api/batch/", BatchView.as_view(), name="batch"),
+    ]
+
+
+class AsyncReadViewTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.patients = [make_patient(self.user, index=index) for index in range(12)]
+        make_patient(make_user("stranger"), index=99)
+        for index in range(3):
+            make_mapping(self.patients[0], make_doctor(index), day=index)
+
+    def get_both(self, url, **extra):
+        sync = self.client.get(url, **extra)
+        with override_settings(ROOT_URLCONF=AsyncURLs):
+            asynchronous = self.client.get(url, **extra)
+        return sync, asynchronous
+
+    def test_views_are_async(self):
+        self.assertTrue(AsyncReadView.view_is_async)
+        with override_settings(ASYNC_VIEWS=False):
+            self.assertFalse(hasattr(read_view(PatientListCreateView), "sync_view"))
+        with override_settings(ASYNC_VIEWS=True):
+            self.assertTrue(hasattr(read_view(PatientListCreateView), "sync_view"))
+
+    def test_lists_match_the_sync_views(self):
+        for url in [
+            "/api/patients/",
+            "/api/patients/?page=2",
+            "/api/patients/?cursor=&page_size=2&count=true",
+            "/api/patients/?fields=id,first_name",
+            "/api/doctors/",
+            "/api/doctors/",  # from the directory cache
+            "/api/mappings/?exclude=symptoms",
+        ]:
+            sync, asynchronous = self.get_both(url)
+            self.assertEqual(sync.status_code, 200, url)
+            self.assertEqual(asynchronous.status_code, 200, url)
+            self.assertEqual(json.loads(asynchronous.content), json.loads(sync.content), url)
+            self.assertEqual(asynchronous.get("ETag"), sync.get("ETag"), url)
+
+    def test_list_errors(self):
+        for url in ["/api/patients/?page=9", "/api/patients/?fields=nope"]:
+            sync, asynchronous = self.get_both(url)
+            self.assertEqual(asynchronous.status_code, sync.status_code, url)
+            self.assertIn(sync.status_code, (400, 404))
+        with override_settings(ROOT_URLCONF=AsyncURLs):
+            self.assertEqual(APIClient().get("/api/patients/").status_code, 401)
+
+    def test_detail(self):
+        url = f"/api/patients/{self.patients[1].id}/"
+        sync, asynchronous = self.get_both(url)
+        self.assertEqual(asynchronous.status_code, 200)
+        self.assertEqual(json.loads(asynchronous.content), json.loads(sync.content))
+
+        with override_settings(ROOT_URLCONF=AsyncURLs):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=asynchronous["ETag"])
+            self.assertEqual(cached.status_code, 304)
+            self.assertEqual(self.client.get("/api/patients/999999/").status_code, 404)
+
+            # Writes are handed to the synchronous view.
+            response = self.client.patch(url, {"first_name": "Async"}, format="json")
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(response.data["data"]["first_name"], "Async")
+
+    def test_browsable_api_renders_off_the_event_loop(self):
+        for url in ["/api/patients/", f"/api/patients/{self.patients[1].id}/"]:
+            sync, asynchronous = self.get_both(url, HTTP_ACCEPT="text/html")
+            self.assertEqual(sync.status_code, 200, url)
+            self.assertEqual(asynchronous.status_code, 200, url)
+            self.assertIn(b"<form", asynchronous.content)
+
+    def test_batch_runs_async_routes_synchronously(self):
+        with override_settings(ROOT_URLCONF=AsyncURLs):
+            response = self.client.post(
+                "/api/batch/",
+                {"requests": [{"path": "/api/patients/"}, {"path": "/api/mappings/"}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            [item["body"]["count"] for item in response.data["responses"]], [12, 3]
+        )
+
+
+REPLICAS = {"ALIASES": ["replica_1"], "PIN_SECONDS": 5, "PIN_CACHE": "default"}
+
+
+@override_settings(
+    READ_REPLICAS=REPLICAS,
+    MIDDLEWARE=settings.MIDDLEWARE + ["core.routers.ReplicaRoutingMiddleware"],
+)
+class ReplicaRoutingTests(APITestBase):
+
+    def read_alias(self, user=None):
+        request = RequestFactory().get("/api/doctors/")
+        if user is not None:
+            request.user = user
+        with routers.reading(request):
+            return Doctor.objects.all().db
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.read_alias(self.user), "replica_1")
+        self.assertEqual(self.read_alias(), "replica_1")
+        self.assertEqual(Doctor.objects.all().db, "default")
+
+        request = RequestFactory().get("/api/batch/")
+        with routers.reading(request), routers.primary():
+            self.assertEqual(Doctor.objects.all().db, "default")
+
+    def test_writers_are_pinned_to_primary(self):
+        routers.pin_to_primary(self.user.pk)
+        self.assertEqual(self.read_alias(self.user), "default")
+        self.assertEqual(self.read_alias(make_user("other")), "replica_1")
+
+    def test_local_memory_pin_cache_is_reported(self):
+        self.assertEqual([error.id for error in check_replica_pin_cache(None)], ["core.W001"])
+        with override_settings(READ_REPLICAS={**REPLICAS, "ALIASES": []}):
+            self.assertEqual(check_replica_pin_cache(None), [])
+
+    def test_successful_writes_pin_the_user(self):
+        patient = make_patient(self.user)
+        url = reverse("patient-detail", args=[patient.id])
+        response = self.client.patch(url, {"phone": "bad"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(routers.is_pinned(self.user.pk))
+
+        response = self.client.patch(url, {"address": "5 New St"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(routers.is_pinned(self.user.pk))
+
+        # Pinned, so the read goes to the primary (replica_1 is not configured in tests).
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["address"], "5 New St")
+
+    def test_read_only_posts_do_not_pin_the_user(self):
+        response = self.client.post(
+            reverse("batch"), {"requests": [{"path": "/api/doctors/"}]}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse(routers.is_pinned(self.user.pk))
+
+
+class MappingArchiveTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        patient = make_patient(self.user)
+        self.old = make_mapping(patient, make_doctor(0), day=-400)
+        self.cancelled = make_mapping(patient, make_doctor(1), day=-60, is_active=False)
+        self.recently_cancelled = make_mapping(patient, make_doctor(2), day=-10, is_active=False)
+        self.recent = make_mapping(patient, make_doctor(3), day=-10)
+        self.upcoming = make_mapping(patient, make_doctor(4), day=7)
+
+    def archive(self):
+        out = StringIO()
+        call_command("archive_mappings", batch_size=1, stdout=out)
+        return out.getvalue()
+
+    def list_ids(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("mapping-list"), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        history = any("core_mappinghistory" in query["sql"] for query in ctx.captured_queries)
+        return {row["id"] for row in response.data["results"]}, history
+
+    def test_moves_old_and_inactive_appointments_in_batches(self):
+        self.assertIn("Archived 2 appointment(s) dated before", self.archive())
+        archived = ArchivedMapping.objects.order_by("appointment_date")
+        self.assertEqual([row.id for row in archived], [self.old.id, self.cancelled.id])
+        self.assertEqual(archived[0].created_at, self.old.created_at)
+        self.assertEqual(archived[1].is_active, False)
+        self.assertFalse(
+            PatientDoctorTable.objects.filter(id__in=[self.old.id, self.cancelled.id]).exists()
+        )
+        self.assertIn("Archived 0 appointment(s)", self.archive())
+
+    def test_ranges_read_the_archive_only_when_they_need_it(self):
+        live = {self.recently_cancelled.id, self.recent.id, self.upcoming.id}
+        self.archive()
+        self.assertEqual(self.list_ids(), (live, False))
+
+        since = (date.today() - timedelta(days=30)).isoformat()
+        self.assertEqual(self.list_ids(date_from=since), (live, False))
+
+        since = (date.today() - timedelta(days=500)).isoformat()
+        until = (date.today() - timedelta(days=30)).isoformat()
+        ids, history = self.list_ids(date_from=since)
+        self.assertEqual(ids, live | {self.old.id, self.cancelled.id})
+        self.assertTrue(history)
+        self.assertEqual(
+            self.list_ids(date_from=since, date_to=until), ({self.old.id, self.cancelled.id}, True)
+        )
+
+        response = self.client.get(
+            reverse("mapping-export"), {"format": "ndjson", "date_to": until}
+        )
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.old.id, self.cancelled.id])
+
+    def test_ranges_past_the_cutoffs_do_not_wait_for_the_cached_horizon(self):
+        since = (date.today() - timedelta(days=500)).isoformat()
+        self.assertIsNone(archive_horizon())
+        # Another process archives; this one's cached horizon still says the archive is empty.
+        archive_batch(*archive_cutoffs(), batch_size=10)
+        self.assertIsNone(archive_horizon())
+
+        ids, history = self.list_ids(date_from=since)
+        self.assertIn(self.old.id, ids)
+        self.assertTrue(history)
+
+    def test_invalid_range(self):
+        response = self.client.get(
+            reverse("mapping-list"), {"date_from": "2024-02-01", "date_to": "2024-01-01"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("date_to", response.data)
+
+
+class PartitionTests(TestCase):
+
+    def test_month_partitions(self):
+        months = list(partitions.months(date(2025, 11, 20), date(2026, 2, 3)))
+        self.assertEqual(
+            months, [date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)]
+        )
+        self.assertEqual(partitions.add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(partitions.partition_name(months[1]), "core_patientdoctortable_p2025_12")
+        created = partitions.ensure_partitions(connection, months[0], months[-1])
+        if not partitions.supported(connection):
+            # SQLite keeps the plain table.
+            self.assertEqual(created, 0)
+            return
+        # The migration partitioned the test table from the current month on.
+        self.assertEqual(created, 4)
+        self.assertLessEqual(set(months), set(partitions.partitions(connection)))
+        self.assertEqual(partitions.ensure_partitions(connection, months[0], months[-1]), 0)
+
+    def test_new_months_take_their_rows_from_the_default_partition(self):
+        if not partitions.supported(connection):
+            self.skipTest("PostgreSQL only")
+        user = User.objects.create_user(username="partitioned", password="x")
+        mapping = make_mapping(make_patient(user), make_doctor(), day=365 * 15)
+        month = partitions.month_start(mapping.appointment_date)
+
+        def partition_of(mapping):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT tableoid::regclass::text FROM {partitions.TABLE} WHERE id = %s",
+                    [mapping.id],
+                )
+                return cursor.fetchone()[0]
+
+        self.assertEqual(partition_of(mapping), partitions.DEFAULT_PARTITION)
+        self.assertEqual(partitions.ensure_partitions(connection, month, month), 1)
+        self.assertEqual(partition_of(mapping), partitions.partition_name(month))
+        self.assertEqual(PatientDoctorTable.objects.get(id=mapping.id), mapping)
+
+
+
+class PartitionMigrationTests(TransactionTestCase):
+
+    def relkind(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [partitions.TABLE])
+            return cursor.fetchone()[0]
+
+    def test_partitioning_migrates_both_ways_with_the_rows(self):
+        if not partitions.supported(connection):
+            self.skipTest("PostgreSQL only")
+        patient = make_patient(make_user())
+        old = make_mapping(patient, make_doctor(0), day=-400)
+        recent = make_mapping(patient, make_doctor(1), day=3)
+        archive_batch(*archive_cutoffs(), batch_size=10)
+        self.assertEqual(self.relkind(), "p")
+
+        executor = MigrationExecutor(connection)
+        leaves = executor.loader.graph.leaf_nodes("core")
+        executor.migrate([("core", "0007_search_indexes")])
+        self.assertEqual(self.relkind(), "r")
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id FROM {partitions.TABLE} ORDER BY id")
+            self.assertEqual([row[0] for row in cursor.fetchall()], [old.id, recent.id])
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(leaves)
+        self.assertEqual(self.relkind(), "p")
+        self.assertEqual(
+            list(PatientDoctorTable.objects.order_by("id").values_list("id", flat=True)),
+            [old.id, recent.id],
+        )
+        self.assertGreater(make_mapping(patient, make_doctor(2), day=5).id, recent.id)
+
+
+flaky_calls = []
+
+
+@task(name="tests.flaky", max_attempts=2)
+def flaky(fail):
+    flaky_calls.append(fail)
+    if fail:
+        raise RuntimeError("boom")
+
+
+class TaskQueueTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        flaky_calls.clear()
+
+    def run_worker(self):
+        return Worker(name="test-worker").run(burst=True)
+
+    def test_registration_mail_and_audit_run_off_the_request(self):
+        data = {
+            "username": "newbie",
+            "email": "newbie@example.com",
+            "password": "Sup3r-s3cret!",
+            "confirm_password": "Sup3r-s3cret!",
+        }
+        response = APIClient().post(reverse("register"), data, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Task.objects.count(), 2)
+
+        with self.assertLogs("core.audit") as logs:
+            self.assertEqual(self.run_worker(), (2, 0))
+        self.assertEqual(mail.outbox[0].to, ["newbie@example.com"])
+        self.assertIn('"event": "user.registered"', logs.output[0])
+        self.assertFalse(Task.objects.exists())
+
+    def test_booking_queues_a_confirmation(self):
+        patient = make_patient(self.user)
+        response = self.client.post(
+            reverse("mapping-list"),
+            {
+                "patient": patient.id,
+                "doctor": make_doctor().id,
+                "appointment_date": (date.today() + timedelta(days=3)).isoformat(),
+                "appointment_time": "09:00",
+                "symptoms": "fever",
+                "diagnosis": "flu",
+                "prescription": "fluids",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        with self.assertLogs("core.audit"):
+            self.run_worker()
+        self.assertEqual(mail.outbox[0].subject, "Appointment confirmed")
+        self.assertEqual(mail.outbox[0].to, [patient.email])
+
+    def test_booking_and_its_tasks_commit_together(self):
+        patient = make_patient(self.user)
+        data = {
+            "patient": patient.id,
+            "doctor": make_doctor().id,
+            "appointment_date": (date.today() + timedelta(days=3)).isoformat(),
+            "appointment_time": "09:00",
+            "symptoms": "fever",
+            "diagnosis": "flu",
+            "prescription": "fluids",
+        }
+        with mock.patch.object(
+            record_audit_event, "enqueue", side_effect=RuntimeError("queue down")
+        ):
+            response = self.client.post(reverse("mapping-list"), data, format="json")
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(PatientDoctorTable.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_tasks_of_rolled_back_transactions_are_never_queued(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                flaky.enqueue(fail=False)
+                raise RuntimeError
+        self.assertFalse(Task.objects.exists())
+
+    def test_retries_with_backoff_then_fails(self):
+        queued = flaky.enqueue(fail=True)
+        self.assertEqual(self.run_worker(), (0, 1))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Task.QUEUED, 1))
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn("RuntimeError: boom", queued.last_error)
+
+        # Not due yet.
+        self.assertEqual(self.run_worker(), (0, 0))
+        Task.objects.update(run_at=timezone.now())
+        self.run_worker()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Task.FAILED, 2))
+        self.assertEqual(flaky_calls, [True, True])
+
+    def test_claims_are_exclusive_until_the_lease_expires(self):
+        flaky.enqueue(fail=False)
+        self.assertEqual(len(claim("a")), 1)
+        self.assertEqual(claim("b"), [])
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        [reclaimed] = claim("b")
+        self.assertEqual((reclaimed.locked_by, reclaimed.attempts), ("b", 2))
+
+    def test_expired_last_attempts_fail_instead_of_retrying(self):
+        queued = flaky.enqueue(fail=False)
+        Task.objects.update(max_attempts=1)
+        self.assertEqual(len(claim("a")), 1)
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(claim("b"), [])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Task.FAILED, 1))
+        self.assertIn("lease", queued.last_error)
+
+    def test_unique_and_unknown_tasks(self):
+        self.assertIsNotNone(enqueue("tests.flaky", {"fail": False}, unique=True))
+        self.assertIsNone(enqueue("tests.flaky", {"fail": False}, unique=True))
+        missing = enqueue("tests.missing")
+        self.assertEqual(self.run_worker(), (1, 1))
+        missing.refresh_from_db()
+        self.assertEqual(missing.status, Task.FAILED)
+
+    @override_settings(
+        DOCTOR_DIRECTORY_CACHE={
+            **settings.DOCTOR_DIRECTORY_CACHE,
+            "WARM_URLS": ["http://testserver/api/doctors/"],
+        }
+    )
+    @shared_cache
+    def test_doctor_writes_rewarm_the_directory(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("doctor-list"),
+                {
+                    "first_name": "Ann",
+                    "last_name": "Warm",
+                    "specialization": "cardiology",
+                    "phone": "+15551111111",
+                    "email": "ann@example.com",
+                    "license": "LIC-W",
+                    "address": "2 Side St",
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            list(Task.objects.values_list("name", flat=True)),
+            ["core.tasks.handlers.warm_doctor_directory"],
+        )
+        self.run_worker()
+        _, payload = get_doctor_directory().lookup("http://testserver/api/doctors/")
+        self.assertEqual(payload["results"][0]["last_name"], "Warm")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("doctor-list"))
+        self.assertEqual(response.data["count"], 1)
+
+    def test_worker_command(self):
+        flaky.enqueue(fail=False)
+        out = StringIO()
+        call_command("run_task_worker", "--burst", stdout=out)
+        self.assertIn("Ran 1 task(s), 0 failed.", out.getvalue())
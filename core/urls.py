@@ -9,6 +9,18 @@ from core.views import (
     MappingListCreateView,
     PatientDoctorsView,
     MappingDetailView,
+    DoctorBulkImportView,
+    PatientBulkImportView,
+    PatientExportView,
+    MappingExportView,
+    DoctorScheduleView,
+    DoctorAvailabilityView,
+    AvailabilitySearchView,
+    MetricsView,
+    BatchView,
+    SearchView,
+    AutocompleteView,
+    read_view,
 )
 
 
@@ -18,17 +30,45 @@ urlpatterns = [
     path("auth/login/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     # Patient endpoints
-    path("patients/", PatientListCreateView.as_view(), name="patient-list"),
-    path("patients/<int:pk>/", PatientDetailView.as_view(), name="patient-detail"),
+    path("patients/", read_view(PatientListCreateView), name="patient-list"),
+    path("patients/<int:pk>/", read_view(PatientDetailView), name="patient-detail"),
+    path("patients/bulk/", PatientBulkImportView.as_view(), name="patient-bulk"),
+    path("patients/export/", PatientExportView.as_view(), name="patient-export"),
     # Doctor endpoints
-    path("doctors/", DoctorListCreateView.as_view(), name="doctor-list"),
-    path("doctors/<int:pk>/", DoctorDetailView.as_view(), name="doctor-detail"),
+    path("doctors/", read_view(DoctorListCreateView), name="doctor-list"),
+    path("doctors/<int:pk>/", read_view(DoctorDetailView), name="doctor-detail"),
+    path("doctors/bulk/", DoctorBulkImportView.as_view(), name="doctor-bulk"),
+    path(
+        "doctors/<int:pk>/schedule/",
+        DoctorScheduleView.as_view(),
+        name="doctor-schedule",
+    ),
+    path(
+        "doctors/<int:pk>/availability/",
+        DoctorAvailabilityView.as_view(),
+        name="doctor-availability",
+    ),
+    path(
+        "doctors/availability/",
+        AvailabilitySearchView.as_view(),
+        name="availability-search",
+    ),
     # Mapping endpoints
-    path("mappings/", MappingListCreateView.as_view(), name="mapping-list"),
+    path("mappings/", read_view(MappingListCreateView), name="mapping-list"),
+    path("mappings/export/", MappingExportView.as_view(), name="mapping-export"),
     path(
         "mappings/patient/<int:patient_id>/",
         PatientDoctorsView.as_view(),
         name="patient-doctors",
     ),
     path("mappings/<int:pk>/", MappingDetailView.as_view(), name="mapping-detail"),
+    # Search endpoints
+    path("search/", SearchView.as_view(), name="search"),
+    path(
+        "search/autocomplete/", AutocompleteView.as_view(), name="search-autocomplete"
+    ),
+    # Batch endpoint
+    path("batch/", BatchView.as_view(), name="batch"),
+    # Operations
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
@@ -2,6 +2,13 @@ from .patient import PatientListCreateView, PatientDetailView
 from .doctor import DoctorListCreateView, DoctorDetailView
 from .auth import RegisterView
 from .patient_doctor import MappingListCreateView, MappingDetailView, PatientDoctorsView
+from .bulk import DoctorBulkImportView, PatientBulkImportView
+from .export import PatientExportView, MappingExportView
+from .schedule import DoctorScheduleView, DoctorAvailabilityView, AvailabilitySearchView
+from .metrics import MetricsView
+from .batch import BatchView
+from .search import SearchView, AutocompleteView
+from .asynchronous import AsyncReadView, read_view
 
 
 __all__ = [
@@ -13,4 +20,17 @@ __all__ = [
     DoctorListCreateView,
     DoctorDetailView,
     RegisterView,
+    DoctorBulkImportView,
+    PatientBulkImportView,
+    PatientExportView,
+    MappingExportView,
+    DoctorScheduleView,
+    DoctorAvailabilityView,
+    AvailabilitySearchView,
+    MetricsView,
+    BatchView,
+    SearchView,
+    AutocompleteView,
+    AsyncReadView,
+    read_view,
 ]
@@ -0,0 +1,69 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+
+# The `AsyncReadView` class serves the GETs of a DRF view on the event loop. The wrapped view's
+# `aget` (see `ReadPlanListMixin`, `ConditionalListMixin`, `ConditionalRetrieveMixin`) reads
+# through the async ORM, so under ASGI a request waiting on a slow client or on the database holds
+# no thread. Authentication and permissions run as one `sync_to_async` call since authenticators
+# may query; writes and OPTIONS are handed to the regular view in a thread.
+class AsyncReadView(View):
+
+    view_class = None
+    view_initkwargs = None
+    sync_view = None
+
+    @classonlymethod
+    def as_view(cls, view_class, **initkwargs):
+        sync_view = view_class.as_view(**initkwargs)
+        view = super().as_view(
+            view_class=view_class, view_initkwargs=initkwargs, sync_view=sync_view
+        )
+        # Callers that must stay on their thread (e.g. batched sub-requests) use this one.
+        view.sync_view = sync_view
+        return csrf_exempt(view)
+
+    async def get(self, request, *args, **kwargs):
+        view = self.view_class(**self.view_initkwargs)
+        view.setup(request, *args, **kwargs)
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        view.headers = view.default_response_headers
+        try:
+            await sync_to_async(view.initial)(request, *args, **kwargs)
+            response = await view.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(request, response, *args, **kwargs)
+        if not hasattr(response, "render"):
+            return response
+
+        # Render here rather than leave it to the handler, which would hop to a thread for it.
+        # Other renderers than JSON may query (the browsable API lists related-field choices), so
+        # they render in a thread.
+        if getattr(response.accepted_renderer, "format", None) == "json":
+            response.render()
+        else:
+            await sync_to_async(response.render)()
+        return HttpResponse(
+            response.content, status=response.status_code, headers=response.headers
+        )
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    put = patch = delete = options = post
+
+
+def read_view(view_class, **initkwargs):
+    """
+    The view function routing `view_class`: the `AsyncReadView` adapter when `ASYNC_VIEWS` is on
+    (the default under `asgi.py`), the plain view otherwise.
+    """
+    if getattr(settings, "ASYNC_VIEWS", False):
+        return AsyncReadView.as_view(view_class, **initkwargs)
+    return view_class.as_view(**initkwargs)
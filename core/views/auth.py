@@ -4,11 +4,13 @@ from django.contrib.auth.models import User
 from django.db import transaction
 from ..models import Patient
 from ..serializers import UserSerializer
+from ..tasks.handlers import audit, notify_registered
+from .mixins import IdempotentCreateMixin
 
 from django.core.exceptions import ObjectDoesNotExist
 
 
-class RegisterView(generics.CreateAPIView):
+class RegisterView(IdempotentCreateMixin, generics.CreateAPIView):
 
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
@@ -23,6 +25,7 @@ class RegisterView(generics.CreateAPIView):
         if serializer.is_valid():
             with transaction.atomic():
                 self.perform_create(serializer)
+                self.queue_followups(serializer.instance)
                 headers = self.get_success_headers(serializer.data)
                 return Response(
                     {
@@ -41,3 +44,8 @@ class RegisterView(generics.CreateAPIView):
             },
             status=status.HTTP_400_BAD_REQUEST,
         )
+
+    def queue_followups(self, user):
+        # Committed with the user; a worker sends the mail and the audit event off the request.
+        notify_registered.enqueue(user_id=user.pk)
+        audit("user.registered", user_id=user.pk)
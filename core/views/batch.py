@@ -0,0 +1,36 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from ..batch import execute_batch
+from ..serializers import BatchRequestSerializer
+
+
+# The `BatchView` class runs several GET requests against the API in one call. Sub-requests are
+# dispatched in-process to the routed views with the caller's authentication (done once, here)
+# and their responses are returned together, in order:
+#
+#     POST /api/batch/
+#     {"atomic": true, "requests": [{"id": "me", "path": "/api/patients/?page=1"}, ...]}
+class BatchView(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Invalid batch request",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        responses = execute_batch(
+            request,
+            serializer.validated_data["requests"],
+            atomic=serializer.validated_data["atomic"],
+            batch_view=type(self),
+        )
+        return Response({"status": "success", "responses": responses})
@@ -0,0 +1,93 @@
+from django.conf import settings
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from ..bulk import BulkImporter
+from ..cache import doctor_directory_changed
+from ..parsers import FastJSONParser, NDJSONParser
+from ..search import DOCTOR, PATIENT, get_memory_search
+from ..serializers import DoctorSerializer, PatientSerializer
+
+
+# `BulkImportView` accepts a JSON array or an NDJSON stream of rows and creates them through
+# `BulkImporter`, answering with a per-row error report.
+class BulkImportView(generics.GenericAPIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [FastJSONParser, NDJSONParser]
+    label = "rows"
+
+    def get_batch_size(self):
+        options = getattr(settings, "BULK_IMPORT", {})
+        default = options.get("BATCH_SIZE", 500)
+        try:
+            batch_size = int(self.request.query_params.get("batch_size", default))
+        except ValueError:
+            batch_size = default
+        return max(1, min(batch_size, options.get("MAX_BATCH_SIZE", 5000)))
+
+    def get_defaults(self):
+        return {}
+
+    def post(self, request, *args, **kwargs):
+        rows = request.data
+        if isinstance(rows, (dict, str, bytes)):
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Expected a JSON array or an NDJSON body",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        importer = BulkImporter(
+            self.get_serializer_class(),
+            batch_size=self.get_batch_size(),
+            context=self.get_serializer_context(),
+            defaults=self.get_defaults(),
+        )
+        report = importer.run(rows)
+        if report["created"]:
+            self.imported(report)
+
+        if report["created"]:
+            response_status = status.HTTP_201_CREATED
+        elif report["failed"]:
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(
+            {
+                "status": "success" if not report["failed"] else "error",
+                "message": f"Imported {report['created']} of "
+                f"{report['created'] + report['failed']} {self.label}",
+                "data": report,
+            },
+            status=response_status,
+        )
+
+    def imported(self, report):
+        pass
+
+
+class DoctorBulkImportView(BulkImportView):
+
+    serializer_class = DoctorSerializer
+    label = "doctors"
+
+    def imported(self, report):
+        doctor_directory_changed()
+        # `bulk_create` sends no signals; search indexes pull the new rows on their next sync.
+        get_memory_search().documents_changed(DOCTOR)
+
+
+class PatientBulkImportView(BulkImportView):
+
+    serializer_class = PatientSerializer
+    label = "patients"
+
+    def get_defaults(self):
+        # Like `PatientSerializer.create`, patients always belong to the importing user.
+        return {"user": self.request.user}
+
+    def imported(self, report):
+        get_memory_search().documents_changed(PATIENT, self.request.user.pk)
@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -5,18 +6,100 @@ from django.contrib.auth.models import User
 from django.db import transaction
 from ..models import Doctor
 from ..serializers import DoctorSerializer
+from ..pagination import PageNumberOrKeysetPagination
+from ..conditional import variant
+from .mixins import (
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    OptimisticUpdateMixin,
+    ReadPlanListMixin,
+    SparseFieldsMixin,
+)
+from ..cache import (
+    doctor_directory_changed,
+    doctor_directory_enabled,
+    get_doctor_directory,
+)
+from ..routers import primary
 from django.core.exceptions import ObjectDoesNotExist
 
 
-class DoctorListCreateView(generics.ListCreateAPIView):
+class DoctorListCreateView(
+    ConditionalListMixin,
+    SparseFieldsMixin,
+    ReadPlanListMixin,
+    generics.ListCreateAPIView,
+):
 
     queryset = Doctor.objects.all()
     serializer_class = DoctorSerializer
+    pagination_class = PageNumberOrKeysetPagination
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return Doctor.objects.filter(is_active=True)
 
+    def directory_validates(self):
+        # Every doctor write bumps the directory version, so it validates the list on its own;
+        # unless the counter is per process (local memory), which other workers never see bumped
+        # and which restarts with the process.
+        return doctor_directory_enabled() and get_doctor_directory().versions_shared
+
+    def get_list_etag(self):
+        if not self.directory_validates():
+            return super().get_list_etag()
+        version = get_doctor_directory().get_version()
+        return f'W/"directory-{version:x}-{variant(self.request)}"'
+
+    async def aget_list_etag(self):
+        if not self.directory_validates():
+            return await super().aget_list_etag()
+        # Cache clients are thread-safe, so lookups need not queue for the ORM's thread.
+        version = await sync_to_async(
+            get_doctor_directory().get_version, thread_sensitive=False
+        )()
+        return f'W/"directory-{version:x}-{variant(self.request)}"'
+
+    def list(self, request, *args, **kwargs):
+        if not doctor_directory_enabled():
+            return super().list(request, *args, **kwargs)
+
+        # Pages are keyed on the full URL since it drives pagination and the links in the payload.
+        directory = get_doctor_directory()
+        page = request.build_absolute_uri()
+        version, payload = directory.lookup(page)
+        if payload is not None:
+            return Response(payload)
+
+        # Shared pages are built from the primary, so a lagging replica cannot be cached.
+        with primary():
+            response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            directory.store(version, page, response.data)
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        if not doctor_directory_enabled():
+            return await super().alist(request, *args, **kwargs)
+
+        directory = get_doctor_directory()
+        page = request.build_absolute_uri()
+        version, payload = await sync_to_async(directory.lookup, thread_sensitive=False)(page)
+        if payload is not None:
+            return Response(payload)
+
+        with primary():
+            response = await super().alist(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            await sync_to_async(directory.store, thread_sensitive=False)(
+                version, page, response.data
+            )
+        return response
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        doctor_directory_changed()
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
@@ -42,7 +125,12 @@ class DoctorListCreateView(generics.ListCreateAPIView):
         )
 
 
-class DoctorDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DoctorDetailView(
+    ConditionalRetrieveMixin,
+    OptimisticUpdateMixin,
+    SparseFieldsMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
 
     queryset = Doctor.objects.all()
     serializer_class = DoctorSerializer
@@ -84,6 +172,14 @@ class DoctorDetailView(generics.RetrieveUpdateDestroyAPIView):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        doctor_directory_changed()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        doctor_directory_changed()
+
     def destroy(self, request, *args, **kwargs):
 
         try:
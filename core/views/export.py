@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework import permissions
+from rest_framework.views import APIView
+from ..export import (
+    MAPPING_EXPORT_COLUMNS,
+    PATIENT_EXPORT_COLUMNS,
+    accepts_encoding,
+    gzip_stream,
+    iter_export,
+)
+from ..models import Patient
+from ..renderers import CSVRenderer, NDJSONRenderer
+from .mixins import AppointmentRangeMixin
+
+
+# `ExportView` streams a queryset as CSV or NDJSON (chosen with `?format=` or `Accept`), gzipped
+# on the fly when the client accepts it. Subclasses set `queryset` or override `get_queryset`, as
+# with DRF's generic views.
+class ExportView(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    queryset = None
+    columns = ()
+    filename = "export"
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.accepted_renderer.format
+        chunk_size = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+        chunks = iter_export(self.get_queryset(), self.columns, export_format, chunk_size)
+
+        compress = accepts_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), "gzip")
+        if compress:
+            chunks = gzip_stream(chunks)
+
+        response = StreamingHttpResponse(
+            chunks, content_type=request.accepted_renderer.media_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.filename}.{export_format}"'
+        )
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
+
+
+class PatientExportView(ExportView):
+
+    columns = PATIENT_EXPORT_COLUMNS
+    filename = "patients"
+
+    def get_queryset(self):
+        return Patient.objects.filter(user=self.request.user).order_by("created_at", "id")
+
+
+class MappingExportView(AppointmentRangeMixin, ExportView):
+
+    columns = MAPPING_EXPORT_COLUMNS
+    filename = "appointments"
+
+    def get_queryset(self):
+        return (
+            self.get_appointments()
+            .filter(patient__user=self.request.user)
+            .order_by("appointment_date", "appointment_time", "id")
+        )
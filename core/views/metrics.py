@@ -0,0 +1,18 @@
+from django.http import HttpResponse
+from rest_framework.views import APIView
+from ..instrumentation import database_metric_lines, registry
+from ..permissions import HasScrapeToken
+
+
+# The `MetricsView` class exposes the in-process request and database connection metrics in the
+# Prometheus text format.
+class MetricsView(APIView):
+
+    authentication_classes = []
+    permission_classes = [HasScrapeToken]
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render(database_metric_lines()),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
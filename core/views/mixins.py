@@ -0,0 +1,421 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from ..concurrency import conditional_update
+from ..idempotency import (
+    get_idempotency_store,
+    request_fingerprint,
+    request_scope,
+)
+from ..conditional import (
+    PreconditionFailed,
+    alist_state,
+    conditional_response,
+    if_match_versions,
+    list_etag,
+    list_state,
+    object_validators,
+    related_paths,
+    set_validators,
+)
+from ..archive import appointment_queryset
+from ..query_shaping import get_related_columns, shape_queryset
+from ..readplans import get_read_plan
+from ..serializers import AppointmentRangeSerializer
+
+
+def sparse_fields(view):
+    """The field names a `SparseFieldsMixin` view was asked for, or None to render them all."""
+    get_sparse_fields = getattr(view, "get_sparse_fields", None)
+    return get_sparse_fields() if get_sparse_fields else None
+
+
+def rendered_relations(view):
+    """The relations whose rows the view's response renders (see `related_paths`)."""
+    return related_paths(view.get_serializer_class(), sparse_fields(view))
+
+
+# `QueryShapingMixin` fetches the related rows rendered by the view's serializer together with
+# the queryset, so list and detail responses cost a constant number of queries. Sparse fieldsets
+# only join the relations of the requested fields.
+class QueryShapingMixin:
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return shape_queryset(queryset, self.get_serializer_class(), sparse_fields(self))
+
+
+# `ReadPlanListMixin` renders list responses through the serializer's compiled `ReadPlan`: rows are
+# read with `.values()` and formatted field by field, skipping model instances and the generic
+# serializer machinery. Serializers the plan cannot express fall back to the regular `list`.
+# `aget`/`alist` are the same path through the async ORM, served by `AsyncReadView`.
+class ReadPlanListMixin:
+
+    def get_read_plan(self):
+        return get_read_plan(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_read_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = plan.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page))
+        return Response(plan.render(rows))
+
+    async def aget(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        plan = self.get_read_plan()
+        if plan is None:
+            return await sync_to_async(self.list)(request, *args, **kwargs)
+
+        rows = plan.values(self.filter_queryset(self.get_queryset()))
+        page = await self.apaginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page))
+        return Response(plan.render([row async for row in rows]))
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        if not hasattr(self.paginator, "apaginate_queryset"):
+            return await sync_to_async(self.paginate_queryset)(queryset)
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+
+_readable_fields = {}
+
+
+def readable_fields(serializer_class):
+    """
+    Map the names of the fields `serializer_class` renders, in output order, to the model
+    attribute their source starts with.
+    """
+    if serializer_class not in _readable_fields:
+        _readable_fields[serializer_class] = {
+            name: (field.source_attrs or [None])[0]
+            for name, field in serializer_class().fields.items()
+            if not field.write_only
+        }
+    return _readable_fields[serializer_class]
+
+
+def _deferred_columns(model, needed):
+    return [
+        field.name
+        for field in model._meta.concrete_fields
+        if not field.is_relation and not field.primary_key and field.name not in needed
+    ]
+
+
+# `SparseFieldsMixin` lets clients pick the fields of read responses with `?fields=a,b` or drop
+# some with `?exclude=c`. Besides trimming the serializer output it keeps unrequested columns in
+# the database: read plans select only the needed columns and other querysets defer them.
+class SparseFieldsMixin:
+
+    fields_query_param = "fields"
+    exclude_query_param = "exclude"
+    validator_columns = ()
+
+    def get_sparse_fields(self):
+        """The requested field names, or None when the full representation is wanted."""
+        if hasattr(self, "_sparse_fields"):
+            return self._sparse_fields
+
+        self._sparse_fields = None
+        params = self.request.query_params
+        if self.request.method not in ("GET", "HEAD") or not (
+            self.fields_query_param in params or self.exclude_query_param in params
+        ):
+            return None
+
+        available = readable_fields(self.get_serializer_class())
+        requested = {}
+        for param in (self.fields_query_param, self.exclude_query_param):
+            names = {name.strip() for name in params.get(param, "").split(",")} - {""}
+            unknown = names.difference(available)
+            if unknown:
+                raise ValidationError(
+                    {param: f"Unknown field(s): {', '.join(sorted(unknown))}"}
+                )
+            requested[param] = names
+
+        selected = requested[self.fields_query_param] or set(available)
+        selected -= requested[self.exclude_query_param]
+        self._sparse_fields = tuple(name for name in available if name in selected)
+        return self._sparse_fields
+
+    def get_read_plan(self):
+        plan = super().get_read_plan()
+        fields = self.get_sparse_fields()
+        if plan is None or fields is None:
+            return plan
+        return plan.restrict(fields)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+
+        # Only plain columns are deferred: relations may be traversed by `select_related`, and
+        # ordering columns are read back by keyset pagination.
+        serializer_class = self.get_serializer_class()
+        sources = readable_fields(serializer_class)
+        needed = {sources[name] for name in fields}
+        needed.update(self.validator_columns)
+        needed.update(
+            name.lstrip("-").split("__")[0]
+            for name in queryset.query.order_by or queryset.model._meta.ordering
+            if isinstance(name, str)
+        )
+        deferred = _deferred_columns(queryset.model, needed)
+        # Rows joined for the requested fields load only the columns those fields read.
+        for path, columns in get_related_columns(serializer_class, fields).items():
+            if columns is not None:
+                model = queryset.model
+                for attr in path.split("__"):
+                    model = model._meta.get_field(attr).related_model
+                needed_columns = columns.union(self.validator_columns)
+                deferred.extend(
+                    f"{path}__{name}" for name in _deferred_columns(model, needed_columns)
+                )
+        return queryset.defer(*deferred) if deferred else queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+
+# `ConditionalListMixin` answers `If-None-Match` on list GETs with a 304 from an ETag computed by
+# one aggregate query, before any row is fetched or serialized. The row count of that aggregate is
+# kept in `list_count` for the paginator, which then skips its COUNT. Lists send no Last-Modified:
+# deleting a row other than the newest leaves the newest `updated_at` as it was, so only the ETag
+# (which also carries the count) notices.
+class ConditionalListMixin:
+
+    list_count = None
+
+    def get_list_etag(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        self.list_count, last_modified = list_state(queryset, rendered_relations(self))
+        return list_etag(self.request, self.list_count, last_modified)
+
+    async def aget_list_etag(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        self.list_count, last_modified = await alist_state(queryset, rendered_relations(self))
+        return list_etag(self.request, self.list_count, last_modified)
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_list_etag()
+        response = conditional_response(request, etag, None)
+        if response is not None:
+            return response
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, None)
+        return response
+
+    async def aget(self, request, *args, **kwargs):
+        etag = await self.aget_list_etag()
+        response = conditional_response(request, etag, None)
+        if response is not None:
+            return response
+        response = await super().aget(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, None)
+        return response
+
+
+# `ConditionalRetrieveMixin` does the same for detail GETs from the row's `updated_at`; the fetched
+# instance is reused by `retrieve`, so a 200 costs no extra query and a 304 skips serialization.
+# `aget` fetches the instance through the async ORM and then runs the same `retrieve`.
+class ConditionalRetrieveMixin:
+
+    # Read by the validators, so sparse fieldsets must not defer them (see `SparseFieldsMixin`).
+    validator_columns = ("updated_at",)
+
+    def get_object(self):
+        if not hasattr(self, "_object"):
+            self._object = super().get_object()
+        return self._object
+
+    async def aget_object(self):
+        """`get_object` through the async ORM, with the same 404s and permission checks."""
+        if not hasattr(self, "_object"):
+            queryset = self.filter_queryset(self.get_queryset())
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            try:
+                instance = await queryset.aget(**lookup)
+            except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+                raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+            self.check_object_permissions(self.request, instance)
+            self._object = instance
+        return self._object
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = object_validators(
+            request, self.get_object(), rendered_relations(self)
+        )
+        response = conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
+
+    async def aget(self, request, *args, **kwargs):
+        etag, last_modified = object_validators(
+            request, await self.aget_object(), rendered_relations(self)
+        )
+        response = conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = self.retrieve(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
+
+
+# `OptimisticUpdateMixin` makes updates carrying `If-Match` conditional on the row still having
+# the `updated_at` the client saw (the ETag of a detail GET). The check is a single conditional
+# UPDATE, and a lost race answers 412 with the row's current validators.
+class OptimisticUpdateMixin:
+
+    def perform_update(self, serializer):
+        versions = if_match_versions(self.request)
+        if versions is None:
+            super().perform_update(serializer)
+        else:
+            if versions and serializer.instance.updated_at not in versions:
+                raise PreconditionFailed()
+            conditional_update(serializer, versions)
+        self.updated_instance = serializer.instance
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        instance = getattr(self, "updated_instance", None)
+        if instance is not None and response.status_code == 200:
+            # The ETag a following GET would send, so clients can chain conditional updates.
+            set_validators(
+                response,
+                *object_validators(
+                    request, instance, rendered_relations(self)
+                ),
+            )
+        return response
+
+    def handle_exception(self, exc):
+        if not isinstance(exc, PreconditionFailed):
+            return super().handle_exception(exc)
+        response = Response(
+            {"status": "error", "message": str(exc.detail)},
+            status=status.HTTP_412_PRECONDITION_FAILED,
+        )
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        current = self.get_queryset().filter(pk=self.kwargs[lookup]).first()
+        if current is not None:
+            etag, last_modified = object_validators(
+                self.request, current, rendered_relations(self)
+            )
+            set_validators(response, etag, last_modified)
+        return response
+
+
+# `IdempotentCreateMixin` makes POSTs carrying an `Idempotency-Key` header safe to retry: the first
+# request's response is stored and later requests with the same key are answered from the store,
+# without running validation or the create transaction again. Server errors are not stored, so
+# those requests can be retried for real.
+class IdempotentCreateMixin:
+
+    idempotency_header = "Idempotency-Key"
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(self.idempotency_header)
+        if not key:
+            return super().post(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {
+                    "status": "error",
+                    "message": f"{self.idempotency_header} must be at most 255 characters",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        store = get_idempotency_store()
+        fingerprint = request_fingerprint(request)
+        scope = request_scope(request, fingerprint)
+
+        stored = store.get(scope, key)
+        claim = store.claim(scope, key, fingerprint) if stored is None else None
+        if claim is not None:
+            try:
+                response = super().post(request, *args, **kwargs)
+            except Exception:
+                store.release(scope, key, claim)
+                raise
+            if response.status_code >= 500:
+                store.release(scope, key, claim)
+            else:
+                store.complete(
+                    scope, key, claim, fingerprint, response.status_code, response.data
+                )
+            return response
+
+        stored = stored or store.get(scope, key)
+        if stored is None or stored.pending:
+            return Response(
+                {
+                    "status": "error",
+                    "message": "A request with this Idempotency-Key is still in progress",
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        if stored.fingerprint != fingerprint:
+            return Response(
+                {
+                    "status": "error",
+                    "message": "This Idempotency-Key was used with a different request",
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(
+            stored.body, status=stored.status_code, headers={"Idempotent-Replayed": "true"}
+        )
+
+
+# `AppointmentRangeMixin` narrows mapping reads to `?date_from=` / `?date_to=` (inclusive
+# appointment dates). The range is resolved in `initial`, ahead of the reads (async ones included),
+# and picks the rows' source: the live table, or the history view with the archive when the range
+# may reach archived rows (see `core.archive`).
+class AppointmentRangeMixin:
+
+    appointments = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in ("GET", "HEAD"):
+            query = AppointmentRangeSerializer(data=request.query_params)
+            query.is_valid(raise_exception=True)
+            self.appointments = appointment_queryset(**query.validated_data)
+
+    def get_appointments(self):
+        if self.appointments is None:
+            return appointment_queryset()
+        return self.appointments
@@ -3,12 +3,28 @@ from rest_framework.response import Response
 from django.db import transaction
 from ..models import Patient
 from ..serializers import PatientSerializer
+from ..pagination import PageNumberOrKeysetPagination
+from .mixins import (
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    IdempotentCreateMixin,
+    OptimisticUpdateMixin,
+    ReadPlanListMixin,
+    SparseFieldsMixin,
+)
 from ..permissions import IsOwnerOrReadOnly
 from django.core.exceptions import ObjectDoesNotExist
 
 
-class PatientListCreateView(generics.ListCreateAPIView):
+class PatientListCreateView(
+    IdempotentCreateMixin,
+    ConditionalListMixin,
+    SparseFieldsMixin,
+    ReadPlanListMixin,
+    generics.ListCreateAPIView,
+):
     serializer_class = PatientSerializer
+    pagination_class = PageNumberOrKeysetPagination
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self):
@@ -40,7 +56,12 @@ class PatientListCreateView(generics.ListCreateAPIView):
         )
 
 
-class PatientDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PatientDetailView(
+    ConditionalRetrieveMixin,
+    OptimisticUpdateMixin,
+    SparseFieldsMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
 
     serializer_class = PatientSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
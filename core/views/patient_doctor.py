@@ -1,21 +1,45 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.db import transaction
-from ..models import Patient, PatientDoctorTable
+from django.db.models import F
+from ..models import Doctor, Patient, PatientDoctorTable
 from ..serializers import (
     PatientDoctorMappingSerializer,
 )
 from ..permissions import IsOwnerOrReadOnly, IsPatientOwner
+from ..pagination import PageNumberOrKeysetPagination
+from ..booking import SlotUnavailable, reserve_slot
+from ..tasks.handlers import audit, notify_appointment_booked
+from ..conditional import conditional_response, list_etag, set_validators
+from .mixins import (
+    AppointmentRangeMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    IdempotentCreateMixin,
+    QueryShapingMixin,
+    ReadPlanListMixin,
+    SparseFieldsMixin,
+    readable_fields,
+)
 from django.core.exceptions import ObjectDoesNotExist
 
 
-class MappingListCreateView(generics.ListCreateAPIView):
+class MappingListCreateView(
+    AppointmentRangeMixin,
+    IdempotentCreateMixin,
+    ConditionalListMixin,
+    SparseFieldsMixin,
+    ReadPlanListMixin,
+    QueryShapingMixin,
+    generics.ListCreateAPIView,
+):
 
     serializer_class = PatientDoctorMappingSerializer
+    pagination_class = PageNumberOrKeysetPagination
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return PatientDoctorTable.objects.filter(patient__user=self.request.user)
+        return self.get_appointments().filter(patient__user=self.request.user)
 
     def create(self, request, *args, **kwargs):
         if "patient" in request.data:
@@ -39,18 +63,27 @@ class MappingListCreateView(generics.ListCreateAPIView):
 
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            with transaction.atomic():
+            try:
                 self.perform_create(serializer)
-                headers = self.get_success_headers(serializer.data)
+            except SlotUnavailable as exc:
                 return Response(
                     {
-                        "status": "success",
-                        "message": "Doctor-patient mapping created successfully",
-                        "data": serializer.data,
+                        "status": "error",
+                        "message": "This appointment slot is already booked",
+                        "alternatives": [slot.as_dict() for slot in exc.alternatives()],
                     },
-                    status=status.HTTP_201_CREATED,
-                    headers=headers,
+                    status=status.HTTP_409_CONFLICT,
                 )
+            headers = self.get_success_headers(serializer.data)
+            return Response(
+                {
+                    "status": "success",
+                    "message": "Doctor-patient mapping created successfully",
+                    "data": serializer.data,
+                },
+                status=status.HTTP_201_CREATED,
+                headers=headers,
+            )
         return Response(
             {
                 "status": "error",
@@ -60,67 +93,151 @@ class MappingListCreateView(generics.ListCreateAPIView):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    def perform_create(self, serializer):
+        # Runs in its own transaction under the slot lock, see `core.booking`.
+        reserve_slot(serializer, on_reserved=self.queue_followups)
+
+    def queue_followups(self, mapping):
+        # Queued in the booking's transaction, so they are committed with the appointment.
+        notify_appointment_booked.enqueue(mapping_id=mapping.pk)
+        audit(
+            "appointment.booked",
+            user_id=self.request.user.pk,
+            mapping_id=mapping.pk,
+            doctor_id=mapping.doctor_id,
+        )
+
 
 # This class is a view in a Django REST framework API that lists doctors assigned to a specific
-# patient, with permission checks.
-class PatientDoctorsView(generics.ListAPIView):
+# patient, with permission checks. Ownership, existence and the mappings themselves come from a
+# single query: the patient row LEFT JOINed to its mappings and their doctors. The conditional-GET
+# validators are derived from the same rows. A sparse fieldset selects only the columns (and
+# joins) of the requested fields.
+class PatientDoctorsView(SparseFieldsMixin, generics.ListAPIView):
 
     serializer_class = PatientDoctorMappingSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    mapping_fields = [field.name for field in PatientDoctorTable._meta.concrete_fields]
+
+    def renders(self, name):
+        fields = self.get_sparse_fields()
+        return fields is None or name in fields
+
+    def get_mapping_fields(self):
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return self.mapping_fields
+        sources = readable_fields(self.get_serializer_class())
+        needed = {sources[name] for name in fields} | {"id", "updated_at"}
+        return [name for name in self.mapping_fields if name in needed]
+
     def get_queryset(self):
-        patient_id = self.kwargs["patient_id"]
+        lookups = {
+            f"mapping__{name}": F(f"doctor_patient__{name}")
+            for name in self.get_mapping_fields()
+        }
+        names = ["user_id", "updated_at"]
+        if self.renders("patient_name"):
+            names += ["first_name", "last_name"]
+        if self.renders("doctor_name"):
+            lookups.update(
+                doctor__first_name=F("doctor_patient__doctor__first_name"),
+                doctor__last_name=F("doctor_patient__doctor__last_name"),
+                doctor__updated_at=F("doctor_patient__doctor__updated_at"),
+            )
+        return (
+            Patient.objects.filter(id=self.kwargs["patient_id"])
+            .order_by("doctor_patient__appointment_date", "doctor_patient__id")
+            .values(*names, **lookups)
+        )
 
-        try:
-            patient = Patient.objects.get(id=patient_id)
-            if patient.user != self.request.user:
-                return PatientDoctorTable.objects.none()
-            return PatientDoctorTable.objects.filter(patient_id=patient_id)
-        except Patient.DoesNotExist:
-            return PatientDoctorTable.objects.none()
+    def build_mapping(self, patient, row):
+        values = {
+            PatientDoctorTable._meta.get_field(name).attname: row[f"mapping__{name}"]
+            for name in self.get_mapping_fields()
+        }
+        mapping = PatientDoctorTable(**values)
+        mapping.patient = patient
+        if "doctor__first_name" in row:
+            mapping.doctor = Doctor(
+                id=values["doctor_id"],
+                first_name=row["doctor__first_name"],
+                last_name=row["doctor__last_name"],
+            )
+        return mapping
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
+        rows = list(self.get_queryset())
 
-        if not queryset.exists():
-            patient_id = self.kwargs["patient_id"]
-            if Patient.objects.filter(id=patient_id).exists():
-                if not Patient.objects.filter(
-                    id=patient_id, user=request.user
-                ).exists():
-                    return Response(
-                        {
-                            "status": "error",
-                            "message": "You don't have permission to view this patient's doctors",
-                        },
-                        status=status.HTTP_403_FORBIDDEN,
-                    )
-                return Response(
-                    {
-                        "status": "success",
-                        "message": "No doctors assigned to this patient",
-                        "data": [],
-                    },
-                    status=status.HTTP_200_OK,
-                )
-            else:
-                return Response(
-                    {"status": "error", "message": "Patient not found"},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
+        if not rows:
+            return Response(
+                {"status": "error", "message": "Patient not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if rows[0]["user_id"] != request.user.pk:
+            return Response(
+                {
+                    "status": "error",
+                    "message": "You don't have permission to view this patient's doctors",
+                },
+                status=status.HTTP_403_FORBIDDEN,
+            )
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"status": "success", "data": serializer.data})
+        if rows[0]["mapping__id"] is None:
+            return Response(
+                {
+                    "status": "success",
+                    "message": "No doctors assigned to this patient",
+                    "data": [],
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        last_modified = max(
+            stamp
+            for row in rows
+            for stamp in (
+                row["updated_at"],
+                row.get("doctor__updated_at"),
+                row["mapping__updated_at"],
+            )
+            if stamp is not None
+        )
+        # Like `ConditionalListMixin`, the list is validated by its ETag alone.
+        etag = list_etag(request, len(rows), last_modified)
+        not_modified = conditional_response(request, etag, None)
+        if not_modified is not None:
+            return not_modified
+
+        patient = Patient(
+            id=self.kwargs["patient_id"],
+            user_id=rows[0]["user_id"],
+            first_name=rows[0].get("first_name", ""),
+            last_name=rows[0].get("last_name", ""),
+        )
+        mappings = [self.build_mapping(patient, row) for row in rows]
+        serializer = self.get_serializer(mappings, many=True)
+        response = Response({"status": "success", "data": serializer.data})
+        return set_validators(response, etag, None)
 
 
 # The `MappingDetailView` class retrieves and serializes a specific `PatientDoctorMapping` instance
 # based on the authenticated user's ownership.
-class MappingDetailView(generics.RetrieveDestroyAPIView):
+class MappingDetailView(
+    ConditionalRetrieveMixin,
+    SparseFieldsMixin,
+    QueryShapingMixin,
+    generics.RetrieveDestroyAPIView,
+):
     serializer_class = PatientDoctorMappingSerializer
     permission_classes = (permissions.IsAuthenticated, IsPatientOwner)
 
     def get_queryset(self):
-        return PatientDoctorTable.objects.filter(patient__user=self.request.user)
+        return PatientDoctorTable.objects.filter(patient__user=self.request.user).annotate(
+            patient_user_id=F("patient__user_id")
+        )
 
     def retrieve(self, request, *args, **kwargs):
         try:
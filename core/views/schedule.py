@@ -0,0 +1,83 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from ..models import Doctor, DoctorSchedule
+from ..scheduling import doctor_free_slots, search_free_slots
+from ..serializers import AvailabilityQuerySerializer, DoctorScheduleSerializer
+
+
+# The `DoctorScheduleView` class lists and creates the weekly working-hours windows of a doctor.
+class DoctorScheduleView(generics.ListCreateAPIView):
+
+    serializer_class = DoctorScheduleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_doctor(self):
+        return get_object_or_404(Doctor, pk=self.kwargs["pk"])
+
+    def get_queryset(self):
+        return DoctorSchedule.objects.filter(doctor_id=self.kwargs["pk"])
+
+    def perform_create(self, serializer):
+        serializer.save(doctor=self.get_doctor())
+
+
+# The `DoctorAvailabilityView` class returns the free slots of one doctor between `start` and `end`.
+class DoctorAvailabilityView(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        doctor = get_object_or_404(Doctor, pk=pk, is_active=True)
+        query = AvailabilityQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Invalid availability query",
+                    "errors": query.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        slots = doctor_free_slots(
+            doctor, query.validated_data["start"], query.validated_data["end"]
+        )
+        return Response(
+            {"status": "success", "data": [slot.as_dict() for slot in slots]}
+        )
+
+
+# The `AvailabilitySearchView` class returns the earliest free slots across all active doctors of a
+# specialization.
+class AvailabilitySearchView(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = AvailabilityQuerySerializer(data=request.query_params)
+        if not query.is_valid() or not query.validated_data.get("specialization"):
+            errors = query.errors if query.errors else {
+                "specialization": ["This field is required."]
+            }
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Invalid availability query",
+                    "errors": errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = query.validated_data
+        slots, doctor_names = search_free_slots(
+            data["specialization"], data["start"], data["end"], data["limit"]
+        )
+        return Response(
+            {
+                "status": "success",
+                "data": [slot.as_dict(doctor_names[slot.doctor_id]) for slot in slots],
+            }
+        )
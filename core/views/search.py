@@ -0,0 +1,45 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from ..search import DOCUMENT_TYPES, get_memory_search, get_search_backend
+from ..serializers import SearchQuerySerializer
+
+
+# The `SearchView` class ranks doctors (by name and specialization) or the caller's own patients
+# (by name, email and phone) against every word of `q`, each word matching as a prefix:
+#
+#     GET /api/search/?q=card smi&type=doctor&limit=10
+#
+# Results come from the backend configured in `SEARCH["BACKEND"]`.
+class SearchView(APIView):
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_backend(self):
+        return get_search_backend()
+
+    def get(self, request):
+        query = SearchQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Invalid search query",
+                    "errors": query.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = query.validated_data
+        document_type = DOCUMENT_TYPES[data["type"]]
+        scope = request.user.pk if document_type.scope_field else None
+        results = self.get_backend().search(document_type, data["q"], scope, data["limit"])
+        return Response({"status": "success", "data": results})
+
+
+# The `AutocompleteView` class answers the same queries as `SearchView` from the in-process index
+# whatever the configured backend, for type-ahead inputs that query on every keystroke.
+class AutocompleteView(SearchView):
+
+    def get_backend(self):
+        return get_memory_search()
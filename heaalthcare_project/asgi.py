@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'heaalthcare_project.settings')
+# Read endpoints are served by async views under ASGI (see ASYNC_VIEWS in settings).
+os.environ.setdefault('ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
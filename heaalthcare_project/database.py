@@ -0,0 +1,113 @@
+"""
+DATABASES for the settings module, from environment variables (or `.env`).
+
+PostgreSQL is used when DB_NAME, DB_USER, DB_PASSWORD, DB_HOST and DB_PORT are all set, the local
+SQLite file otherwise. Connections are persistent (DB_CONN_MAX_AGE seconds, checked before reuse
+unless DB_CONN_HEALTH_CHECKS is off). With DB_POOL on, PostgreSQL connections come from an
+in-process psycopg pool instead, sized by DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE; a request waits up
+to DB_POOL_TIMEOUT seconds for a free connection before failing.
+
+Under ASGI (ASYNC_VIEWS on, as `asgi.py` sets it) connections are not persistent by default: the
+ORM runs in per-request threads there, whose connections Django cannot reuse or close reliably, so
+use DB_POOL instead. Setting DB_CONN_MAX_AGE anyway only warns.
+
+DB_REPLICAS lists read replicas, comma-separated: hosts (sharing the primary's credentials) on
+PostgreSQL, file paths relative to the project on SQLite, e.g. `DB_REPLICAS=replica.sqlite3`
+after `cp db.sqlite3 replica.sqlite3` to try replica routing (and its lag) locally. They become
+the aliases replica_1, replica_2, ... (see `core.routers`); tests run them as mirrors of default.
+"""
+
+import warnings
+from importlib.util import find_spec
+from decouple import config
+
+
+POSTGRES_VARIABLES = {
+    "NAME": "DB_NAME",
+    "USER": "DB_USER",
+    "PASSWORD": "DB_PASSWORD",
+    "HOST": "DB_HOST",
+    "PORT": "DB_PORT",
+}
+
+
+def connection_settings():
+    asynchronous = config("ASYNC_VIEWS", default=False, cast=bool)
+    max_age = config("DB_CONN_MAX_AGE", default=0 if asynchronous else 60, cast=int)
+    if asynchronous and max_age:
+        warnings.warn(
+            "DB_CONN_MAX_AGE is set under ASGI (ASYNC_VIEWS); Django does not support persistent "
+            "connections in async mode, use DB_POOL instead.",
+            RuntimeWarning,
+        )
+    return {
+        "CONN_MAX_AGE": max_age,
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+    }
+
+
+def pool_options():
+    """The psycopg pool options, or None when pooling is off or unavailable."""
+    if not config("DB_POOL", default=False, cast=bool):
+        return None
+    if find_spec("psycopg_pool") is None:
+        warnings.warn(
+            "DB_POOL is on but psycopg_pool is not installed (pip install 'psycopg[pool]'); "
+            "falling back to persistent connections.",
+            RuntimeWarning,
+        )
+        return None
+    return {
+        "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+        "max_size": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+        "timeout": config("DB_POOL_TIMEOUT", default=10.0, cast=float),
+        "max_idle": config("DB_POOL_MAX_IDLE", default=600.0, cast=float),
+        "max_lifetime": config("DB_POOL_MAX_LIFETIME", default=3600.0, cast=float),
+    }
+
+
+def postgres_database(params):
+    database = {
+        "ENGINE": "django.db.backends.postgresql",
+        **params,
+        **connection_settings(),
+        "OPTIONS": {},
+    }
+    pool = pool_options()
+    if pool is not None:
+        # Pooled connections go back to the pool at the end of each request; Django refuses to
+        # combine the pool with persistent connections, and the pool checks connections itself.
+        database.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+        database["OPTIONS"]["pool"] = pool
+    return database
+
+
+def sqlite_database(base_dir):
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": base_dir / "db.sqlite3",
+        **connection_settings(),
+    }
+
+
+def replicas(primary, base_dir):
+    databases = {}
+    names = config("DB_REPLICAS", default="", cast=lambda value: value.split(","))
+    for number, name in enumerate(filter(None, map(str.strip, names)), start=1):
+        replica = {**primary, "OPTIONS": dict(primary.get("OPTIONS", {}))}
+        if primary["ENGINE"] == "django.db.backends.sqlite3":
+            replica["NAME"] = base_dir / name
+        else:
+            replica["HOST"] = name
+        replica["TEST"] = {"MIRROR": "default"}
+        databases[f"replica_{number}"] = replica
+    return databases
+
+
+def build_databases(base_dir):
+    params = {key: config(name, default=None) for key, name in POSTGRES_VARIABLES.items()}
+    if None in params.values():
+        primary = sqlite_database(base_dir)
+    else:
+        primary = postgres_database(params)
+    return {"default": primary, **replicas(primary, base_dir)}
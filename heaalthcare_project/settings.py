@@ -14,6 +14,7 @@ import os
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
+from .database import build_databases
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -54,6 +55,16 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Per-view query/latency instrumentation (Server-Timing headers and /api/metrics/), opt-in.
+CORE_METRICS = {
+    "ENABLED": config("CORE_METRICS_ENABLED", default=False, cast=bool),
+    "SAMPLE_SIZE": 1024,
+    "SCRAPE_TOKEN": os.environ.get("CORE_METRICS_TOKEN"),
+}
+
+if CORE_METRICS["ENABLED"]:
+    MIDDLEWARE.insert(0, "core.instrumentation.QueryMetricsMiddleware")
+
 ROOT_URLCONF = "heaalthcare_project.urls"
 
 TEMPLATES = [
@@ -78,33 +89,84 @@ WSGI_APPLICATION = "heaalthcare_project.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-POSTGRES_DB = os.environ.get("DB_NAME")
-POSTGRES_PASSWORD = os.environ.get("DB_PASSWORD")
-POSTGRES_USER = os.environ.get("DB_USER")
-POSTGRES_HOST = os.environ.get("DB_HOST")
-POSTGRES_PORT = os.environ.get("DB_PORT")
+DATABASES = build_databases(BASE_DIR)
 
+# Reads of GET requests go to a random replica, unless the user wrote something within the last
+# PIN_SECONDS (tracked in the PIN_CACHE cache, which must be shared between processes; the
+# core.W001 system check flags a local-memory one).
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
 
-POSTGRES_READY = (
-    POSTGRES_DB is not None
-    and POSTGRES_PASSWORD is not None
-    and POSTGRES_USER is not None
-    and POSTGRES_HOST is not None
-    and POSTGRES_PORT is not None
-)
+READ_REPLICAS = {
+    "ALIASES": [alias for alias in DATABASES if alias != "default"],
+    "PIN_SECONDS": config("DB_REPLICA_PIN_SECONDS", default=5, cast=int),
+    "PIN_CACHE": "default",
+}
 
+if READ_REPLICAS["ALIASES"]:
+    MIDDLEWARE.append("core.routers.ReplicaRoutingMiddleware")
 
-if POSTGRES_READY:
-    DATABASES = {
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+
+if CACHE_REDIS_URL:
+    CACHES = {
         "default": {
-            "ENGINE": "django.db.backends.postgresql_psycopg2",
-            "NAME": POSTGRES_DB,
-            "USER": POSTGRES_USER,
-            "PASSWORD": POSTGRES_PASSWORD,
-            "HOST": POSTGRES_HOST,
-            "PORT": POSTGRES_PORT,
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
         }
     }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Active-doctor directory: serialized list pages cached in-process and in the shared cache,
+# invalidated by a version bump on every doctor write.
+DOCTOR_DIRECTORY_CACHE = {
+    "ENABLED": True,
+    "SHARED_BACKEND": "core.cache.DjangoCacheBackend",
+    "SHARED_BACKEND_OPTIONS": {"alias": "default"},
+    "LOCAL_MAX_ENTRIES": 256,
+    "TTL": 60,
+    "VERSION_TTL": 1,
+    # Absolute doctor-list URLs re-rendered by a background task after every doctor write.
+    "WARM_URLS": [],
+}
+
+# Bulk patient/doctor import: rows validated and inserted per batch.
+BULK_IMPORT = {
+    "BATCH_SIZE": 500,
+    "MAX_BATCH_SIZE": 5000,
+}
+
+# Rows fetched per round-trip by the streaming export endpoints.
+EXPORT_CHUNK_SIZE = 2000
+
+# Appointments older than DAYS, and inactive ones older than INACTIVE_DAYS, are moved to the
+# archive table by `manage.py archive_mappings`, BATCH_SIZE rows per transaction. Mapping lists
+# and exports with a date range starting before the newest archived date read archived rows too;
+# processes re-check that date every HORIZON_TTL seconds. On PostgreSQL the live table is
+# partitioned by month, with partitions created MONTHS_AHEAD months ahead.
+MAPPING_ARCHIVE = {
+    "DAYS": 365,
+    "INACTIVE_DAYS": 30,
+    "BATCH_SIZE": 1000,
+    "HORIZON_TTL": 60,
+    "MONTHS_AHEAD": 12,
+}
+
+# Longest date range (in days) an availability query may span.
+AVAILABILITY_MAX_DAYS = 31
+
+# Alternatives offered when a booking hits an already taken slot.
+BOOKING = {
+    "ALTERNATIVES": 5,
+    "ALTERNATIVE_DAYS": 7,
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -126,9 +188,19 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    # orjson-backed when installed, otherwise identical to DRF's stdlib JSON classes.
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "EXCEPTION_HANDLER": "core.utils.custom_exception_handler",
@@ -138,6 +210,75 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": "core.authentication.VersionedTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "core.authentication.VersionedTokenRefreshSerializer",
+}
+
+# Stored outcomes of create requests sent with an Idempotency-Key header: kept TTL seconds in the
+# database (purge with `manage.py purge_idempotency_keys`), hot ones also in a per-process LRU.
+IDEMPOTENCY = {
+    "TTL": 24 * 60 * 60,
+    # Seconds a request holds its key while running; retries take over the key of a request
+    # whose worker died. Keep it above the slowest create request.
+    "LEASE": 60,
+    "LOCAL_MAX_ENTRIES": 1024,
+    "LOCAL_TTL": 300,
+}
+
+# Upper bound on the sub-requests of one POST /api/batch/ call.
+BATCH = {
+    "MAX_REQUESTS": 25,
+}
+
+# Serve the GETs of the patient, doctor and mapping read endpoints from async views (see
+# core.views.AsyncReadView). asgi.py turns this on; under WSGI the synchronous views are faster.
+ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+
+# Search backend of GET /api/search/: "memory" (per-process inverted index, also behind
+# /api/search/autocomplete/) or "database" (PostgreSQL full-text / SQLite FTS5). Memory indexes
+# check the shared version of their scope at most every VERSION_TTL seconds and re-read rows
+# updated up to SYNC_MARGIN seconds before their last sync. Versions only reach other processes
+# through a shared cache (CACHE_REDIS_URL); on local memory every scope is re-synced each
+# POLL_INTERVAL seconds instead.
+SEARCH = {
+    "BACKEND": config("SEARCH_BACKEND", default="memory"),
+    "VERSION_TTL": 1,
+    "SYNC_MARGIN": 5,
+    "MAX_SCOPES": 1024,
+    "POLL_INTERVAL": 30,
+}
+
+# Background tasks (`core.tasks`), run by `manage.py run_task_worker`. Failed tasks are retried up
+# to MAX_ATTEMPTS times, BACKOFF_BASE * 2^n seconds apart (capped at BACKOFF_MAX, with jitter); a
+# claimed task whose worker stays silent for LEASE_SECONDS is handed to another worker.
+TASKS = {
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF_BASE": 2,
+    "BACKOFF_MAX": 600,
+    "LEASE_SECONDS": 300,
+    "BATCH_SIZE": 10,
+    "POLL_INTERVAL": 1.0,
+}
+
+# Notification mails sent by background tasks.
+EMAIL_BACKEND = config(
+    "EMAIL_BACKEND", default="django.core.mail.backends.console.EmailBackend"
+)
+DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", default="no-reply@localhost")
+
+# Audit events (one JSON line each) go to the `core.audit` logger; add handlers to fan them out.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"core.audit": {"handlers": ["console"], "level": "INFO"}},
+}
+
+# Token versions looked up by CachedJWTAuthentication are cached in-process for TTL seconds, which
+# bounds how long a revoked token keeps working in other processes.
+JWT_USER_CACHE = {
+    "TTL": 30,
+    "MAX_ENTRIES": 10000,
 }
 
 